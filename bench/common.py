@@ -0,0 +1,150 @@
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from glob import glob
+
+# ---------------------------------------------------------
+# 벤치마크 공용 도구: 시간 측정 / 가짜 데이터 / 임시 Postgres
+# ---------------------------------------------------------
+
+def measure(fn, repeat=5, setup=None, warmup=1):
+    """
+    fn을 repeat번 실행한 시간 통계 (ms). setup은 매 실행 전에 호출되며 측정에 포함되지 않음.
+    반환값: {min_ms, median_ms, mean_ms, max_ms, runs}
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat,
+    }
+
+def roster_shape(total_characters, max_per_account=20):
+    """전체 캐릭터 수 → (원정대 수, 원정대당 캐릭터 수)"""
+    per_account = min(total_characters, max_per_account)
+    accounts = -(-total_characters // per_account)
+    return accounts, per_account
+
+def make_view_data(total_characters, weekly_per_char=3, daily_per_char=2, seed=0):
+    """
+    뷰 모델(build_roster_view) 입력용 가짜 캐릭터/숙제 행 (DB 조회 결과와 같은 모양)
+    updated_at은 최근 10일 안에서 골라서 일부는 지난 리셋 경계 이전(lazy 리셋 대상)이 됩니다.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    characters, todos = [], []
+    task_id = 0
+    for i in range(total_characters):
+        name = f"벤치캐릭{i:04d}"
+        characters.append({
+            "character_name": name, "server_name": "루페온", "character_class": "버서커",
+            "item_avg_level": round(rng.uniform(1600, 1740), 2), "combat_power": rng.randint(800, 3800),
+            "week_gold_spent": 0, "memo": "",
+        })
+        for category, count in (("주간", weekly_per_char), ("일일", daily_per_char)):
+            for t in range(count):
+                task_id += 1
+                todos.append({
+                    "id": task_id, "character_name": name, "task_name": f"{category}{t}",
+                    "category": category, "total_count": 1, "current_count": rng.randint(0, 1),
+                    "gold_reward": rng.choice([0, 5000, 11000, 16500, 28000]),
+                    "updated_at": now - timedelta(hours=rng.uniform(0, 240)),
+                })
+    return characters, todos
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+# ---------------------------------------------------------
+# 임시 Postgres
+# ---------------------------------------------------------
+def _find_pg_binary(name):
+    found = shutil.which(name)
+    if found:
+        return found
+    # Debian/Ubuntu 패키지는 PATH에 initdb/pg_ctl을 넣지 않음
+    candidates = sorted(glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    return candidates[-1] if candidates else None
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextmanager
+def throwaway_postgres(mode="initdb"):
+    """
+    벤치마크 전용 Postgres를 띄우고 POSTGRES_* 환경변수를 거기에 맞춥니다. (core.database import 전에 사용)
+    - initdb: 임시 디렉터리에 클러스터를 새로 만들고 끝나면 삭제 (fsync off)
+    - env: .env의 서버에 임시 데이터베이스를 만들고 끝나면 DROP
+    """
+    if mode == "initdb":
+        initdb, pg_ctl = _find_pg_binary("initdb"), _find_pg_binary("pg_ctl")
+        if not (initdb and pg_ctl):
+            raise RuntimeError("initdb/pg_ctl을 찾을 수 없습니다. --pg env로 기존 서버를 쓰세요.")
+        data_dir = tempfile.mkdtemp(prefix="loa-bench-pg-")
+        port = _free_port()
+        try:
+            subprocess.run([initdb, "-D", data_dir, "-U", "bench", "--auth=trust", "-E", "UTF8"],
+                           check=True, stdout=subprocess.DEVNULL)
+            subprocess.run([pg_ctl, "-D", data_dir, "-l", os.path.join(data_dir, "server.log"), "-w", "start",
+                            "-o", f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1 -c fsync=off "
+                                  "-c synchronous_commit=off -c full_page_writes=off"],
+                           check=True, stdout=subprocess.DEVNULL)
+            os.environ.update({
+                "POSTGRES_HOST": "127.0.0.1", "POSTGRES_PORT": str(port),
+                "POSTGRES_USER": "bench", "POSTGRES_PASSWORD": "", "POSTGRES_DB": "postgres",
+            })
+            yield {"mode": mode, "port": port}
+        finally:
+            from core.db_pool import close_pool
+            close_pool()
+            subprocess.run([pg_ctl, "-D", data_dir, "-m", "immediate", "stop"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            shutil.rmtree(data_dir, ignore_errors=True)
+        return
+
+    import psycopg2
+    from dotenv import load_dotenv
+    load_dotenv()
+    db_name = f"loa_bench_{os.getpid()}"
+    admin = dict(host=os.getenv("POSTGRES_HOST"), port=os.getenv("POSTGRES_PORT"),
+                 user=os.getenv("POSTGRES_USER"), password=os.getenv("POSTGRES_PASSWORD"),
+                 database=os.getenv("POSTGRES_DB"))
+    conn = psycopg2.connect(**admin)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE {db_name}")
+        os.environ["POSTGRES_DB"] = db_name
+        yield {"mode": mode, "database": db_name}
+    finally:
+        from core.db_pool import close_pool
+        close_pool()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS {db_name} WITH (FORCE)")
+        conn.close()
@@ -0,0 +1,52 @@
+"""
+벤치마크 결과 비교
+
+    python -m bench.compare bench/results/<기준>.json bench/results/<새 결과>.json [--threshold 10]
+
+항목/크기별 중앙값(median_ms)을 비교해 threshold(%) 이상 느려진 항목이 있으면 종료 코드 1
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(base, new, threshold):
+    """반환값: [(항목, 크기, 기준 ms, 새 ms, 변화율 %, 회귀 여부)]"""
+    rows = []
+    for name, by_size in new["results"].items():
+        for size, stats in by_size.items():
+            old_stats = base["results"].get(name, {}).get(size)
+            if not old_stats or "median_ms" not in stats or "median_ms" not in old_stats:
+                continue
+            before, after = old_stats["median_ms"], stats["median_ms"]
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append((name, size, before, after, change, change >= threshold))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="회귀로 볼 중앙값 증가율 (%%)")
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    print(f"기준 {base['meta']['commit']} → 새 결과 {new['meta']['commit']}")
+    rows = compare(base, new, args.threshold)
+    for name, size, before, after, change, regressed in rows:
+        mark = "❌" if regressed else ("✅" if change <= -args.threshold else "  ")
+        print(f"{mark} {name:34s} {size:>6s}  {before:>10.3f}ms → {after:>10.3f}ms  ({change:+.1f}%)")
+
+    regressions = [r for r in rows if r[5]]
+    if regressions:
+        print(f"\n{len(regressions)}개 항목이 {args.threshold:.0f}% 이상 느려졌습니다.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
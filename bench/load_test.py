@@ -0,0 +1,275 @@
+"""
+동시 세션 부하 테스트
+
+Streamlit AppTest로 main.py 세션을 여러 개 동시에 띄워서 실제 사용자처럼
+숙제 체크 / 메모 입력 / 저장 / 원정대 동기화 / 새로고침을 반복합니다.
+스텁 API 서버와 임시 Postgres를 쓰며, 동시 세션 수를 늘려 가면서
+rerun 지연 시간 백분위수, DB 커넥션 수, 오류율을 기록합니다.
+
+사용 예:
+    python -m bench.load_test --concurrency 1,5,10,25 --iterations 20
+    python -m bench.load_test --pg env --concurrency 50 --latency-ms 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from bench.common import git_commit, throwaway_postgres, roster_shape
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# 세션 한 번의 행동 비율
+ACTIONS = [("check", 45), ("memo", 20), ("flush", 15), ("rerun", 15), ("sync", 5)]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 2)
+
+
+class Recorder:
+    """세션 스레드들이 같이 쓰는 측정값"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}   # 행동 → [ms]
+        self.errors = {}      # 행동 → 횟수
+        self.error_samples = []
+
+    def add(self, action, ms, error=None):
+        with self.lock:
+            self.latencies.setdefault(action, []).append(ms)
+            if error:
+                self.errors[action] = self.errors.get(action, 0) + 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(f"{action}: {error}")
+
+    def summary(self):
+        with self.lock:
+            all_ms = sorted(ms for values in self.latencies.values() for ms in values)
+            total_errors = sum(self.errors.values())
+            by_action = {
+                action: {
+                    "count": len(values),
+                    "p50_ms": _percentile(sorted(values), 50),
+                    "p95_ms": _percentile(sorted(values), 95),
+                    "errors": self.errors.get(action, 0),
+                }
+                for action, values in self.latencies.items()
+            }
+        return {
+            "reruns": len(all_ms),
+            "p50_ms": _percentile(all_ms, 50),
+            "p90_ms": _percentile(all_ms, 90),
+            "p99_ms": _percentile(all_ms, 99),
+            "max_ms": round(all_ms[-1], 2) if all_ms else None,
+            "errors": total_errors,
+            "error_rate": round(total_errors / len(all_ms), 4) if all_ms else 0.0,
+            "by_action": by_action,
+            "error_samples": list(self.error_samples),
+        }
+
+
+class ConnectionMonitor(threading.Thread):
+    """pg_stat_activity로 이 DB에 붙은 커넥션 수를 주기적으로 기록 (풀 밖의 별도 커넥션 사용)"""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        import psycopg2
+        self.conn = psycopg2.connect(
+            host=os.getenv("POSTGRES_HOST"), port=os.getenv("POSTGRES_PORT"), database=os.getenv("POSTGRES_DB"),
+            user=os.getenv("POSTGRES_USER"), password=os.getenv("POSTGRES_PASSWORD"),
+        )
+        self.conn.autocommit = True
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+
+    def run(self):
+        with self.conn.cursor() as cur:
+            while not self.stop_event.is_set():
+                cur.execute("""
+                    SELECT count(*) FROM pg_stat_activity
+                    WHERE datname = current_database() AND pid <> pg_backend_pid()
+                """)
+                self.samples.append(cur.fetchone()[0])
+                self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        self.conn.close()
+        if not self.samples:
+            return {}
+        return {"max": max(self.samples), "avg": round(sum(self.samples) / len(self.samples), 2)}
+
+
+def _run_session(session_id, iterations, rep_names, recorder, timeout, seed):
+    from streamlit.testing.v1 import AppTest
+    rng = random.Random(seed)
+    actions, weights = zip(*ACTIONS)
+    at = AppTest.from_file(MAIN_PATH, default_timeout=timeout)
+
+    def timed(action, prepare=None):
+        error = None
+        start = time.perf_counter()
+        try:
+            if prepare:
+                prepare()
+            at.run()
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as e:
+            error = repr(e)
+        recorder.add(action, (time.perf_counter() - start) * 1000, error)
+
+    timed("load")
+    for i in range(iterations):
+        action = rng.choices(actions, weights)[0]
+        if action == "check":
+            boxes = [c for c in at.checkbox if c.key and c.key.startswith("chk_")]
+            if boxes:
+                box = rng.choice(boxes)
+                timed(action, lambda: box.set_value(not box.value))
+                continue
+        elif action == "memo":
+            areas = [t for t in at.text_area if t.key and t.key.startswith("memo_")]
+            if areas:
+                area = rng.choice(areas)
+                timed(action, lambda: area.input(f"부하 테스트 {session_id}-{i}"))
+                continue
+        elif action == "flush":
+            buttons = [b for b in at.button if b.key == "flush_pending_btn" and not b.disabled]
+            if buttons:
+                timed(action, buttons[0].click)
+                continue
+        elif action == "sync":
+            name_inputs = [t for t in at.sidebar.text_input if t.label == "닉네임 입력"]
+            sync_buttons = [b for b in at.sidebar.button if b.label == "원정대 동기화 시작" and not b.disabled]
+            if name_inputs and sync_buttons:
+                def start_sync():
+                    name_inputs[0].input(", ".join(rep_names))
+                    sync_buttons[0].click()
+                timed(action, start_sync)
+                continue
+        timed("rerun")
+
+
+def _seed_database(base_url, rep_names):
+    """세션들이 체크할 캐릭터/숙제를 미리 저장"""
+    from core.database import init_db, upsert_characters
+    from core.loa_api import LostArkAPI
+    init_db()
+    rosters = LostArkAPI(base_url=base_url).get_rosters(rep_names)
+    for name, chars in rosters.items():
+        upsert_characters(chars, account_name=name)
+    return sum(len(chars) for chars in rosters.values())
+
+
+def run_level(concurrency, iterations, rep_names, timeout, seed):
+    from core.db_pool import get_pool_stats
+    recorder = Recorder()
+    monitor = ConnectionMonitor()
+    monitor.start()
+    pool_before = get_pool_stats()
+
+    threads = [
+        threading.Thread(target=_run_session, name=f"load-session-{i}",
+                         args=(i, iterations, rep_names, recorder, timeout, seed * 1000 + i))
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    pool_after = get_pool_stats()
+    summary = recorder.summary()
+    summary.update({
+        "concurrency": concurrency,
+        "elapsed_sec": round(elapsed, 2),
+        "reruns_per_sec": round(summary["reruns"] / elapsed, 2) if elapsed else None,
+        "db_connections": monitor.stop(),
+        "pool": dict(
+            {
+                key: round(pool_after[key] - pool_before.get(key, 0), 4)
+                for key in ("checkouts", "checkout_wait_total", "checkout_timeouts",
+                            "connections_created", "connections_discarded")
+                if key in pool_after
+            },
+            checkout_wait_max=pool_after.get("checkout_wait_max"), max_size=pool_after.get("max_size"),
+        ),
+    })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOA AGENT 동시 세션 부하 테스트")
+    parser.add_argument("--concurrency", default="1,5,10,25", help="동시 세션 수 단계 (쉼표 구분)")
+    parser.add_argument("--iterations", type=int, default=20, help="세션당 행동 횟수")
+    parser.add_argument("--characters", type=int, default=40, help="가짜 원정대 전체 캐릭터 수")
+    parser.add_argument("--latency-ms", type=int, default=20, help="스텁 API 응답 지연")
+    parser.add_argument("--timeout", type=float, default=60, help="rerun 1번 최대 대기 (초)")
+    parser.add_argument("--pg", choices=("initdb", "env"), default="initdb")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    from tools.stub_loa_api import make_roster, start_stub_server
+    accounts, per_account = roster_shape(args.characters)
+    rosters, profiles = make_roster(accounts, per_account, seed=args.seed)
+    server, base_url = start_stub_server(rosters, profiles, latency_ms=args.latency_ms)
+    # 앱(main.py)이 만드는 LostArkAPI()도 스텁을 보도록 (core import 전에 설정)
+    os.environ["LOA_API_BASE_URL"] = base_url
+    os.environ.setdefault("LOA_API_KEY", "load-test")
+    os.environ["LOA_CACHE_PATH"] = "off"
+    os.environ["LOA_API_RATE_LIMIT"] = "1000000"
+    rep_names = list(rosters)
+
+    levels_report = []
+    try:
+        with throwaway_postgres(args.pg):
+            seeded = _seed_database(base_url, rep_names)
+            print(f"캐릭터 {seeded}명 준비 완료, 스텁 서버 {base_url}")
+            for level in levels:
+                print(f"▶ 동시 세션 {level}개 × {args.iterations}회 ...", flush=True)
+                report = run_level(level, args.iterations, rep_names, args.timeout, args.seed)
+                levels_report.append(report)
+                conns = report["db_connections"]
+                print(f"  p50 {report['p50_ms']}ms / p90 {report['p90_ms']}ms / p99 {report['p99_ms']}ms, "
+                      f"오류율 {report['error_rate']:.1%}, DB 커넥션 최대 {conns.get('max')} (평균 {conns.get('avg')})")
+    finally:
+        server.shutdown()
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "characters": args.characters,
+                "iterations": args.iterations,
+                "latency_ms": args.latency_ms,
+                "pool_max": os.getenv("POSTGRES_POOL_MAX", "10"),
+            },
+            "levels": levels_report,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output}")
+    return 1 if any(level["errors"] for level in levels_report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+쿼리 플랜 회귀 검사
+
+임시 Postgres에 큰 가짜 데이터(기본 2만 캐릭터 / 숙제 10만 건)를 넣고 자주 쓰는 쿼리의 EXPLAIN을 확인합니다.
+검사 대상 테이블을 순차 스캔(Seq Scan)하는 쿼리가 있으면 종료 코드 1
+(인덱스를 지우거나 쿼리 조건을 바꿔서 인덱스를 못 타게 된 경우를 잡기 위한 용도)
+
+    python -m bench.query_plans
+    python -m bench.query_plans --characters 50000 --pg env --verbose
+
+데이터 모양은 평소 상태 기준: 숙제의 ~10%는 이번 주기에 완료, ~1%만 지난 주기에 완료(리셋 대상),
+원정대 숙제는 ~2%만 체크, 동기화 작업은 대부분 끝난 상태.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from bench.common import throwaway_postgres
+
+
+def _seed(cur, characters, expedition_tasks, jobs, weeks, boundary):
+    cur.execute("""
+        INSERT INTO characters (character_name, server_name, character_class, item_avg_level, combat_power, account_name)
+        SELECT '플랜캐릭' || g, '루페온', '버서커', 1600 + g %% 150, 1000 + g %% 3000, '원정대' || (g / 20)
+        FROM generate_series(1, %s) g
+    """, (characters,))
+    cur.execute("""
+        INSERT INTO todos (character_name, task_name, category, current_count, total_count, gold_reward, updated_at)
+        SELECT character_name, category || n, category,
+               CASE WHEN r < 0.01 OR r > 0.90 THEN 1 ELSE 0 END, 1, 5000,
+               CASE WHEN r < 0.01 THEN %(boundary)s - random() * INTERVAL '3 days'
+                    WHEN r > 0.90 THEN %(boundary)s + random() * INTERVAL '12 hours'
+                    ELSE %(boundary)s - INTERVAL '30 days' END
+        FROM (
+            SELECT c.character_name, k.category, k.n, random() AS r
+            FROM characters c
+            CROSS JOIN (VALUES ('일일', 1), ('일일', 2), ('주간', 1), ('주간', 2), ('주간', 3)) AS k(category, n)
+        ) s
+    """, {"boundary": boundary})
+    cur.execute("""
+        INSERT INTO expedition_tasks (task_name, is_checked, reset_type, reset_value, updated_at)
+        SELECT '원정대숙제' || g, random() < 0.02, (ARRAY['DAILY', 'WEEKLY', 'INTERVAL'])[1 + g %% 3], 1 + g %% 5,
+               %s - random() * INTERVAL '5 days'
+        FROM generate_series(1, %s) g
+    """, (boundary, expedition_tasks))
+    cur.execute("""
+        INSERT INTO sync_jobs (names, status, created_at, finished_at, heartbeat_at)
+        SELECT '원정대' || (g %% 500), CASE WHEN g > %(jobs)s - 3 THEN 'queued' ELSE 'done' END,
+               %(boundary)s - (%(jobs)s - g) * INTERVAL '1 minute',
+               %(boundary)s - (%(jobs)s - g) * INTERVAL '1 minute',
+               %(boundary)s - (%(jobs)s - g) * INTERVAL '1 minute'
+        FROM generate_series(1, %(jobs)s) g
+    """, {"jobs": jobs, "boundary": boundary})
+    cur.execute("""
+        INSERT INTO weekly_income (week_start, character_name, account_name, planned_gold, realized_gold, spent_gold)
+        SELECT %s - w * INTERVAL '7 days', character_name, account_name, 15000, (random() * 15000)::int, 0
+        FROM characters CROSS JOIN generate_series(0, %s - 1) w
+    """, (boundary, weeks))
+    cur.execute("ANALYZE")
+
+
+def _checks(boundary, sample_names):
+    """
+    [(이름, SQL, 파라미터, 순차 스캔하면 안 되는 테이블)]
+    SQL은 본 코드의 상수를 그대로 가져옴 (쿼리를 고치면 검사 대상도 같이 바뀜)
+    """
+    from core.database import STALE_WEEKLY_RAIDS_DELETE_SQL, WEEKLY_INCOME_REFRESH_SQL, WEEKLY_INCOME_SELECT_SQL
+    from core.reset_manager import DAILY_RESET_SQL, WEEKLY_RESET_SQL, EXPEDITION_RESET_SQL, INTERVAL_DUE_SQL
+    from core.sync_jobs import CLAIM_JOB_SQL
+    return [
+        # core.reset_manager.check_and_reset_tasks
+        ("리셋 패스 (일일)", DAILY_RESET_SQL, (boundary,), {"todos"}),
+        ("리셋 패스 (주간)", WEEKLY_RESET_SQL, (boundary,), {"todos"}),
+        ("원정대 숙제 리셋", EXPEDITION_RESET_SQL,
+         {"last_daily": boundary, "last_weekly": boundary - timedelta(days=3), "now": boundary},
+         {"expedition_tasks"}),
+        # core.reset_manager._save_watermark
+        ("N일 간격 워터마크", INTERVAL_DUE_SQL, None, {"expedition_tasks"}),
+        # core.database._write_weekly_raids
+        ("주간 레이드 갱신 (DELETE)", STALE_WEEKLY_RAIDS_DELETE_SQL,
+         (sample_names, sample_names, ["주간1"] * len(sample_names)), {"todos"}),
+        # core.database._refresh_weekly_income (바뀐 캐릭터만)
+        ("주간 수익 집계 갱신", WEEKLY_INCOME_REFRESH_SQL,
+         {"week_start": boundary, "all": False, "names": sample_names}, {"characters", "todos"}),
+        # core.database.get_weekly_income
+        ("이번 주 수익 조회", WEEKLY_INCOME_SELECT_SQL, (boundary,), {"weekly_income"}),
+        # core.sync_jobs._claim_next_job
+        ("동기화 작업 가져오기", CLAIM_JOB_SQL, None, {"sync_jobs"}),
+    ]
+
+
+def _scans(plan):
+    """플랜 트리의 (노드 종류, 테이블, 인덱스) 목록"""
+    found = []
+    if "Relation Name" in plan:
+        found.append((plan["Node Type"], plan["Relation Name"], plan.get("Index Name")))
+    for child in plan.get("Plans", []):
+        found.extend(_scans(child))
+    return found
+
+
+def _boundary():
+    """가짜 데이터의 리셋 경계 (어제 06:00)"""
+    return datetime.now().replace(hour=6, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+def run_checks(boundary, verbose=False, sample_size=3):
+    from core.database import PostgresDB
+    with PostgresDB() as cur:
+        cur.execute("SELECT character_name FROM characters ORDER BY random() LIMIT %s", (sample_size,))
+        sample_names = [r['character_name'] for r in cur.fetchall()]
+
+    failures = []
+    with PostgresDB() as cur:
+        for name, sql, params, guarded in _checks(boundary, sample_names):
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cur.fetchone()['QUERY PLAN'][0]['Plan']
+            scans = _scans(plan)
+            seq = sorted({table for node, table, _ in scans if node == "Seq Scan" and table in guarded})
+            detail = ", ".join(f"{node} {table}" + (f" ({index})" if index else "") for node, table, index in scans)
+            print(f"{'❌' if seq else '✅'} {name:24s} {detail}")
+            if verbose:
+                print(f"    예상 비용 {plan['Total Cost']:.1f}, 예상 행 {plan['Plan Rows']}")
+            if seq:
+                failures.append((name, seq))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="자주 쓰는 쿼리의 EXPLAIN 회귀 검사")
+    parser.add_argument("--characters", type=int, default=20000, help="가짜 캐릭터 수 (캐릭터당 숙제 5개)")
+    parser.add_argument("--expedition-tasks", type=int, default=20000)
+    parser.add_argument("--jobs", type=int, default=20000, help="가짜 동기화 작업 수 (대부분 완료 상태)")
+    parser.add_argument("--weeks", type=int, default=12, help="주간 수익 집계 기록 주 수")
+    parser.add_argument("--pg", choices=("initdb", "env"), default="initdb")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    with throwaway_postgres(args.pg):
+        from core.database import init_db, PostgresDB
+        init_db()
+        boundary = _boundary()
+        print(f"데이터 준비: 캐릭터 {args.characters:,}명, 숙제 {args.characters * 5:,}건 ...", flush=True)
+        with PostgresDB(transaction=True) as cur:
+            _seed(cur, args.characters, args.expedition_tasks, args.jobs, args.weeks, boundary)
+        failures = run_checks(boundary, args.verbose)
+
+    if failures:
+        print(f"\n{len(failures)}개 쿼리가 순차 스캔으로 바뀌었습니다: "
+              + ", ".join(f"{name} ({', '.join(tables)})" for name, tables in failures))
+        return 1
+    print("\n모든 쿼리가 인덱스를 사용합니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+LOA AGENT 마이크로 벤치마크
+
+가짜 원정대(10 ~ 1,000캐릭터)와 지연을 넣은 로컬 스텁 API 서버, 임시 Postgres로
+동기화 / 저장 / 리셋 / 레이드 추천 / 카드 데이터 준비 경로의 시간을 재고 JSON으로 남깁니다.
+
+사용 예:
+    python -m bench.run                                  # 기본 크기 10,100,1000 / 지연 20ms
+    python -m bench.run --sizes 10,50 --latency-ms 50 --only api,raids
+    python -m bench.run --pg env                         # .env의 서버에 임시 DB를 만들어 사용
+    python -m bench.compare bench/results/old.json bench/results/new.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bench.common import measure, roster_shape, make_view_data, git_commit, throwaway_postgres
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+GROUPS = ("raids", "view", "api", "db")
+
+
+def _configure_env():
+    # 벤치마크는 요청 한도/디스크 캐시 영향 없이 순수 처리 시간만 봄 (core import 전에 설정)
+    os.environ["LOA_CACHE_PATH"] = "off"
+    os.environ["LOA_API_RATE_LIMIT"] = "1000000"
+    os.environ.setdefault("LOA_API_KEY", "bench")
+
+# ---------------------------------------------------------
+# 순수 계산
+# ---------------------------------------------------------
+def bench_raids(size, repeat):
+    from core.game_data import calculate_best_raids, calculate_best_raids_batch
+    rng = random.Random(size)
+    specs = [(round(rng.uniform(1580, 1760), 2), rng.randint(500, 4500)) for _ in range(size)]
+    return {
+        "calculate_best_raids": measure(lambda: [calculate_best_raids(lv, cp) for lv, cp in specs], repeat),
+        "calculate_best_raids_batch": measure(lambda: calculate_best_raids_batch(specs), repeat),
+    }
+
+def bench_view(size, repeat):
+    """_render_character_cards가 쓰는 카드 데이터 준비 (캐시 없이 매번 새로 계산)"""
+    from ui.view_model import build_roster_view
+    from core import reset_manager
+    characters, todos = make_view_data(size)
+    results = {"build_roster_view": measure(lambda: build_roster_view(characters, todos), repeat)}
+
+    # LOA_RESET_MODE와 관계없이 lazy 경로(지난 주기 기록을 읽을 때 0으로 보는 복사)를 잰다
+    saved_mode = reset_manager.RESET_MODE
+    reset_manager.RESET_MODE = "lazy"
+    try:
+        results["build_roster_view_lazy_reset"] = measure(
+            lambda: build_roster_view(characters, reset_manager.effective_todos(todos)), repeat
+        )
+    finally:
+        reset_manager.RESET_MODE = saved_mode
+    return results
+
+# ---------------------------------------------------------
+# API (스텁 서버)
+# ---------------------------------------------------------
+def _sequential_roster(api, name):
+    """병렬화 이전 방식 기준선: 원정대 목록 → 캐릭터 프로필을 하나씩"""
+    result = []
+    for char in api.get_siblings(name):
+        char = dict(char)
+        char["CombatPower"] = api.parse_combat_power(api.get_character_profile(char["CharacterName"]))
+        result.append(char)
+    return result
+
+def bench_api(size, repeat, latency_ms):
+    from tools.stub_loa_api import make_roster, start_stub_server
+    from core.loa_api import LostArkAPI
+    accounts, per_account = roster_shape(size)
+    rosters, profiles = make_roster(accounts, per_account, seed=size)
+    server, base_url = start_stub_server(rosters, profiles, latency_ms=latency_ms)
+    try:
+        api = LostArkAPI(base_url=base_url)
+        names = list(rosters)
+        first = names[0]
+        results = {
+            "get_characters": measure(lambda: api.get_characters(first), repeat),
+            "get_characters_sequential": measure(lambda: _sequential_roster(api, first), repeat),
+            "get_rosters_all_accounts": measure(lambda: api.get_rosters(names, force_refresh=True), repeat),
+        }
+        parallel = results["get_characters"]["median_ms"]
+        sequential = results["get_characters_sequential"]["median_ms"]
+        # README의 '병렬 처리로 80% 개선' 확인용
+        results["get_characters_speedup"] = {
+            "time_saved_pct": round((1 - parallel / sequential) * 100, 1) if sequential else None,
+        }
+        results["stub_requests"] = {"count": server.state.counts["requests"]}
+        return results
+    finally:
+        server.shutdown()
+
+# ---------------------------------------------------------
+# DB 쓰기 / 리셋 경로 (임시 Postgres)
+# ---------------------------------------------------------
+def _roster_char_lists(size):
+    from tools.stub_loa_api import make_roster
+    from core.loa_api import LostArkAPI
+    accounts, per_account = roster_shape(size)
+    rosters, profiles = make_roster(accounts, per_account, seed=size)
+    char_lists = {}
+    for name, siblings in rosters.items():
+        char_lists[name] = [
+            dict(c, CombatPower=LostArkAPI.parse_combat_power(profiles[c["CharacterName"]]), ProfileFetched=True)
+            for c in siblings
+        ]
+    return char_lists
+
+def _truncate_roster_tables():
+    from core.database import PostgresDB, bump_data_version
+    with PostgresDB() as cur:
+        cur.execute("TRUNCATE characters, todos, weekly_income, character_snapshots")
+    bump_data_version()
+
+def bench_db(size, repeat):
+    from core.database import (
+        PostgresDB, upsert_characters, upsert_character, refresh_weekly_raids,
+        RESET_BOUNDARY_KEY, RESET_INTERVAL_DUE_KEY
+    )
+    from core.reset_manager import check_and_reset_tasks
+
+    char_lists = _roster_char_lists(size)
+    all_chars = [c for chars in char_lists.values() for c in chars]
+    sample = all_chars[:min(len(all_chars), 50)]
+
+    def write_all():
+        for name, chars in char_lists.items():
+            upsert_characters(chars, account_name=name)
+
+    results = {
+        # 처음 저장 (레이드 숙제/일일 숙제 생성 포함)
+        "upsert_characters_cold": measure(write_all, repeat, setup=_truncate_roster_tables),
+        # 같은 데이터 재동기화 (추천 레이드가 그대로라 주간 숙제 쓰기 생략)
+        "upsert_characters_warm": measure(write_all, repeat),
+        # 캐릭터 1명씩 저장하는 단건 경로 (최대 50명, 1명당 시간)
+        "upsert_character_per_call": _per_call(
+            measure(lambda: [upsert_character(c) for c in sample], repeat), len(sample)
+        ),
+    }
+
+    levels = {}
+    def bump_levels():
+        # 매번 스펙을 바꿔 추천 레이드가 실제로 갱신되게 함
+        for c in sample:
+            levels[c["CharacterName"]] = (random.uniform(1600, 1760), random.randint(800, 4000))
+    results["refresh_weekly_raids_per_call"] = _per_call(
+        measure(lambda: [refresh_weekly_raids(n, lv, cp) for n, (lv, cp) in levels.items()],
+                repeat, setup=bump_levels),
+        len(sample),
+    )
+
+    def prepare_reset():
+        # 모든 숙제를 지난 주에 끝낸 상태로 만들고 리셋 워터마크 삭제
+        past = datetime.now() - timedelta(days=8)
+        with PostgresDB(transaction=True) as cur:
+            cur.execute("UPDATE todos SET current_count = total_count, updated_at = %s", (past,))
+            cur.execute("DELETE FROM app_settings WHERE key IN (%s, %s)",
+                        (RESET_BOUNDARY_KEY, RESET_INTERVAL_DUE_KEY))
+    results["check_and_reset_tasks"] = measure(check_and_reset_tasks, repeat, setup=prepare_reset)
+    # 워터마크가 있어서 리셋할 것이 없는 경우 (매 세션 시작 시 경로)
+    results["check_and_reset_tasks_noop"] = measure(check_and_reset_tasks, repeat)
+    return results
+
+def _per_call(stats, calls):
+    if not calls:
+        return stats
+    per_call = {k: round(v / calls, 3) for k, v in stats.items() if k.endswith("_ms")}
+    return dict(per_call, runs=stats["runs"], calls=calls)
+
+# ---------------------------------------------------------
+# 실행
+# ---------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LOA AGENT 마이크로 벤치마크")
+    parser.add_argument("--sizes", default="10,100,1000", help="전체 캐릭터 수 목록 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency-ms", type=int, default=20, help="스텁 API 응답 지연")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"실행할 그룹 ({', '.join(GROUPS)})")
+    parser.add_argument("--pg", choices=("initdb", "env"), default="initdb",
+                        help="initdb: 임시 클러스터 생성 / env: .env 서버에 임시 DB 생성")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본: bench/results/<커밋>-<시각>.json)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    groups = [g for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"알 수 없는 그룹: {', '.join(sorted(unknown))}")
+    _configure_env()
+
+    results = {}
+    def run_group(group, fn):
+        for size in sizes:
+            print(f"▶ {group} / {size}캐릭터 ...", flush=True)
+            for name, stats in fn(size).items():
+                results.setdefault(name, {})[str(size)] = stats
+
+    if "raids" in groups:
+        run_group("raids", lambda size: bench_raids(size, args.repeat))
+    if "view" in groups:
+        run_group("view", lambda size: bench_view(size, args.repeat))
+    if "api" in groups:
+        run_group("api", lambda size: bench_api(size, args.repeat, args.latency_ms))
+    if "db" in groups:
+        with throwaway_postgres(args.pg):
+            from core.database import init_db
+            init_db()
+            run_group("db", lambda size: bench_db(size, args.repeat))
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+            "groups": groups,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for name, by_size in results.items():
+        line = ", ".join(
+            f"{size}: {stats['median_ms']}ms" for size, stats in by_size.items() if "median_ms" in stats
+        )
+        if line:
+            print(f"{name:34s} {line}")
+    print(f"결과 저장: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,102 +1,302 @@
 import os
+import json
+import time
+import hashlib
+import threading
+import functools
+from datetime import date, timedelta
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from dotenv import load_dotenv
-from core.game_data import calculate_best_raids
+from core.game_data import calculate_best_raids, calculate_best_raids_batch
+from core.db_pool import get_pool
+from core import instrumentation
+from core.reset_calendar import last_weekly_reset
 
 load_dotenv()
 
+# 리셋 워터마크 (app_settings 키) - core.reset_manager에서 사용
+RESET_BOUNDARY_KEY = "reset_boundary"          # 마지막으로 처리한 일일 리셋 경계 시각
+RESET_INTERVAL_DUE_KEY = "reset_interval_due"  # 가장 가까운 N일 간격 숙제 리셋 예정 시각 ('none' = 없음)
+
+# 성장 기록(character_snapshots) 월 단위 파티션 사용 여부 - 테이블을 처음 만들 때만 적용됨
+SNAPSHOT_PARTITIONING = os.getenv("LOA_SNAPSHOT_PARTITIONING", "").lower() == "monthly"
+
 class PostgresDB:
-    def __init__(self):
+    """
+    with PostgresDB() as cur: 형태로 쓰는 커서 컨텍스트 매니저.
+    커넥션은 매번 새로 만들지 않고 프로세스 공용 풀(core.db_pool)에서 빌려 쓰고 반납합니다.
+    - transaction=True: 블록 전체를 하나의 트랜잭션으로 묶음 (예외 시 전부 롤백)
+    """
+    def __init__(self, transaction=False):
+        self.transaction = transaction
         self.conn = None
         self.cursor = None
 
     def __enter__(self):
+        # 계측이 꺼져 있으면 측정 없이 평소 커서를 씀
+        started = time.perf_counter() if instrumentation.ENABLED else None
+        self.conn = get_pool().getconn()
         try:
-            self.conn = psycopg2.connect(
-                host=os.getenv("POSTGRES_HOST"),
-                database=os.getenv("POSTGRES_DB"),
-                user=os.getenv("POSTGRES_USER"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                port=os.getenv("POSTGRES_PORT")
-            )
-            self.conn.autocommit = True
-            self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+            self.conn.autocommit = not self.transaction
+            if started is None:
+                self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+            else:
+                self.cursor = self.conn.cursor(cursor_factory=instrumentation.InstrumentedCursor)
+                instrumentation.record("db", "connect", time.perf_counter() - started)
             return self.cursor
-        except Exception as e:
-            raise e
-        
+        except Exception:
+            get_pool().putconn(self.conn, discard=True)
+            self.conn = None
+            raise
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.cursor: self.cursor.close()
-        if self.conn: self.conn.close()
+        if self.cursor:
+            try: self.cursor.close()
+            except Exception: pass
+        conn, self.conn, self.cursor = self.conn, None, None
+        if not conn:
+            return
+        # 연결 자체가 깨진 경우엔 풀에 돌려놓지 않고 버림
+        broken = isinstance(exc_val, (psycopg2.OperationalError, psycopg2.InterfaceError))
+        try:
+            if self.transaction and not broken:
+                if exc_type is None:
+                    conn.commit()
+                else:
+                    conn.rollback()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            get_pool().putconn(conn, discard=broken)
 
-def init_db():
-    """DB 테이블 초기화 (리셋 규칙 컬럼 추가)"""
-    
-    # 1. 캐릭터 & 숙제 테이블 (기존 유지)
-    create_character_table_sql = """
-    CREATE TABLE IF NOT EXISTS characters (
-        character_name VARCHAR(50) PRIMARY KEY,
-        server_name VARCHAR(20),
-        character_class VARCHAR(20),
-        item_avg_level FLOAT,
-        combat_power INT,
-        week_gold_spent INT DEFAULT 0,
-        memo TEXT DEFAULT '',
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    create_todos_table_sql = """
-    CREATE TABLE IF NOT EXISTS todos (
-        id SERIAL PRIMARY KEY,
-        character_name VARCHAR(50) NOT NULL,
-        game_name VARCHAR(20) DEFAULT 'LostArk',
-        task_name VARCHAR(100) NOT NULL,
-        category VARCHAR(20) DEFAULT '일일',
-        current_count INT DEFAULT 0,
-        total_count INT DEFAULT 1,
-        reset_cycle VARCHAR(20) DEFAULT 'DAILY',
-        gold_reward INT DEFAULT 0,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        CONSTRAINT fk_character FOREIGN KEY(character_name) REFERENCES characters(character_name) ON DELETE CASCADE,
-        CONSTRAINT unique_task_per_char UNIQUE (character_name, task_name)
-    );
+# ---------------------------------------------------------
+# 읽기 캐시 (데이터 버전 기반)
+# ---------------------------------------------------------
+# Streamlit은 체크박스 하나만 눌러도 스크립트 전체를 다시 실행하므로,
+# 화면에 필요한 데이터(캐릭터/숙제/설정)를 한 번에 읽어 프로세스 메모리에 보관합니다.
+# 쓰기 함수가 커밋 후 버전을 올리면 다음 조회 때만 DB를 다시 읽습니다.
+# (버전은 프로세스 단위 - 같은 DB를 여러 프로세스가 쓰면 다른 프로세스의 쓰기는 감지 못함)
+_data_version = 0
+_version_lock = threading.Lock()
+_snapshot_cache = None   # (version, snapshot)
+
+def get_data_version():
+    return _data_version
+
+def bump_data_version():
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+        return _data_version
+
+def _bumps_data_version(func):
+    """쓰기 함수용 데코레이터: 함수가 끝나면(커밋 후) 데이터 버전을 올려 읽기 캐시를 무효화"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            bump_data_version()
+    return wrapper
+
+def get_dashboard_snapshot():
     """
-    
-    # 3. [수정됨] 원정대 커스텀 숙제 (리셋 규칙 추가)
-    # reset_type: 'DAILY', 'WEEKLY', 'INTERVAL'(N일 간격)
-    # reset_value: INTERVAL일 때 며칠 간격인지 (예: 2)
-    create_exp_tasks_sql = """
-    CREATE TABLE IF NOT EXISTS expedition_tasks (
-        id SERIAL PRIMARY KEY,
-        task_name VARCHAR(100) NOT NULL UNIQUE,
-        is_checked BOOLEAN DEFAULT FALSE,
-        reset_type VARCHAR(20) DEFAULT 'WEEKLY', 
-        reset_value INT DEFAULT 1,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-
-    create_settings_sql = """
-    CREATE TABLE IF NOT EXISTS app_settings (
-        key VARCHAR(50) PRIMARY KEY,
-        value TEXT,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+    화면 렌더링용 스냅샷 {version, characters, todos, settings}
+    - 데이터 버전이 그대로면 DB를 건드리지 않고 캐시를 돌려줌
+    - 아니면 커넥션 하나 / REPEATABLE READ 읽기 전용 트랜잭션 하나로 세 테이블을 같은 시점 기준으로 읽음
+      (중간에 동기화 워커가 커밋해도 섞이지 않음)
+    반환된 데이터는 세션끼리 공유되므로 읽기 전용으로 써야 합니다.
     """
+    global _snapshot_cache
+    version = _data_version
+    cached = _snapshot_cache
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with PostgresDB(transaction=True) as cur:
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        cur.execute("SELECT * FROM characters ORDER BY combat_power DESC")
+        characters = cur.fetchall()
+        cur.execute("SELECT * FROM todos ORDER BY id ASC")
+        todos = cur.fetchall()
+        cur.execute("SELECT key, value FROM app_settings")
+        settings = {r['key']: r['value'] for r in cur.fetchall()}
 
+    snapshot = {"version": version, "characters": characters, "todos": todos, "settings": settings}
+    with _version_lock:
+        # 읽는 도중 쓰기가 있었다면 캐시하지 않음 (다음 조회에서 다시 읽음)
+        if _data_version == version:
+            _snapshot_cache = (version, snapshot)
+    return snapshot
+
+_schema_ready = False
+
+def init_db():
+    """
+    스키마를 최신 버전으로 맞춥니다. (core.migrations의 번호 붙은 마이그레이션)
+    프로세스당 한 번만 DB를 확인하고, 이후 새 세션에서는 바로 반환합니다.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    from core.migrations import migrate
     try:
+        migrate()
         with PostgresDB() as cur:
-            cur.execute(create_character_table_sql)
-            cur.execute(create_todos_table_sql)
-            cur.execute(create_exp_tasks_sql)
-            cur.execute(create_settings_sql)
+            _load_snapshot_layout(cur)
+        _schema_ready = True
     except Exception as e:
         print(f"❌ 테이블 생성 오류: {e}")
 
+# ---------------------------------------------------------
+# 성장 기록 (Growth Diary) - 동기화할 때마다 레벨/전투력을 추가만 하는 시계열 테이블
+# ---------------------------------------------------------
+# - 조회는 항상 시간 범위로 하므로 captured_at에 BRIN 인덱스 (행이 시간순으로 쌓여 아주 작고 쓰기 부담 적음)
+# - 캐릭터별 조회용 (character_name, captured_at) 인덱스
+# - LOA_SNAPSHOT_PARTITIONING=monthly면 월 단위 파티션 (오래된 달은 파티션째 DETACH/DROP 가능)
+# - reset_db()로 지우지 않음 (숙제 데이터를 초기화해도 성장 기록은 유지)
+_snapshot_partitioned = False
+_snapshot_partitions = set()
+_snapshot_partitions_lock = threading.Lock()
+
+def _load_snapshot_layout(cur):
+    """테이블의 실제 형태를 따름 (환경변수를 나중에 바꿔도 기존 테이블은 그대로) - 테이블 생성은 마이그레이션 3"""
+    global _snapshot_partitioned
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('character_snapshots')")
+    row = cur.fetchone()
+    _snapshot_partitioned = row is not None and row['relkind'] == 'p'
+    _ensure_snapshot_partitions(cur)
+
+def _next_month(first_day):
+    return (first_day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _ensure_snapshot_partitions(cur):
+    """이번 달/다음 달 파티션이 없으면 생성 (달이 바뀌는 순간에 쓰는 행도 들어갈 곳이 있도록)"""
+    if not _snapshot_partitioned:
+        return
+    this_month = date.today().replace(day=1)
+    next_month = _next_month(this_month)
+    for start, end in ((this_month, next_month), (next_month, _next_month(next_month))):
+        if start in _snapshot_partitions:
+            continue
+        with _snapshot_partitions_lock:
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS character_snapshots_{start:%Y%m}
+                PARTITION OF character_snapshots FOR VALUES FROM (%s) TO (%s)
+            """, (start, end))
+            _snapshot_partitions.add(start)
+
+def _write_snapshots(cur, saved_rows):
+    """upsert 결과(RETURNING 행)를 그대로 스냅샷으로 추가 (행 수와 무관하게 INSERT 1번)"""
+    if not saved_rows:
+        return
+    _ensure_snapshot_partitions(cur)
+    rows = [(r['character_name'], r['account_name'], r['item_avg_level'], r['combat_power']) for r in saved_rows]
+    execute_values(cur, """
+        INSERT INTO character_snapshots (character_name, account_name, item_avg_level, combat_power)
+        VALUES %s
+    """, rows, page_size=len(rows))
+
+# ---------------------------------------------------------
+# 주간 수익 집계 (weekly_income)
+# ---------------------------------------------------------
+# 경영 지표 화면과 목표 계산기는 todos를 훑지 않고 이 테이블만 읽습니다.
+# 쓰기 함수들이 같은 트랜잭션 안에서 바뀐 캐릭터의 이번 주 행만 다시 계산합니다.
+# - planned: 주간 숙제 골드 × 횟수 합계
+# - realized: 이번 주(week_start 이후)에 끝낸 주간 숙제 골드 합계 (lazy 리셋 모드에서도 정확)
+# - spent: 캐릭터의 사용 골드
+# 지난 주 행은 그대로 남아서 주별 추이가 됩니다.
+_income_cache = None   # (version, week_start, rows)
+
+# 이번 주 집계 행 갱신 (all이 TRUE면 전체 캐릭터, 아니면 names에 있는 캐릭터만)
+WEEKLY_INCOME_REFRESH_SQL = """
+    INSERT INTO weekly_income (week_start, character_name, account_name, planned_gold, realized_gold, spent_gold)
+    SELECT %(week_start)s, c.character_name, c.account_name,
+           COALESCE(SUM(t.gold_reward * t.total_count), 0),
+           COALESCE(SUM(t.gold_reward * t.total_count)
+                    FILTER (WHERE t.current_count >= t.total_count AND t.updated_at >= %(week_start)s), 0),
+           COALESCE(c.week_gold_spent, 0)
+    FROM characters c
+    LEFT JOIN todos t ON t.character_name = c.character_name AND t.category = '주간'
+    WHERE %(all)s OR c.character_name = ANY(%(names)s)
+    GROUP BY c.character_name
+    ON CONFLICT (week_start, character_name) DO UPDATE SET
+        account_name = EXCLUDED.account_name,
+        planned_gold = EXCLUDED.planned_gold,
+        realized_gold = EXCLUDED.realized_gold,
+        spent_gold = EXCLUDED.spent_gold,
+        updated_at = CURRENT_TIMESTAMP
+"""
+WEEKLY_INCOME_SELECT_SQL = "SELECT * FROM weekly_income WHERE week_start = %s ORDER BY net_gold DESC"
+
+def _current_week_start():
+    return last_weekly_reset()
+
+def _refresh_weekly_income(cur, character_names=None, week_start=None):
+    """이번 주 집계 행 갱신. character_names가 None이면 전체 캐릭터"""
+    if character_names is not None:
+        character_names = list(set(character_names))
+        if not character_names:
+            return
+    cur.execute(WEEKLY_INCOME_REFRESH_SQL, {
+        "week_start": week_start or _current_week_start(),
+        "all": character_names is None,
+        "names": character_names or [],
+    })
+
+@_bumps_data_version
+def refresh_weekly_income(character_names=None):
+    """집계만 따로 갱신 (리셋 패스 이후 등 - 새 주의 행 생성, 지난 주 완료분 제외)"""
+    with PostgresDB(transaction=True) as cur:
+        _refresh_weekly_income(cur, character_names)
+
+def get_weekly_income(week_start=None):
+    """
+    이번 주(또는 week_start 주) 캐릭터별 집계 행. 데이터 버전이 그대로면 캐시 사용.
+    주가 바뀐 뒤 아직 아무 쓰기가 없었으면 (lazy 리셋 모드 등) 이번 주 행을 한 번 채웁니다.
+    """
+    global _income_cache
+    current_week = _current_week_start()
+    week_start = week_start or current_week
+    version = _data_version
+    cached = _income_cache
+    if cached is not None and cached[0] == version and cached[1] == week_start:
+        return cached[2]
+
+    with PostgresDB(transaction=True) as cur:
+        cur.execute(WEEKLY_INCOME_SELECT_SQL, (week_start,))
+        rows = cur.fetchall()
+        if not rows and week_start == current_week:
+            _refresh_weekly_income(cur, week_start=week_start)
+            cur.execute(WEEKLY_INCOME_SELECT_SQL, (week_start,))
+            rows = cur.fetchall()
+
+    with _version_lock:
+        if _data_version == version:
+            _income_cache = (version, week_start, rows)
+    return rows
+
+def get_income_history(weeks=12):
+    """최근 N주 원정대별 합계: [{week_start, account_name, planned_gold, realized_gold, spent_gold, net_gold}, ...]"""
+    with PostgresDB() as cur:
+        cur.execute("""
+            SELECT week_start, COALESCE(account_name, '') AS account_name,
+                   SUM(planned_gold) AS planned_gold, SUM(realized_gold) AS realized_gold,
+                   SUM(spent_gold) AS spent_gold, SUM(net_gold) AS net_gold
+            FROM weekly_income
+            WHERE week_start >= %s - %s * INTERVAL '7 days'
+            GROUP BY 1, 2 ORDER BY 1, 2
+        """, (_current_week_start(), weeks - 1))
+        return cur.fetchall()
+
 # 👇 [NEW] 진짜로 데이터를 다 날리는 함수 추가 👇
+@_bumps_data_version
 def reset_db():
-    """기존 데이터를 모두 삭제하고 테이블을 재생성합니다."""
+    """기존 데이터를 모두 삭제하고 마이그레이션을 처음부터 다시 적용해 테이블을 재생성합니다."""
+    global _schema_ready
+    from core.migrations import migrate
     try:
         with PostgresDB() as cur:
             # 테이블을 강제로 삭제 (CASCADE로 연관 데이터도 삭제)
@@ -105,87 +305,266 @@ def reset_db():
             cur.execute("DROP TABLE IF EXISTS expedition_tasks CASCADE;")
             # 설정(app_settings)은 남길지 선택할 수 있지만, '완전 초기화'니까 다 지웁니다.
             cur.execute("DROP TABLE IF EXISTS app_settings CASCADE;")
+            # 주간 수익 집계는 characters를 참조하지 않으므로 같이 지움 (지운 캐릭터 행이 이번 주 집계에 남지 않도록)
+            cur.execute("DROP TABLE IF EXISTS weekly_income;")
             print("🗑️ 기존 데이터 삭제 완료")
-            
-        # 다시 생성
+
+        # 다시 생성 (마이그레이션은 여러 번 실행해도 안전 → 남아 있는 테이블은 그대로)
+        _schema_ready = False
+        migrate(reapply=True)
         init_db()
         print("✨ DB 재설정 완료")
     except Exception as e:
         print(f"❌ DB 리셋 실패: {e}")
 
-def upsert_character(char_data):
-    name = char_data["CharacterName"]
+# 일일 숙제 기본 목록 [(숙제 이름, 횟수)] - 현재는 비어 있음
+DEFAULT_DAILY_TASKS = []
+
+def _parse_item_level(raw):
     try:
-        avg_level = float(str(char_data["ItemAvgLevel"]).replace(",", ""))
+        return float(str(raw).replace(",", ""))
     except:
-        avg_level = 0.0
-    new_cp = int(char_data.get("CombatPower", 0) or 0)
-    
-    try:
-        with PostgresDB() as cur:
-            cur.execute("SELECT combat_power FROM characters WHERE character_name = %s", (name,))
-            row = cur.fetchone()
-            final_cp = new_cp
-            if row and row['combat_power'] > new_cp:
-                final_cp = row['combat_power']
+        return 0.0
 
-            sql = """
-            INSERT INTO characters (character_name, server_name, character_class, item_avg_level, combat_power)
-            VALUES (%s, %s, %s, %s, %s)
+def _raid_task_name(raid):
+    return f"{raid['name']} ({raid['difficulty']})"
+
+# 추천에서 빠진 주간 숙제 삭제 (캐릭터 목록, 남길 (캐릭터, 숙제) 쌍을 배열 두 개로)
+STALE_WEEKLY_RAIDS_DELETE_SQL = """
+    DELETE FROM todos t
+    WHERE t.category = '주간'
+      AND t.character_name = ANY(%s)
+      AND NOT EXISTS (
+          SELECT 1 FROM unnest(%s::text[], %s::text[]) AS keep(character_name, task_name)
+          WHERE keep.character_name = t.character_name AND keep.task_name = t.task_name
+      );
+"""
+
+def _write_weekly_raids(cur, raid_plan):
+    """
+    {캐릭터 이름: 추천 레이드 목록}을 todos에 반영합니다. (캐릭터 수와 상관없이 쿼리 2번)
+    1) 추천에서 빠진 주간 숙제 삭제  2) 추천 레이드 multi-row upsert
+    추천이 비어 있는 캐릭터는 기존 숙제를 건드리지 않습니다.
+    """
+    rows = [
+        (char_name, _raid_task_name(r), r['gold'])
+        for char_name, raids in raid_plan.items() if raids
+        for r in raids
+    ]
+    if not rows:
+        return
+
+    cur.execute(STALE_WEEKLY_RAIDS_DELETE_SQL, (
+        sorted({r[0] for r in rows}),
+        [r[0] for r in rows],
+        [r[1] for r in rows],
+    ))
+
+    execute_values(cur, """
+        INSERT INTO todos (character_name, game_name, task_name, category, total_count, reset_cycle, gold_reward)
+        VALUES %s
+        ON CONFLICT (character_name, task_name) DO UPDATE SET gold_reward = EXCLUDED.gold_reward;
+    """, rows, template="(%s, 'LostArk', %s, '주간', 1, 'WEEKLY', %s)", page_size=len(rows))
+
+def raid_fingerprint(raids):
+    """추천 레이드 목록(이름/난이도/골드)의 지문. 순서와 무관하게 같은 추천이면 같은 값"""
+    items = sorted((r['name'], r['difficulty'], r['gold']) for r in raids)
+    return hashlib.sha1(json.dumps(items, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _write_changed_raid_plans(cur, raid_plan, stored_fingerprints):
+    """
+    저장된 지문과 추천 결과가 다른 캐릭터만 주간 숙제를 갱신하고 지문을 저장합니다.
+    추천이 그대로인 캐릭터는 DELETE/UPSERT 자체를 하지 않습니다. 갱신한 캐릭터 수를 반환합니다.
+    """
+    changed = {}
+    for char_name, raids in raid_plan.items():
+        if not raids:
+            continue
+        fingerprint = raid_fingerprint(raids)
+        if stored_fingerprints.get(char_name) != fingerprint:
+            changed[char_name] = (raids, fingerprint)
+    if not changed:
+        return 0
+
+    _write_weekly_raids(cur, {name: raids for name, (raids, _) in changed.items()})
+    fingerprint_rows = [(name, fp) for name, (_, fp) in changed.items()]
+    execute_values(cur, """
+        UPDATE characters AS c SET raid_fingerprint = v.raid_fingerprint
+        FROM (VALUES %s) AS v(character_name, raid_fingerprint)
+        WHERE c.character_name = v.character_name
+    """, fingerprint_rows, page_size=len(fingerprint_rows))
+    return len(changed)
+
+def _write_daily_tasks(cur, character_names):
+    rows = [(name, task, count) for name in character_names for task, count in DEFAULT_DAILY_TASKS]
+    if not rows:
+        return
+    execute_values(cur, """
+        INSERT INTO todos (character_name, task_name, category, total_count, reset_cycle, gold_reward)
+        VALUES %s
+        ON CONFLICT (character_name, task_name) DO NOTHING;
+    """, rows, template="(%s, %s, '일일', %s, 'DAILY', 0)", page_size=len(rows))
+
+@_bumps_data_version
+def upsert_characters(char_list, account_name=None):
+    """
+    LostArkAPI.get_characters() 결과 전체를 하나의 트랜잭션으로 저장합니다.
+    - 전투력은 DB에서 GREATEST로 '최댓값 유지' 규칙 적용 (API 일시 오류로 인한 하락 방지)
+    - 주간 레이드/일일 숙제도 같은 트랜잭션에서 집합 단위로 갱신
+    - account_name(대표 캐릭터 이름)을 주면 원정대로 기록, 성장 기록 스냅샷도 같이 추가
+    중간에 실패하면 전부 롤백되고 예외를 그대로 올립니다. 저장한 캐릭터 수를 반환합니다.
+    """
+    # 같은 캐릭터가 두 번 들어오면 ON CONFLICT가 같은 행을 두 번 건드려 실패하므로 미리 합침
+    merged = {}
+    for char_data in char_list:
+        name = char_data["CharacterName"]
+        row = (
+            name,
+            char_data["ServerName"],
+            char_data["CharacterClassName"],
+            _parse_item_level(char_data["ItemAvgLevel"]),
+            int(char_data.get("CombatPower", 0) or 0),
+            # 프로필을 새로 받아온 캐릭터만 profile_fetched_at 갱신 (증분 동기화 기준)
+            bool(char_data.get("ProfileFetched", True)),
+            account_name,
+        )
+        if name in merged and merged[name][4] > row[4]:
+            row = row[:4] + (merged[name][4], merged[name][5] or row[5], account_name)
+        merged[name] = row
+    if not merged:
+        return 0
+
+    rows = list(merged.values())
+    with PostgresDB(transaction=True) as cur:
+        saved = execute_values(cur, """
+            INSERT INTO characters (character_name, server_name, character_class, item_avg_level, combat_power, profile_fetched_at, account_name)
+            VALUES %s
             ON CONFLICT (character_name)
             DO UPDATE SET
                 item_avg_level = EXCLUDED.item_avg_level,
-                combat_power = %s,
-                updated_at = CURRENT_TIMESTAMP;
-            """
-            cur.execute(sql, (
-                char_data["CharacterName"],
-                char_data["ServerName"],
-                char_data["CharacterClassName"],
-                avg_level,
-                final_cp,
-                final_cp
-            ))
-        refresh_weekly_raids(name, avg_level, final_cp)
-        add_daily_tasks(name)
+                combat_power = GREATEST(characters.combat_power, EXCLUDED.combat_power),
+                profile_fetched_at = COALESCE(EXCLUDED.profile_fetched_at, characters.profile_fetched_at),
+                account_name = COALESCE(EXCLUDED.account_name, characters.account_name),
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING character_name, item_avg_level, combat_power, raid_fingerprint, account_name;
+        """, rows, template="(%s, %s, %s, %s, %s, CASE WHEN %s THEN CURRENT_TIMESTAMP END, %s)",
+            page_size=len(rows), fetch=True)
+
+        # 원정대 전체 추천을 한 번에 계산 (같은 스펙 구간은 한 번만 조회)
+        best_raids = calculate_best_raids_batch([(r['item_avg_level'], r['combat_power']) for r in saved])
+        raid_plan = {r['character_name']: raids for r, raids in zip(saved, best_raids)}
+        # 추천이 바뀐 캐릭터만 주간 숙제 갱신 (RETURNING의 raid_fingerprint는 기존 저장값)
+        _write_changed_raid_plans(cur, raid_plan, {r['character_name']: r['raid_fingerprint'] for r in saved})
+        _write_daily_tasks(cur, [r['character_name'] for r in saved])
+        _write_snapshots(cur, saved)
+        _refresh_weekly_income(cur, [r['character_name'] for r in saved])
+    return len(saved)
+
+def get_character_sync_state():
+    """
+    증분 동기화 비교용: {캐릭터 이름: 저장된 레벨/직업/서버/전투력 + 마지막 프로필 조회 후 경과 초}
+    경과 시간은 DB 시계로 계산 (앱/DB 타임존 차이 영향 없음)
+    """
+    with PostgresDB() as cur:
+        cur.execute("""
+            SELECT character_name, server_name, character_class, item_avg_level, combat_power,
+                   EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - profile_fetched_at)) AS profile_age_sec
+            FROM characters
+        """)
+        return {r['character_name']: r for r in cur.fetchall()}
+
+def upsert_character(char_data):
+    """캐릭터 1명 저장 (upsert_characters의 단건 버전)"""
+    try:
+        upsert_characters([char_data])
     except Exception as e:
-        print(f"❌ {name} 저장 실패: {e}")
+        print(f"❌ {char_data.get('CharacterName')} 저장 실패: {e}")
 
+@_bumps_data_version
 def refresh_weekly_raids(character_name, item_lv, combat_power):
     best_raids = calculate_best_raids(item_lv, combat_power)
     if not best_raids: return
     try:
-        with PostgresDB() as cur:
-            new_task_names = [f"{r['name']} ({r['difficulty']})" for r in best_raids]
-            if new_task_names:
-                placeholders = ",".join(["%s"] * len(new_task_names))
-                delete_sql = f"DELETE FROM todos WHERE character_name = %s AND category = '주간' AND task_name NOT IN ({placeholders});"
-                cur.execute(delete_sql, (character_name, *new_task_names))
-            
-            upsert_sql = "INSERT INTO todos (character_name, game_name, task_name, category, total_count, reset_cycle, gold_reward) VALUES (%s, 'LostArk', %s, '주간', 1, 'WEEKLY', %s) ON CONFLICT (character_name, task_name) DO UPDATE SET gold_reward = EXCLUDED.gold_reward;"
-            for r in best_raids:
-                full_name = f"{r['name']} ({r['difficulty']})"
-                cur.execute(upsert_sql, (character_name, full_name, r['gold']))
+        with PostgresDB(transaction=True) as cur:
+            cur.execute("SELECT raid_fingerprint FROM characters WHERE character_name = %s", (character_name,))
+            row = cur.fetchone()
+            stored = {character_name: row['raid_fingerprint']} if row else {}
+            _write_changed_raid_plans(cur, {character_name: best_raids}, stored)
+            _refresh_weekly_income(cur, [character_name])
     except Exception as e:
         print(f"❌ 주간 갱신 실패: {e}")
 
+@_bumps_data_version
 def add_daily_tasks(character_name):
-    defaults = []
-    sql = "INSERT INTO todos (character_name, task_name, category, total_count, reset_cycle, gold_reward) VALUES (%s, %s, '일일', %s, 'DAILY', 0) ON CONFLICT (character_name, task_name) DO NOTHING;"
     try:
         with PostgresDB() as cur:
-            for task, count in defaults:
-                cur.execute(sql, (character_name, task, count))
+            _write_daily_tasks(cur, [character_name])
     except: pass
 
+@_bumps_data_version
 def update_memo(char_name, memo_text):
     with PostgresDB() as cur:
         cur.execute("UPDATE characters SET memo = %s WHERE character_name = %s", (memo_text, char_name))
 
+@_bumps_data_version
 def update_spent_gold(char_name, amount):
-    with PostgresDB() as cur:
+    with PostgresDB(transaction=True) as cur:
         cur.execute("UPDATE characters SET week_gold_spent = %s WHERE character_name = %s", (amount, char_name))
+        _refresh_weekly_income(cur, [char_name])
+
+@_bumps_data_version
+def update_task_count(task_id, current_count):
+    with PostgresDB(transaction=True) as cur:
+        # 수행 시각(updated_at)을 같이 갱신해야 리셋 로직이 '이번 주기에 한 것'으로 판단함
+        cur.execute("""
+            UPDATE todos SET current_count = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s
+            RETURNING character_name, category
+        """, (current_count, task_id))
+        row = cur.fetchone()
+        if row and row['category'] == '주간':
+            _refresh_weekly_income(cur, [row['character_name']])
+
+@_bumps_data_version
+def apply_pending_changes(task_counts=None, memos=None, spent_gold=None):
+    """
+    화면에서 모아둔 변경 사항을 한 트랜잭션으로 저장합니다. (테이블별 multi-row UPDATE 1번씩)
+    - task_counts: {todo id: current_count}
+    - memos: {캐릭터 이름: 메모}
+    - spent_gold: {캐릭터 이름: 사용 골드}
+    """
+    task_rows = list((task_counts or {}).items())
+    memo_rows = list((memos or {}).items())
+    spent_rows = list((spent_gold or {}).items())
+    if not (task_rows or memo_rows or spent_rows):
+        return
+
+    with PostgresDB(transaction=True) as cur:
+        # 주간 수익 집계를 다시 계산할 캐릭터 (주간 숙제가 바뀌었거나 사용 골드가 바뀐 캐릭터)
+        income_chars = [name for name, _ in spent_rows]
+        if task_rows:
+            changed = execute_values(cur, """
+                UPDATE todos AS t
+                SET current_count = v.current_count, updated_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v(id, current_count)
+                WHERE t.id = v.id
+                RETURNING t.character_name, t.category
+            """, task_rows, template="(%s::int, %s::int)", page_size=len(task_rows), fetch=True)
+            income_chars += [r['character_name'] for r in changed if r['category'] == '주간']
+        if memo_rows:
+            execute_values(cur, """
+                UPDATE characters AS c SET memo = v.memo
+                FROM (VALUES %s) AS v(character_name, memo)
+                WHERE c.character_name = v.character_name
+            """, memo_rows, template="(%s, %s::text)", page_size=len(memo_rows))
+        if spent_rows:
+            execute_values(cur, """
+                UPDATE characters AS c SET week_gold_spent = v.week_gold_spent
+                FROM (VALUES %s) AS v(character_name, week_gold_spent)
+                WHERE c.character_name = v.character_name
+            """, spent_rows, template="(%s, %s::int)", page_size=len(spent_rows))
+        _refresh_weekly_income(cur, income_chars)
 
+@_bumps_data_version
 def set_app_setting(key, value):
     with PostgresDB() as cur:
         cur.execute("INSERT INTO app_settings (key, value) VALUES (%s, %s) ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value", (key, str(value)))
@@ -202,6 +581,7 @@ def get_app_setting(key):
 # 원정대 숙제 관리 (CRUD)
 # ---------------------------------------------------------
 
+@_bumps_data_version
 def add_expedition_task(task_name, reset_type="WEEKLY", reset_value=1):
     try:
         with PostgresDB() as cur:
@@ -220,10 +600,12 @@ def get_expedition_tasks():
         cur.execute("SELECT * FROM expedition_tasks ORDER BY id ASC")
         return cur.fetchall()
 
+@_bumps_data_version
 def delete_expedition_task(task_id):
     with PostgresDB() as cur:
         cur.execute("DELETE FROM expedition_tasks WHERE id = %s", (task_id,))
 
+@_bumps_data_version
 def update_expedition_task_check(task_id, is_checked):
     with PostgresDB() as cur:
         # 체크 상태 변경 시 updated_at도 갱신해야 리셋 로직이 동작함
@@ -231,4 +613,11 @@ def update_expedition_task_check(task_id, is_checked):
             UPDATE expedition_tasks 
             SET is_checked = %s, updated_at = CURRENT_TIMESTAMP 
             WHERE id = %s
-        """, (is_checked, task_id))
\ No newline at end of file
+        """, (is_checked, task_id))
+        if is_checked:
+            # N일 간격 숙제가 새로 체크되면 다음 리셋 예정 시각이 바뀌므로 워터마크 무효화
+            cur.execute("""
+                DELETE FROM app_settings
+                WHERE key = %s
+                  AND EXISTS (SELECT 1 FROM expedition_tasks WHERE id = %s AND reset_type = 'INTERVAL')
+            """, (RESET_INTERVAL_DUE_KEY, task_id))
@@ -0,0 +1,217 @@
+import os
+import time
+import threading
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+# ---------------------------------------------------------
+# 프로세스 공용 DB 커넥션 풀
+# ---------------------------------------------------------
+# PostgresDB()가 매번 새로 TCP 연결 + 인증을 하던 비용을 없애기 위해
+# 한 번 만든 커넥션을 재사용합니다. (Streamlit 세션/스레드 간 공유)
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 psycopg2 커넥션 풀.
+    - max_size: 동시에 빌려줄 수 있는 최대 커넥션 수 (다 쓰면 반납될 때까지 대기)
+    - 대여 시 헬스 체크: 끊긴 커넥션은 버리고, 오래 놀던 커넥션은 SELECT 1로 확인
+    - 지표: 대여 횟수, 대기 시간, 생성/폐기 커넥션 수
+    """
+
+    def __init__(self, connect_kwargs, max_size=10, min_size=0,
+                 checkout_timeout=30.0, health_check_interval=30.0):
+        self.connect_kwargs = connect_kwargs
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._idle = []          # [(conn, 반납 시각)]
+        self._in_use = 0         # 빌려준 커넥션 수
+        self._opening = 0        # 생성 중인 커넥션 수 (락 밖에서 connect 하므로)
+        self._stats = {
+            "checkouts": 0,
+            "checkout_wait_total": 0.0,
+            "checkout_wait_max": 0.0,
+            "checkout_timeouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_checks_failed": 0,
+        }
+
+        for _ in range(self.min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.connect_kwargs)
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["connections_discarded"] += 1
+
+    def _is_healthy(self, conn, idle_since):
+        if conn.closed:
+            return False
+        # 방금 반납된 커넥션까지 매번 확인하면 왕복 비용이 다시 생기므로 오래 쉰 것만 확인
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["health_checks_failed"] += 1
+            return False
+
+    def getconn(self):
+        """커넥션 하나를 빌려옵니다. 풀이 가득 차면 checkout_timeout 초까지 대기합니다."""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    if self._in_use + self._opening < self.max_size:
+                        self._opening += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["checkout_timeouts"] += 1
+                        raise psycopg2.pool.PoolError(
+                            f"커넥션 풀 대기 시간 초과 ({self.checkout_timeout}s, max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            if candidate is None:
+                # 새 커넥션 생성 (네트워크 작업이라 락 밖에서 수행)
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._in_use += 1
+            else:
+                conn, idle_since = candidate
+                if not self._is_healthy(conn, idle_since):
+                    with self._cond:
+                        self._in_use -= 1
+                    self._discard(conn)
+                    continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                self._stats["checkouts"] += 1
+                self._stats["checkout_wait_total"] += waited
+                self._stats["checkout_wait_max"] = max(self._stats["checkout_wait_max"], waited)
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """빌려간 커넥션을 반납합니다. 트랜잭션이 열려 있으면 롤백 후 반납합니다."""
+        if not discard and not conn.closed:
+            try:
+                if conn.status != psycopg2.extensions.STATUS_READY:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        if discard:
+            self._discard(conn)
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["in_use"] = self._in_use
+            snapshot["idle"] = len(self._idle)
+            snapshot["max_size"] = self.max_size
+        checkouts = snapshot["checkouts"]
+        snapshot["checkout_wait_avg"] = snapshot["checkout_wait_total"] / checkouts if checkouts else 0.0
+        return snapshot
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """프로세스 공용 풀을 (처음 호출 시) 생성해서 돌려줍니다."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    connect_kwargs=dict(
+                        host=os.getenv("POSTGRES_HOST"),
+                        database=os.getenv("POSTGRES_DB"),
+                        user=os.getenv("POSTGRES_USER"),
+                        password=os.getenv("POSTGRES_PASSWORD"),
+                        port=os.getenv("POSTGRES_PORT"),
+                    ),
+                    max_size=_env_int("POSTGRES_POOL_MAX", 10),
+                    min_size=_env_int("POSTGRES_POOL_MIN", 0),
+                    checkout_timeout=_env_float("POSTGRES_POOL_TIMEOUT", 30.0),
+                    health_check_interval=_env_float("POSTGRES_POOL_HEALTHCHECK_SEC", 30.0),
+                )
+    return _pool
+
+def close_pool():
+    """풀의 모든 유휴 커넥션을 닫고 풀을 버립니다. (테스트/재설정용)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+def get_pool_stats():
+    """풀 지표 (대여 횟수, 대기 시간, 생성된 커넥션 수 등)"""
+    if _pool is None:
+        return {}
+    return _pool.stats()
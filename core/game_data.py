@@ -1,34 +1,96 @@
 # core/game_data.py
+import os
+import json
+import bisect
 
-# 1. 레이드 정보 (주신 데이터 그대로)
-RAID_INFO = [
-    # --- [종막 카제로스] ---
-    {"name": "종막: 카제로스", "difficulty": "하드", "item_level": 1730, "combat_power": 3400, "gold": 52000, "is_single": False},
-    {"name": "종막: 카제로스", "difficulty": "노말", "item_level": 1710, "combat_power": 2100, "gold": 40000, "is_single": False},
+# 1. 레이드 정보 (core/data/raids.json에서 로드 - 새 레이드는 데이터 파일만 수정)
+RAID_DATA_PATH = os.getenv(
+    "LOA_RAID_DATA_PATH", os.path.join(os.path.dirname(__file__), "data", "raids.json")
+)
+REQUIRED_RAID_KEYS = ("name", "difficulty", "item_level", "gold")
 
-    # --- [4막 아르모체] ---
-    {"name": "4막: 아르모체", "difficulty": "하드", "item_level": 1720, "combat_power": 2600, "gold": 42000, "is_single": False},
-    {"name": "4막: 아르모체", "difficulty": "노말", "item_level": 1700, "combat_power": 1800, "gold": 33000, "is_single": False},
+def load_raid_data(path=RAID_DATA_PATH):
+    """레이드 데이터 파일 로드. 반환값: (데이터 버전, 레이드 리스트)"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    raids = data["raids"]
+    for r in raids:
+        missing = [k for k in REQUIRED_RAID_KEYS if k not in r]
+        if missing:
+            raise ValueError(f"레이드 데이터 형식 오류 ({r.get('name')}): {missing} 누락")
+        r.setdefault("combat_power", 0)
+    return str(data.get("version", "")), raids
 
-    # --- [3막 모르둠] ---
-    {"name": "3막: 모르둠", "difficulty": "하드", "item_level": 1700, "combat_power": 2000, "gold": 27000, "is_single": False},
-    {"name": "3막: 모르둠", "difficulty": "노말", "item_level": 1680, "combat_power": 0, "gold": 21000, "is_single": True},
 
-    # --- [2막 아브렐슈드] ---
-    {"name": "2막: 아브렐슈드", "difficulty": "하드", "item_level": 1690, "combat_power": 1700, "gold": 23000, "is_single": False},
-    {"name": "2막: 아브렐슈드", "difficulty": "노말", "item_level": 1670, "combat_power": 0, "gold": 16500, "is_single": True},
+class RaidIndex:
+    """
+    레이드 추천 인덱스 (import 시 1번 생성)
+    - 입장 조건(아이템 레벨 / 전투력) 기준값들을 정렬해 두고, 캐릭터 스펙은 bisect로 구간(bucket)에 매핑
+    - 같은 구간이면 추천 결과가 같으므로 구간별 결과를 미리 계산해 둠 (구간 수 = 기준값 개수 조합, 수십 개 수준)
+    결과는 기존 calculate_best_raids 선형 탐색과 동일합니다.
+    """
+
+    def __init__(self, raids):
+        self.raids = raids
+        self._levels = sorted({r["item_level"] for r in raids})
+        self._cps = sorted({r["combat_power"] for r in raids})
+
+        # 레이드 이름별 그룹 (등장 순서, 원래 인덱스 유지)
+        groups = {}
+        for idx, r in enumerate(raids):
+            groups.setdefault(r["name"], []).append((
+                idx,
+                self._levels.index(r["item_level"]),
+                self._cps.index(r["combat_power"]),
+                r,
+            ))
+        self._groups = list(groups.values())
+
+        self._table = {
+            (lb, cb): self._resolve(lb, cb)
+            for lb in range(len(self._levels) + 1)
+            for cb in range(len(self._cps) + 1)
+        }
 
-    # --- [1막 에기르] ---
-    {"name": "1막: 에기르", "difficulty": "하드", "item_level": 1680, "combat_power": 1400, "gold": 18000, "is_single": False},
-    {"name": "1막: 에기르", "difficulty": "노말", "item_level": 1660, "combat_power": 0, "gold": 11500, "is_single": True},
+    def _resolve(self, level_bucket, cp_bucket):
+        # bucket > 기준값 위치  ⇔  스펙 >= 기준값
+        candidates = []
+        for group in self._groups:
+            eligible = [e for e in group if level_bucket > e[1] and cp_bucket > e[2]]
+            if not eligible:
+                continue
+            # 같은 레이드 중 최고 보상만 남기기 (동률이면 먼저 나온 것)
+            best = eligible[0]
+            for e in eligible[1:]:
+                if e[3]["gold"] > best[3]["gold"]:
+                    best = e
+            candidates.append((eligible[0][0], best[3]))
+        # 처음 입장 가능한 순서 → 골드 내림차순 (안정 정렬)
+        candidates.sort(key=lambda c: c[0])
+        ranked = [c[1] for c in candidates]
+        ranked.sort(key=lambda x: x["gold"], reverse=True)
+        return tuple(ranked)
 
-    # --- [베히모스] ---
-    {"name": "베히모스", "difficulty": "노말", "item_level": 1640, "combat_power": 0, "gold": 7200, "is_single": False},
+    def bucket(self, item_lv, combat_power):
+        return (bisect.bisect_right(self._levels, item_lv), bisect.bisect_right(self._cps, combat_power))
 
-    # --- [서막 에키드나] ---
-    {"name": "서막: 에키드나", "difficulty": "하드", "item_level": 1630, "combat_power": 0, "gold": 7200, "is_single": False},
-    {"name": "서막: 에키드나", "difficulty": "노말", "item_level": 1620, "combat_power": 0, "gold": 5500, "is_single": False},
-]
+    def best_raids(self, item_lv, combat_power, top_n=3):
+        return list(self._table[self.bucket(item_lv, combat_power)][:top_n])
+
+    def best_raids_batch(self, specs, top_n=3):
+        """[(아이템 레벨, 전투력), ...] → 캐릭터별 추천 리스트 (같은 구간은 한 번만 조회)"""
+        memo = {}
+        results = []
+        for item_lv, combat_power in specs:
+            key = self.bucket(item_lv, combat_power)
+            if key not in memo:
+                memo[key] = list(self._table[key][:top_n])
+            results.append(list(memo[key]))
+        return results
+
+
+RAID_DATA_VERSION, RAID_INFO = load_raid_data()
+RAID_INDEX = RaidIndex(RAID_INFO)
 
 # 2. 핵심 알고리즘: Top 3 뽑기
 def calculate_best_raids(item_lv, combat_power):
@@ -37,33 +99,10 @@ def calculate_best_raids(item_lv, combat_power):
     - 조건 1: 입장 레벨 & 전투력 충족
     - 조건 2: 같은 레이드면 상위 난이도 1개만 선택 (Lockout 공유)
     - 조건 3: 골드 보상 내림차순 정렬 -> 상위 3개
+    (RAID_INDEX에 미리 계산된 결과를 조회)
     """
-    
-    # A. 입장 가능한 레이드 필터링
-    available = []
-    for r in RAID_INFO:
-        # 전투력이 0인 데이터는 조건 무시(None) 처리하거나 그냥 비교
-        req_cp = r.get("combat_power", 0)
-        if item_lv >= r["item_level"] and combat_power >= req_cp:
-            available.append(r)
-            
-    # B. 같은 레이드 중 최고 보상만 남기기 (Group By Name)
-    # 예: 에키드나 하드, 노말 둘 다 가능하면 -> 하드만 남김
-    best_versions = {}
-    for r in available:
-        name = r["name"]
-        if name not in best_versions:
-            best_versions[name] = r
-        else:
-            # 이미 저장된 것보다 지금 것이 골드가 더 많으면 교체
-            if r["gold"] > best_versions[name]["gold"]:
-                best_versions[name] = r
-                
-    # 딕셔너리를 다시 리스트로 변환
-    final_candidates = list(best_versions.values())
-    
-    # C. 골드 순으로 정렬 (내림차순)
-    final_candidates.sort(key=lambda x: x["gold"], reverse=True)
-    
-    # D. 상위 3개만 리턴
-    return final_candidates[:3]
\ No newline at end of file
+    return RAID_INDEX.best_raids(item_lv, combat_power)
+
+def calculate_best_raids_batch(specs, top_n=3):
+    """원정대 전체 [(아이템 레벨, 전투력), ...]를 한 번에 추천"""
+    return RAID_INDEX.best_raids_batch(specs, top_n)
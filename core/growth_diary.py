@@ -0,0 +1,74 @@
+from collections import defaultdict
+from core.database import PostgresDB
+from core.reset_calendar import KST_ZONE
+
+# ---------------------------------------------------------
+# 성장 기록 (Growth Diary) 조회
+# ---------------------------------------------------------
+# character_snapshots는 동기화할 때마다 쌓이므로 화면에는 하루/한 주 단위 최댓값으로 줄여서 보여줍니다.
+# 구간 경계는 게임 기준(KST): 하루 = 06:00 시작, 한 주 = 수요일 06:00 시작
+# (captured_at을 KST 벽시계 시각으로 바꾼 뒤, date_trunc는 자정/월요일 기준이라 오프셋만큼 당겼다가 다시 더함)
+
+BUCKET_OFFSETS = {
+    "day": "6 hours",
+    "week": "2 days 6 hours",
+}
+
+def _bucket_sql(bucket):
+    if bucket not in BUCKET_OFFSETS:
+        raise ValueError(f"지원하지 않는 구간 단위: {bucket} (day / week)")
+    offset = BUCKET_OFFSETS[bucket]
+    local = f"captured_at AT TIME ZONE '{KST_ZONE}'"
+    return f"(date_trunc('{bucket}', {local} - INTERVAL '{offset}') + INTERVAL '{offset}') AT TIME ZONE '{KST_ZONE}'"
+
+def _range_filter(start, end):
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("captured_at >= %s")
+        params.append(start)
+    if end is not None:
+        conditions.append("captured_at < %s")
+        params.append(end)
+    return "".join(f" AND {c}" for c in conditions), params
+
+def get_character_series(character_name, bucket="day", start=None, end=None):
+    """캐릭터 1명의 구간별 최고 레벨/전투력: [{bucket, item_avg_level, combat_power}, ...] (시간순)"""
+    range_sql, params = _range_filter(start, end)
+    with PostgresDB() as cur:
+        cur.execute(f"""
+            SELECT {_bucket_sql(bucket)} AS bucket,
+                   MAX(item_avg_level) AS item_avg_level,
+                   MAX(combat_power) AS combat_power
+            FROM character_snapshots
+            WHERE character_name = %s{range_sql}
+            GROUP BY 1 ORDER BY 1
+        """, (character_name, *params))
+        return cur.fetchall()
+
+def get_account_series(account_name, bucket="day", start=None, end=None):
+    """원정대 전체의 캐릭터별 구간 최댓값: {캐릭터 이름: [{bucket, item_avg_level, combat_power}, ...]}"""
+    range_sql, params = _range_filter(start, end)
+    with PostgresDB() as cur:
+        cur.execute(f"""
+            SELECT character_name,
+                   {_bucket_sql(bucket)} AS bucket,
+                   MAX(item_avg_level) AS item_avg_level,
+                   MAX(combat_power) AS combat_power
+            FROM character_snapshots
+            WHERE account_name = %s{range_sql}
+            GROUP BY 1, 2 ORDER BY 1, 2
+        """, (account_name, *params))
+        rows = cur.fetchall()
+
+    series = defaultdict(list)
+    for r in rows:
+        series[r['character_name']].append(
+            {"bucket": r['bucket'], "item_avg_level": r['item_avg_level'], "combat_power": r['combat_power']}
+        )
+    return dict(series)
+
+def get_accounts():
+    """성장 기록이 있는 원정대(대표 캐릭터) 목록"""
+    with PostgresDB() as cur:
+        cur.execute("SELECT DISTINCT account_name FROM characters WHERE account_name IS NOT NULL ORDER BY 1")
+        return [r['account_name'] for r in cur.fetchall()]
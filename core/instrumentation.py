@@ -0,0 +1,305 @@
+import os
+import re
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from psycopg2.extras import RealDictCursor
+
+# ---------------------------------------------------------
+# 계측 (DB / API / 화면 그리기 시간)
+# ---------------------------------------------------------
+# LOA_PROFILE=1 일 때만 켜집니다. 꺼져 있으면 각 훅은 ENABLED 플래그 하나만 보고 바로 빠지고,
+# PostgresDB도 평소의 RealDictCursor를 그대로 씁니다. (측정 코드 자체가 실행되지 않음)
+# 측정값은 두 군데에 쌓입니다.
+#  - Profile: Streamlit rerun 1번 / 동기화 작업 1개 단위 (사이드바 패널, 로그 한 줄)
+#  - 프로세스 누적: Prometheus 텍스트 (/metrics, LOA_METRICS_PORT 설정 시)
+
+ENABLED = os.getenv("LOA_PROFILE", "").lower() in ("1", "true", "on", "yes")
+METRICS_PORT = int(os.getenv("LOA_METRICS_PORT", 0))
+RECENT_PROFILES = 20
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}                                  # (kind, name) → 누적 통계
+_recent = deque(maxlen=RECENT_PROFILES)       # 끝난 Profile (최근 것부터)
+
+def set_enabled(flag):
+    global ENABLED
+    ENABLED = bool(flag)
+
+def _add(table, kind, name, seconds, rows, status, error):
+    stat = table.get((kind, name))
+    if stat is None:
+        stat = table[(kind, name)] = {
+            "count": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0, "errors": 0, "statuses": {},
+        }
+    stat["count"] += 1
+    stat["seconds"] += seconds
+    stat["max_seconds"] = max(stat["max_seconds"], seconds)
+    if rows:
+        stat["rows"] += rows
+    if error:
+        stat["errors"] += 1
+    if status is not None:
+        stat["statuses"][status] = stat["statuses"].get(status, 0) + 1
+
+
+class Profile:
+    """rerun 1번 / 동기화 작업 1개 동안의 측정값 (여러 스레드에서 기록)"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started_at = time.time()
+        self.elapsed = None
+        self.stats = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, kind, name, seconds, rows=None, status=None, error=False):
+        with self._lock:
+            _add(self.stats, kind, name, seconds, rows, status, error)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._start
+        return self
+
+    def rows(self):
+        """표시용: 작업별 통계 (총 시간이 긴 순)"""
+        with self._lock:
+            items = [(key, dict(stat, statuses=dict(stat["statuses"]))) for key, stat in self.stats.items()]
+        result = [
+            {
+                "kind": kind, "name": name, "count": stat["count"],
+                "total_ms": round(stat["seconds"] * 1000, 2), "max_ms": round(stat["max_seconds"] * 1000, 2),
+                "rows": stat["rows"], "errors": stat["errors"], "statuses": stat["statuses"],
+            }
+            for (kind, name), stat in items
+        ]
+        return sorted(result, key=lambda r: r["total_ms"], reverse=True)
+
+    def by_kind(self):
+        """종류(db / api / render)별 호출 수, 총 시간(ms)"""
+        totals = {}
+        for row in self.rows():
+            entry = totals.setdefault(row["kind"], {"count": 0, "total_ms": 0.0})
+            entry["count"] += row["count"]
+            entry["total_ms"] = round(entry["total_ms"] + row["total_ms"], 2)
+        return totals
+
+    def log_line(self, top=5):
+        """구조화 로그 한 줄 (JSON)"""
+        return json.dumps({
+            "event": "profile",
+            "label": self.label,
+            "elapsed_ms": round((self.elapsed or 0) * 1000, 2),
+            "by_kind": self.by_kind(),
+            "top": self.rows()[:top],
+        }, ensure_ascii=False, default=str)
+
+# ---------------------------------------------------------
+# 기록
+# ---------------------------------------------------------
+def current():
+    return getattr(_local, "profile", None)
+
+def begin(label):
+    """이 스레드의 Profile 시작. 꺼져 있으면 None"""
+    if not ENABLED:
+        return None
+    profile = Profile(label)
+    _local.profile = profile
+    return profile
+
+def end(profile, log=True):
+    """Profile 종료: 최근 목록에 보관하고 로그 한 줄 출력"""
+    if profile is None:
+        return None
+    if current() is profile:
+        _local.profile = None
+    profile.finish()
+    with _lock:
+        _recent.appendleft(profile)
+    if log:
+        print(profile.log_line(), flush=True)
+    return profile
+
+def recent_profiles(prefix=None):
+    with _lock:
+        return [p for p in _recent if prefix is None or p.label.startswith(prefix)]
+
+def bind(fn):
+    """스레드 풀에 넘기는 함수가 호출한 쪽 Profile에 기록되도록 묶음 (꺼져 있으면 fn 그대로)"""
+    profile = current() if ENABLED else None
+    if profile is None:
+        return fn
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        previous = current()
+        _local.profile = profile
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.profile = previous
+    return bound
+
+def record(kind, name, seconds, rows=None, status=None, error=False):
+    if not ENABLED:
+        return
+    with _lock:
+        _add(_totals, kind, name, seconds, rows, status, error)
+    profile = current()
+    if profile is not None:
+        profile.add(kind, name, seconds, rows, status, error)
+
+@contextmanager
+def _span(kind, name):
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        record(kind, name, time.perf_counter() - start, error=error)
+
+_NOOP = nullcontext()
+
+def span(kind, name):
+    """with span("render", "todo_list"): ... 구간 시간 기록 (꺼져 있으면 아무 일도 안 하는 컨텍스트)"""
+    return _span(kind, name) if ENABLED else _NOOP
+
+# ---------------------------------------------------------
+# DB 커서
+# ---------------------------------------------------------
+_STATEMENT_VERB = re.compile(r"^\s*(\w+)")
+_STATEMENT_TABLE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?|INDEX(?:\s+IF\s+NOT\s+EXISTS)?\s+\w+\s+ON)\s+([a-z_][\w.]*)",
+    re.IGNORECASE,
+)
+
+@functools.lru_cache(maxsize=512)
+def _statement_name_cached(head):
+    verb = _STATEMENT_VERB.match(head)
+    if not verb:
+        return "sql"
+    table = _STATEMENT_TABLE.search(head)
+    return f"{verb.group(1).upper()} {table.group(1)}" if table else verb.group(1).upper()
+
+def statement_name(query):
+    """SQL → 'SELECT todos' 같은 집계용 이름 (동사 + 첫 테이블)"""
+    if isinstance(query, bytes):
+        query = query[:300].decode("utf-8", "ignore")
+    elif not isinstance(query, str):
+        return "sql"
+    return _statement_name_cached(" ".join(query[:300].split()))
+
+
+class InstrumentedCursor(RealDictCursor):
+    """계측이 켜져 있을 때만 PostgresDB가 쓰는 커서: execute마다 시간/행 수 기록"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        error = False
+        try:
+            return super().execute(query, vars)
+        except Exception:
+            error = True
+            raise
+        finally:
+            record("db", statement_name(query), time.perf_counter() - start,
+                   rows=max(self.rowcount, 0), error=error)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        error = False
+        try:
+            return super().executemany(query, vars_list)
+        except Exception:
+            error = True
+            raise
+        finally:
+            record("db", statement_name(query), time.perf_counter() - start,
+                   rows=max(self.rowcount, 0), error=error)
+
+# ---------------------------------------------------------
+# Prometheus 텍스트
+# ---------------------------------------------------------
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def prometheus_text():
+    """프로세스 누적 지표 + API/커넥션 풀 지표를 Prometheus 텍스트 형식으로"""
+    from core.loa_api import get_api_stats
+    from core.db_pool import get_pool_stats
+
+    with _lock:
+        totals = {key: dict(stat, statuses=dict(stat["statuses"])) for key, stat in _totals.items()}
+
+    lines = [
+        "# HELP loa_operation_seconds 계측된 작업 시간 (db / api / render)",
+        "# TYPE loa_operation_seconds summary",
+    ]
+    for (kind, name), stat in sorted(totals.items()):
+        labels = f'kind="{_label(kind)}",name="{_label(name)}"'
+        lines.append(f"loa_operation_seconds_count{{{labels}}} {stat['count']}")
+        lines.append(f"loa_operation_seconds_sum{{{labels}}} {stat['seconds']:.6f}")
+    for metric, key, kind_of in (
+        ("loa_operation_max_seconds", "max_seconds", "gauge"),
+        ("loa_operation_rows_total", "rows", "counter"),
+        ("loa_operation_errors_total", "errors", "counter"),
+    ):
+        lines.append(f"# TYPE {metric} {kind_of}")
+        for (kind, name), stat in sorted(totals.items()):
+            lines.append(f'{metric}{{kind="{_label(kind)}",name="{_label(name)}"}} {stat[key]}')
+
+    lines.append("# TYPE loa_api_responses_total counter")
+    for (kind, name), stat in sorted(totals.items()):
+        for status, count in sorted(stat["statuses"].items(), key=lambda item: str(item[0])):
+            lines.append(f'loa_api_responses_total{{name="{_label(name)}",status="{_label(status)}"}} {count}')
+
+    for prefix, stats in (("loa_api", get_api_stats()), ("loa_db_pool", get_pool_stats())):
+        for key, value in sorted(stats.items()):
+            if isinstance(value, (int, float)):
+                lines.append(f"{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_metrics_server = None
+
+def ensure_metrics_server():
+    """LOA_PROFILE과 LOA_METRICS_PORT가 설정돼 있으면 프로세스당 한 번 /metrics 서버를 띄웁니다."""
+    global _metrics_server
+    if not ENABLED or METRICS_PORT <= 0 or _metrics_server is not None:
+        return
+    with _lock:
+        if _metrics_server is not None:
+            return
+        try:
+            _metrics_server = ThreadingHTTPServer(("0.0.0.0", METRICS_PORT), _MetricsHandler)
+        except OSError as e:
+            # 같은 포트를 이미 다른 프로세스가 쓰는 경우
+            print(f"⚠️ 지표 서버 시작 실패 (포트 {METRICS_PORT}): {e}")
+            _metrics_server = False
+            return
+        threading.Thread(target=_metrics_server.serve_forever, name="loa-metrics", daemon=True).start()
@@ -1,86 +1,409 @@
 import os
+import time
+import threading
 import requests
+import re
 import json
 import concurrent.futures
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from core.rate_limiter import TokenBucket, retry_after_seconds, backoff_delay
+from core.response_cache import get_response_cache
+from core import instrumentation
 
 load_dotenv()
 
+# 프로필 조회 동시 요청 수 (공용 스레드 풀 크기)
+MAX_WORKERS = int(os.getenv("LOA_API_WORKERS", 8))
+REQUEST_TIMEOUT = float(os.getenv("LOA_API_TIMEOUT", 10))
+# API 키당 분당 요청 한도 (응답 헤더를 받으면 서버 값으로 자동 보정)
+RATE_LIMIT_PER_MINUTE = int(os.getenv("LOA_API_RATE_LIMIT", 100))
+# 429 / 5xx / 네트워크 오류 시 재시도 횟수
+MAX_RETRIES = int(os.getenv("LOA_API_MAX_RETRIES", 4))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# 증분 동기화: 이 시간보다 오래된 프로필은 변경이 없어도 다시 조회
+PROFILE_MAX_AGE_HOURS = float(os.getenv("LOA_PROFILE_MAX_AGE_HOURS", 24))
+
+# ---------------------------------------------------------
+# 프로세스 공용 HTTP 세션 / 스레드 풀
+# ---------------------------------------------------------
+# LostArkAPI()는 Streamlit rerun마다 새로 만들어지므로, TLS 연결(keep-alive)과
+# 워커 스레드는 인스턴스가 아니라 모듈 단위로 한 번만 만들어 재사용합니다.
+_session = None
+_executor = None
+_shared_lock = threading.Lock()
+
+# 요청 한도는 API 키 단위이므로 버킷도 프로세스 공용
+_rate_limiter = TokenBucket(RATE_LIMIT_PER_MINUTE)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,      # 실제로 보낸 HTTP 요청 수 (재시도 포함)
+    "throttled": 0,     # 토큰 버킷 때문에 대기한 요청 수
+    "throttle_wait": 0.0,
+    "rate_limited": 0,  # 서버가 429를 돌려준 횟수
+    "retried": 0,       # 재시도한 횟수
+    "failed": 0,        # 재시도 후에도 실패한 호출 수
+}
+
+def _count(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+def get_api_stats():
+    """API 호출 지표 (요청/대기/429/재시도/실패 횟수)"""
+    with _stats_lock:
+        return dict(_stats)
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _shared_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_WORKERS * 2)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _shared_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS, thread_name_prefix="loa-api"
+                )
+    return _executor
+
+
+_CHARACTER_PATH = re.compile(r"/characters/[^/?]+")
+
+def _endpoint_name(url):
+    """URL → 집계용 엔드포인트 이름 (캐릭터 이름은 {name}으로)"""
+    path = url.split("://", 1)[-1].partition("/")[2].partition("?")[0]
+    return _CHARACTER_PATH.sub("/characters/{name}", "/" + path)
+
+
 class LostArkAPI:
-    def __init__(self):
-        self.api_key = os.getenv("LOA_API_KEY") 
-        self.token = self.api_key 
+    def __init__(self, base_url=None):
+        self.api_key = os.getenv("LOA_API_KEY")
+        self.token = self.api_key
         self.headers = {
             'accept': 'application/json',
             'authorization': f'bearer {self.api_key}'
         }
-        self.base_url = "https://developer-lostark.game.onstove.com"
+        self.base_url = base_url or os.getenv("LOA_API_BASE_URL", "https://developer-lostark.game.onstove.com")
+        self.session = _get_session()
+        self.rate_limiter = _rate_limiter
+        self.cache = get_response_cache()
+        self.failed_profiles = []   # 마지막 동기화에서 프로필 조회에 실패한 캐릭터
+        self.skipped_profiles = 0   # 마지막 동기화에서 변경이 없어 프로필 조회를 건너뛴 캐릭터 수
+
+    def _request(self, method, url, **kwargs):
+        """
+        요청 한도를 지키며 HTTP 요청을 보냅니다.
+        - 토큰 버킷에서 토큰을 받을 때까지 대기 (실패 대신 큐잉)
+        - 429 / 5xx / 네트워크 오류는 지수 백오프(jitter)로 재시도
+        재시도를 다 써도 실패하면 마지막 응답을 돌려주거나 마지막 예외를 올립니다.
+        """
+        response, error = None, None
+        for attempt in range(MAX_RETRIES + 1):
+            waited = self.rate_limiter.acquire()
+            if waited > 0:
+                _count("throttled")
+                _count("throttle_wait", waited)
 
-    def get_character_profile(self, char_name):
+            _count("requests")
+            delay = backoff_delay(attempt)
+            try:
+                response = self._send(method, url, **kwargs)
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            else:
+                self.rate_limiter.update_from_headers(response.headers)
+                if response.status_code not in RETRY_STATUS:
+                    return response
+                if response.status_code == 429:
+                    _count("rate_limited")
+                    retry_after = retry_after_seconds(response.headers)
+                    self.rate_limiter.penalize(retry_after)
+                    delay = max(delay, retry_after)
+
+            if attempt < MAX_RETRIES:
+                _count("retried")
+                time.sleep(delay)
+
+        _count("failed")
+        if response is not None:
+            return response
+        raise error
+
+    def _send(self, method, url, **kwargs):
+        """HTTP 요청 1번 (계측이 켜져 있으면 엔드포인트별 시간/상태 코드 기록)"""
+        if not instrumentation.ENABLED:
+            return self.session.request(method, url, headers=self.headers, timeout=REQUEST_TIMEOUT, **kwargs)
+        started = time.perf_counter()
+        status = None
+        try:
+            response = self.session.request(method, url, headers=self.headers, timeout=REQUEST_TIMEOUT, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            instrumentation.record(
+                "api", f"{method} {_endpoint_name(url)}", time.perf_counter() - started,
+                status=status if status is not None else "error", error=status is None or status >= 400,
+            )
+
+    def _get(self, url):
+        return self._request("GET", url)
+
+    def _post(self, url, payload):
+        return self._request("POST", url, json=payload)
+
+    def _cached_get_json(self, endpoint, key, url, use_cache=True):
+        """
+        캐시를 먼저 보고, 없으면 API 호출 후 성공 응답을 캐시에 저장합니다.
+        use_cache=False(강제 새로고침)면 캐시를 읽지 않고 새 응답으로 덮어씁니다.
+        반환값: (status_code, json) - 캐시 적중 시 status_code는 200
+        """
+        if self.cache and use_cache:
+            cached = self.cache.get(endpoint, key)
+            if cached is not None:
+                return 200, cached
+
+        response = self._get(url)
+        if response.status_code != 200:
+            return response.status_code, None
+        data = response.json()
+        if self.cache and data:
+            self.cache.put(endpoint, key, data)
+        return 200, data
+
+    def get_character_profile(self, char_name, use_cache=True):
         url = f"{self.base_url}/armories/characters/{char_name}/profiles"
         try:
-            response = requests.get(url, headers=self.headers)
-            if response.status_code == 200:
-                return response.json()
+            status, data = self._cached_get_json("profiles", char_name, url, use_cache)
+            if status == 200:
+                return data
+            print(f"⚠️ '{char_name}' 프로필 조회 실패: {status}")
             return None
-        except:
+        except Exception as e:
+            print(f"❌ '{char_name}' 프로필 조회 에러: {e}")
             return None
 
-    def get_characters(self, representative_name):
-        representative_name = representative_name.strip()
-        
-        # 1. 원정대 목록 조회
+    def get_siblings(self, representative_name, use_cache=True):
+        """원정대 캐릭터 목록 조회 (실패 시 빈 리스트)"""
         siblings_url = f"{self.base_url}/characters/{representative_name}/siblings"
         try:
-            resp = requests.get(siblings_url, headers=self.headers)
-            if resp.status_code != 200:
-                print(f"⚠️ 원정대 조회 실패: {resp.status_code}")
+            status, data = self._cached_get_json("siblings", representative_name, siblings_url, use_cache)
+            if status != 200:
+                print(f"⚠️ 원정대 조회 실패: {status}")
                 return []
-            siblings = resp.json()
-            if not siblings: return []
+            return data or []
         except Exception as e:
             print(f"❌ API 요청 에러: {e}")
             return []
 
-        # 2. 상세 정보 병렬 조회
-        enriched_data = []
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-            future_to_char = {
-                executor.submit(self.get_character_profile, char['CharacterName']): char 
-                for char in siblings
-            }
-            
-            for future in concurrent.futures.as_completed(future_to_char):
-                char_basic = future_to_char[future]
-                profile_detail = future.result()
-                
+    def get_market_page(self, category_code, page_no=1):
+        """거래소 검색 1페이지 (POST /markets/items). 실패 시 None - 시세는 자주 바뀌므로 캐시하지 않음"""
+        url = f"{self.base_url}/markets/items"
+        payload = {
+            "Sort": "GRADE",
+            "CategoryCode": category_code,
+            "PageNo": page_no,
+            "SortCondition": "ASC",
+        }
+        try:
+            response = self._post(url, payload)
+            if response.status_code == 200:
+                return response.json()
+            print(f"⚠️ 거래소 조회 실패 ({category_code}, {page_no}페이지): {response.status_code}")
+        except Exception as e:
+            print(f"❌ 거래소 조회 에러 ({category_code}, {page_no}페이지): {e}")
+        return None
+
+    def iter_market_pages(self, category_code):
+        """
+        카테고리의 모든 페이지를 받아오는 대로 (페이지 번호, 아이템 리스트)로 내보냅니다.
+        첫 페이지로 전체 페이지 수를 알아낸 뒤 나머지는 공용 스레드 풀에서 병렬 조회하되,
+        동시에 들고 있는 페이지는 MAX_WORKERS개까지만 (수천 개 아이템도 전부 메모리에 올리지 않음)
+        실패한 페이지는 아이템 None으로 내보냅니다.
+        """
+        first = self.get_market_page(category_code, 1)
+        if first is None:
+            yield 1, None
+            return
+        yield 1, first.get("Items") or []
+
+        page_size = first.get("PageSize") or 10
+        total_pages = -(-(first.get("TotalCount") or 0) // page_size)
+        executor = _get_executor()
+        pending = {}
+        next_page = 2
+        while next_page <= total_pages or pending:
+            while next_page <= total_pages and len(pending) < MAX_WORKERS:
+                pending[executor.submit(instrumentation.bind(self.get_market_page), category_code, next_page)] = next_page
+                next_page += 1
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                page_no = pending.pop(future)
+                data = future.result()
+                yield page_no, (data.get("Items") or []) if data is not None else None
+
+    @staticmethod
+    def parse_combat_power(profile_detail):
+        """프로필 응답에서 전투력 추출 (없으면 0)"""
+        combat_power = 0
+        if not profile_detail:
+            return combat_power
+
+        # [수정됨] CombatPower 파싱 로직 강화 (쉼표와 소수점 처리)
+        # "1,743.76" -> 1743
+        if 'CombatPower' in profile_detail:
+            try:
+                raw_val = str(profile_detail['CombatPower']) # 일단 문자열로
+                clean_val = raw_val.replace(',', '')         # 쉼표 제거 "1743.76"
+                combat_power = int(float(clean_val))         # 실수 변환 후 정수화
+            except:
                 combat_power = 0
-                
-                if profile_detail:
-                    # [수정됨] CombatPower 파싱 로직 강화 (쉼표와 소수점 처리)
-                    # "1,743.76" -> 1743
-                    if 'CombatPower' in profile_detail:
-                        try:
-                            raw_val = str(profile_detail['CombatPower']) # 일단 문자열로
-                            clean_val = raw_val.replace(',', '')         # 쉼표 제거 "1743.76"
-                            combat_power = int(float(clean_val))         # 실수 변환 후 정수화
-                        except:
-                            combat_power = 0
-                    
-                    # (만약 CombatPower가 0이면 예비로 공격력 가져오기 - 혹시 모르니 유지)
-                    if combat_power == 0 and 'Stats' in profile_detail:
-                        for stat in profile_detail['Stats']:
-                            if stat['Type'] == '공격력':
-                                try:
-                                    combat_power = int(stat['Value'].replace(',', ''))
-                                except: pass
-                                break
-                
-                char_data = char_basic.copy()
-                char_data['CombatPower'] = combat_power
-                enriched_data.append(char_data)
-                
+
+        # (만약 CombatPower가 0이면 예비로 공격력 가져오기 - 혹시 모르니 유지)
+        if combat_power == 0 and 'Stats' in profile_detail:
+            for stat in profile_detail['Stats']:
+                if stat['Type'] == '공격력':
+                    try:
+                        combat_power = int(stat['Value'].replace(',', ''))
+                    except: pass
+                    break
+        return combat_power
+
+    def get_characters(self, representative_name):
+        """대표 캐릭터 1명의 원정대 + 상세 정보 (get_rosters의 단건 버전)"""
+        representative_name = representative_name.strip()
+        return self.get_rosters([representative_name]).get(representative_name, [])
+
+    @staticmethod
+    def _profile_unchanged(char_basic, stored, max_age_sec):
+        """siblings 응답과 DB에 저장된 값이 같고 프로필이 충분히 최근이면 True"""
+        if not stored:
+            return False
+        age = stored.get('profile_age_sec')
+        if age is None or float(age) > max_age_sec:
+            return False
+        try:
+            level = float(str(char_basic.get('ItemAvgLevel')).replace(',', ''))
+        except (TypeError, ValueError):
+            return False
+        return (
+            abs(level - float(stored.get('item_avg_level') or 0)) < 0.005
+            and char_basic.get('CharacterClassName') == stored.get('character_class')
+            and char_basic.get('ServerName') == stored.get('server_name')
+        )
+
+    def get_rosters(self, representative_names, known=None, max_profile_age_hours=None, force_refresh=False,
+                    progress=None, siblings=None, prefetched=None, exclude=None, on_unit=None):
+        """
+        여러 원정대를 한 번에 동기화합니다.
+        1. 모든 대표 캐릭터의 원정대 목록을 동시에 조회
+        2. 목록이 도착하는 대로 모든 캐릭터의 프로필 조회를 하나의 공용 스레드 풀에 투입
+        - known: database.get_character_sync_state() 결과를 넘기면 증분 동기화
+          (레벨/직업/서버가 그대로이고 프로필이 max_profile_age_hours 이내면 조회 생략, 저장된 전투력 유지)
+        - force_refresh: 응답 캐시를 건너뛰고 전부 API에서 새로 받음
+        - progress: 캐릭터 하나가 끝날 때마다 progress(대표 이름, 캐릭터 이름, 완료 수, 현재까지 알려진 전체 수) 호출
+        - 이어하기용 (sync_jobs 체크포인트):
+          siblings: {대표 이름: 원정대 목록} - 이미 받은 원정대 목록은 다시 조회하지 않음
+          prefetched: {캐릭터 이름: 캐릭터 데이터} - 이미 조회한 캐릭터는 그대로 사용
+          exclude: 결과에서 아예 뺄 캐릭터 이름 (이미 저장까지 끝난 캐릭터)
+          on_unit: 새로 조회한 단위마다 on_unit('name' | 'character', 이름, 대표 이름, 성공 여부, 결과) 호출
+        반환값: {대표 캐릭터 이름: 전투력 높은 순으로 정렬된 캐릭터 리스트}
+        """
+        use_cache = not force_refresh
+        names = []
+        for name in representative_names:
+            name = (name or "").strip()
+            if name and name not in names:
+                names.append(name)
+
+        if max_profile_age_hours is None:
+            max_profile_age_hours = PROFILE_MAX_AGE_HOURS
+        max_age_sec = max_profile_age_hours * 3600
+
+        known_siblings = siblings or {}
+        prefetched = prefetched or {}
+        exclude = set(exclude or ())
+
+        executor = _get_executor()
+        rosters = {name: [] for name in names}
+        self.failed_profiles = []
+        self.skipped_profiles = 0
+
+        done, total = 0, 0
+        def report(name, char_name):
+            nonlocal done
+            done += 1
+            if progress:
+                progress(name, char_name, done, total)
+
+        # 2. 상세 정보 병렬 조회 (원정대 구분 없이 같은 풀에서 처리)
+        profile_futures = {}
+        def queue_profiles(name, char_list):
+            nonlocal total
+            char_list = [c for c in char_list if c['CharacterName'] not in exclude]
+            total += len(char_list)
+            for char in char_list:
+                char_name = char['CharacterName']
+                if char_name in prefetched:
+                    rosters[name].append(prefetched[char_name])
+                    report(name, char_name)
+                    continue
+                stored = known.get(char_name) if known else None
+                if self._profile_unchanged(char, stored, max_age_sec):
+                    # 변경 없음: API 호출 없이 저장된 전투력 그대로 사용
+                    char_data = char.copy()
+                    char_data['CombatPower'] = int(stored.get('combat_power') or 0)
+                    char_data['ProfileFetched'] = False
+                    rosters[name].append(char_data)
+                    self.skipped_profiles += 1
+                    if on_unit:
+                        on_unit('character', char_name, name, True, char_data)
+                    report(name, char_name)
+                    continue
+                pf = executor.submit(instrumentation.bind(self.get_character_profile), char_name, use_cache)
+                profile_futures[pf] = (name, char)
+
+        # 1. 원정대 목록 병렬 조회 (이미 받은 목록은 그대로 사용)
+        siblings_futures = {
+            executor.submit(instrumentation.bind(self.get_siblings), name, use_cache): name
+            for name in names if name not in known_siblings
+        }
+        for name in names:
+            if name in known_siblings:
+                queue_profiles(name, known_siblings[name])
+        for future in concurrent.futures.as_completed(siblings_futures):
+            name = siblings_futures[future]
+            char_list = future.result()
+            if on_unit:
+                on_unit('name', name, None, bool(char_list), char_list)
+            queue_profiles(name, char_list)
+
+        for future in concurrent.futures.as_completed(profile_futures):
+            name, char_basic = profile_futures[future]
+            profile_detail = future.result()
+            char_data = char_basic.copy()
+            char_data['CombatPower'] = self.parse_combat_power(profile_detail)
+            # 프로필을 못 받은 캐릭터는 표시해 둠 (전투력 0이 조용히 저장되지 않도록 호출부에서 확인)
+            char_data['ProfileFetched'] = profile_detail is not None
+            if profile_detail is None:
+                self.failed_profiles.append(char_basic['CharacterName'])
+            if on_unit:
+                on_unit('character', char_basic['CharacterName'], name, profile_detail is not None, char_data)
+            rosters[name].append(char_data)
+            report(name, char_basic['CharacterName'])
+
         # 3. 정렬 (전투력 높은 순)
-        enriched_data.sort(key=lambda x: int(x.get('CombatPower', 0)), reverse=True)
-        return enriched_data
\ No newline at end of file
+        for char_list in rosters.values():
+            char_list.sort(key=lambda x: int(x.get('CombatPower', 0)), reverse=True)
+        return rosters
@@ -0,0 +1,191 @@
+import os
+import threading
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from core.database import PostgresDB
+from core.loa_api import LostArkAPI
+from core.reset_calendar import KST_ZONE
+
+# ---------------------------------------------------------
+# Market Tracker - 거래소 시세 수집
+# ---------------------------------------------------------
+# 카테고리별로 거래소 검색 결과를 페이지 단위로 받아서
+# 1) market_items (아이템 정보), 2) market_prices (원본 시세), 3) market_ohlc (시간/일 봉)
+# 를 BATCH_SIZE개씩 한 트랜잭션으로 저장합니다. 봉은 수집할 때마다 GREATEST/LEAST로 증분 갱신하므로
+# 차트는 원본 시세를 훑지 않고 market_ohlc만 읽습니다.
+# 시각은 모두 TIMESTAMPTZ, 봉 경계는 KST 기준 (일봉 = KST 자정 ~ 다음 자정)
+
+# 수집할 거래소 카테고리 (50000: 강화 재료, 40000: 각인서)
+MARKET_CATEGORIES = [
+    int(code) for code in os.getenv("LOA_MARKET_CATEGORIES", "50000,40000").split(",") if code.strip()
+]
+# 한 번에 저장할 아이템 수
+BATCH_SIZE = int(os.getenv("LOA_MARKET_BATCH_SIZE", 500))
+# 자동 수집 주기 (분, 0이면 사용 안 함)
+POLL_MINUTES = float(os.getenv("LOA_MARKET_POLL_MINUTES", 0))
+LAST_POLL_KEY = "market_last_poll"
+
+# 여러 프로세스가 같은 주기에 동시에 수집하지 않도록 잡는 advisory lock 키
+MARKET_POLL_LOCK_ID = 70480003
+
+RESOLUTIONS = ("hour", "day")
+
+
+def _price(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def _write_batch(items, captured_at):
+    """아이템 배치 1개 저장 (아이템 정보 + 원본 시세 + 봉 갱신을 한 트랜잭션으로)"""
+    # 같은 배치 안에 같은 아이템이 두 번 들어오면 ON CONFLICT가 실패하므로 마지막 값만 사용
+    by_id = {item["Id"]: item for item in items if item.get("Id") is not None}
+    if not by_id:
+        return 0
+
+    item_rows, price_rows, ohlc_rows = [], [], []
+    for item_id, item in by_id.items():
+        item_rows.append((item_id, item.get("Name"), item.get("CategoryCode"), item.get("Grade"),
+                          item.get("BundleCount") or 1))
+        price = _price(item.get("CurrentMinPrice"))
+        price_rows.append((captured_at, item_id, price, _price(item.get("RecentPrice")), item.get("YDayAvgPrice")))
+        if price is not None:
+            for resolution in RESOLUTIONS:
+                ohlc_rows.append((resolution, item_id, resolution, captured_at, price, price, price, price,
+                                  captured_at, captured_at))
+
+    with PostgresDB(transaction=True) as cur:
+        execute_values(cur, """
+            INSERT INTO market_items (item_id, item_name, category_code, grade, bundle_count) VALUES %s
+            ON CONFLICT (item_id) DO UPDATE SET
+                item_name = EXCLUDED.item_name,
+                category_code = COALESCE(EXCLUDED.category_code, market_items.category_code),
+                grade = EXCLUDED.grade,
+                bundle_count = EXCLUDED.bundle_count,
+                updated_at = CURRENT_TIMESTAMP
+        """, item_rows, page_size=len(item_rows))
+        execute_values(cur, """
+            INSERT INTO market_prices (captured_at, item_id, current_min_price, recent_price, yday_avg_price)
+            VALUES %s
+        """, price_rows, page_size=len(price_rows))
+        if ohlc_rows:
+            execute_values(cur, """
+                INSERT INTO market_ohlc (resolution, item_id, bucket_start, open, high, low, close, open_at, close_at, samples)
+                VALUES %s
+                ON CONFLICT (resolution, item_id, bucket_start) DO UPDATE SET
+                    open = CASE WHEN EXCLUDED.open_at < market_ohlc.open_at THEN EXCLUDED.open ELSE market_ohlc.open END,
+                    close = CASE WHEN EXCLUDED.close_at >= market_ohlc.close_at THEN EXCLUDED.close ELSE market_ohlc.close END,
+                    high = GREATEST(market_ohlc.high, EXCLUDED.high),
+                    low = LEAST(market_ohlc.low, EXCLUDED.low),
+                    open_at = LEAST(market_ohlc.open_at, EXCLUDED.open_at),
+                    close_at = GREATEST(market_ohlc.close_at, EXCLUDED.close_at),
+                    samples = market_ohlc.samples + 1
+            """, ohlc_rows, template=f"(%s, %s, date_trunc(%s, %s::timestamptz, '{KST_ZONE}'), %s, %s, %s, %s, %s, %s, 1)",
+                page_size=len(ohlc_rows))
+    return len(by_id)
+
+
+def poll_market(api=None, categories=None, captured_at=None):
+    """
+    거래소 시세 1회 수집. 페이지가 도착하는 대로 버퍼에 모았다가 BATCH_SIZE개마다 저장합니다.
+    반환값: {items, pages, failed_pages, batches}
+    """
+    api = api or LostArkAPI()
+    captured_at = captured_at or datetime.now(timezone.utc)
+    summary = {"items": 0, "pages": 0, "failed_pages": 0, "batches": 0}
+
+    buffer = []
+    def flush():
+        if buffer:
+            summary["items"] += _write_batch(buffer, captured_at)
+            summary["batches"] += 1
+            buffer.clear()
+
+    for category_code in categories or MARKET_CATEGORIES:
+        for _, items in api.iter_market_pages(category_code):
+            if items is None:
+                summary["failed_pages"] += 1
+                continue
+            summary["pages"] += 1
+            for item in items:
+                item.setdefault("CategoryCode", category_code)
+            buffer.extend(items)
+            if len(buffer) >= BATCH_SIZE:
+                flush()
+    flush()
+    return summary
+
+# ---------------------------------------------------------
+# 조회
+# ---------------------------------------------------------
+def get_market_items(category_code=None):
+    with PostgresDB() as cur:
+        if category_code is None:
+            cur.execute("SELECT * FROM market_items ORDER BY category_code, item_name")
+        else:
+            cur.execute("SELECT * FROM market_items WHERE category_code = %s ORDER BY item_name", (category_code,))
+        return cur.fetchall()
+
+def get_price_series(item_id, resolution="hour", start=None, end=None):
+    """봉 데이터: [{bucket_start, open, high, low, close, samples}, ...] (시간순)"""
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"지원하지 않는 봉 단위: {resolution} (hour / day)")
+    sql = """
+        SELECT bucket_start, open, high, low, close, samples FROM market_ohlc
+        WHERE resolution = %s AND item_id = %s
+    """
+    params = [resolution, item_id]
+    if start is not None:
+        sql += " AND bucket_start >= %s"
+        params.append(start)
+    if end is not None:
+        sql += " AND bucket_start < %s"
+        params.append(end)
+    with PostgresDB() as cur:
+        cur.execute(sql + " ORDER BY bucket_start", params)
+        return cur.fetchall()
+
+# ---------------------------------------------------------
+# 자동 수집 (백그라운드 스레드)
+# ---------------------------------------------------------
+def _claim_poll():
+    """이번 주기 수집 권한 확보 (다른 프로세스가 이미 수집했거나 수집 중이면 False)"""
+    with PostgresDB(transaction=True) as cur:
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s) AS locked", (MARKET_POLL_LOCK_ID,))
+        if not cur.fetchone()['locked']:
+            return False
+        cur.execute("""
+            SELECT 1 FROM app_settings
+            WHERE key = %s AND updated_at > CURRENT_TIMESTAMP - %s * INTERVAL '1 minute'
+        """, (LAST_POLL_KEY, POLL_MINUTES))
+        if cur.fetchone():
+            return False
+        cur.execute("""
+            INSERT INTO app_settings (key, value) VALUES (%s, CURRENT_TIMESTAMP::text)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP
+        """, (LAST_POLL_KEY,))
+        return True
+
+_poller = None
+_poller_lock = threading.Lock()
+
+def _poller_loop():
+    stop = threading.Event()
+    while not stop.wait(30):
+        try:
+            if _claim_poll():
+                summary = poll_market()
+                print(f"📈 거래소 시세 수집: {summary}")
+        except Exception as e:
+            print(f"⚠️ 거래소 시세 수집 실패: {e}")
+
+def ensure_market_poller():
+    """LOA_MARKET_POLL_MINUTES가 설정돼 있으면 프로세스당 한 번 수집 스레드를 띄웁니다."""
+    global _poller
+    if POLL_MINUTES <= 0 or _poller is not None:
+        return
+    with _poller_lock:
+        if _poller is None:
+            _poller = threading.Thread(target=_poller_loop, name="loa-market", daemon=True)
+            _poller.start()
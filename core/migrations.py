@@ -0,0 +1,334 @@
+import threading
+from core.database import PostgresDB, SNAPSHOT_PARTITIONING
+
+# ---------------------------------------------------------
+# 스키마 마이그레이션
+# ---------------------------------------------------------
+# 번호를 붙인 마이그레이션을 순서대로 적용하고, 적용한 번호를 schema_version 테이블에 남깁니다.
+# - 프로세스당 한 번만 DB의 버전을 확인하고 캐시 (이후 세션은 DB를 보지 않음)
+# - 밀린 마이그레이션이 있을 때만 advisory lock을 잡고 적용 → 여러 세션/프로세스가 동시에 시작해도 한 번만 실행
+# - 각 마이그레이션은 여러 번 실행해도 안전하게 작성 (IF NOT EXISTS 등)
+#   → 이 시스템 이전에 만들어진 DB도 그대로 1번부터 적용되고, reset_db()는 지운 테이블을 다시 만들기 위해 전부 재적용
+# 스키마를 바꿀 때는 기존 항목을 고치지 말고 MIGRATIONS 끝에 새 번호를 추가합니다.
+
+MIGRATION_LOCK_ID = 70480004
+
+_migrate_lock = threading.Lock()
+_applied_version = None   # 이 프로세스에서 확인한 DB 스키마 버전
+
+
+def _create_snapshot_table(cur):
+    # LOA_SNAPSHOT_PARTITIONING=monthly면 월 단위 파티션 테이블 (이미 있으면 기존 형태 유지)
+    partition_clause = "PARTITION BY RANGE (captured_at)" if SNAPSHOT_PARTITIONING else ""
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS character_snapshots (
+        captured_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        character_name VARCHAR(50) NOT NULL,
+        account_name VARCHAR(50),
+        item_avg_level FLOAT,
+        combat_power INT
+    ) {partition_clause};
+    CREATE INDEX IF NOT EXISTS idx_character_snapshots_captured_at
+        ON character_snapshots USING BRIN (captured_at);
+    CREATE INDEX IF NOT EXISTS idx_character_snapshots_character
+        ON character_snapshots (character_name, captured_at);
+    """)
+
+def _snapshot_captured_at_tz(cur):
+    """
+    character_snapshots.captured_at을 TIMESTAMPTZ로 (기본값 CURRENT_TIMESTAMP가 세션 TimeZone으로 저장돼 있었음)
+    파티션 키는 타입을 바꿀 수 없으므로 파티션 테이블이면 파티션을 떼어 내 변환한 뒤 새 부모에 다시 붙임
+    """
+    cur.execute("""
+        SELECT c.relkind, a.atttypid = 'timestamptz'::regtype AS converted
+        FROM pg_class c JOIN pg_attribute a ON a.attrelid = c.oid AND a.attname = 'captured_at'
+        WHERE c.oid = to_regclass('character_snapshots')
+    """)
+    row = cur.fetchone()
+    if row is None or row['converted']:
+        return
+    to_tz = "TYPE TIMESTAMPTZ USING captured_at AT TIME ZONE current_setting('TimeZone')"
+    if row['relkind'] != 'p':
+        cur.execute(f"ALTER TABLE character_snapshots ALTER COLUMN captured_at {to_tz}")
+        return
+
+    cur.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'character_snapshots'::regclass
+    """)
+    partitions = cur.fetchall()
+    for p in partitions:
+        cur.execute(f"ALTER TABLE character_snapshots DETACH PARTITION {p['relname']}")
+        cur.execute(f"ALTER TABLE {p['relname']} ALTER COLUMN captured_at {to_tz}")
+    cur.execute("DROP TABLE character_snapshots")
+    cur.execute("""
+    CREATE TABLE character_snapshots (
+        captured_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        character_name VARCHAR(50) NOT NULL,
+        account_name VARCHAR(50),
+        item_avg_level FLOAT,
+        combat_power INT
+    ) PARTITION BY RANGE (captured_at);
+    CREATE INDEX idx_character_snapshots_captured_at
+        ON character_snapshots USING BRIN (captured_at);
+    CREATE INDEX idx_character_snapshots_character
+        ON character_snapshots (character_name, captured_at);
+    """)
+    # 파티션 경계('2026-10-01 00:00:00')는 세션 TimeZone 기준으로 다시 해석 → 변환한 값과 같은 기준
+    for p in partitions:
+        cur.execute(f"ALTER TABLE character_snapshots ATTACH PARTITION {p['relname']} {p['bound']}")
+
+
+# [(버전, 설명, SQL 문자열 또는 cur를 받는 함수)]
+MIGRATIONS = [
+    (1, "기본 테이블 (캐릭터 / 숙제 / 원정대 숙제 / 설정)", """
+    CREATE TABLE IF NOT EXISTS characters (
+        character_name VARCHAR(50) PRIMARY KEY,
+        server_name VARCHAR(20),
+        character_class VARCHAR(20),
+        item_avg_level FLOAT,
+        combat_power INT,
+        week_gold_spent INT DEFAULT 0,
+        memo TEXT DEFAULT '',
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        profile_fetched_at TIMESTAMP,
+        raid_fingerprint VARCHAR(40),
+        account_name VARCHAR(50)
+    );
+    -- 예전 init_db로 만든 DB에는 나중에 추가된 컬럼이 없으므로 보강
+    ALTER TABLE characters ADD COLUMN IF NOT EXISTS profile_fetched_at TIMESTAMP;
+    ALTER TABLE characters ADD COLUMN IF NOT EXISTS raid_fingerprint VARCHAR(40);
+    ALTER TABLE characters ADD COLUMN IF NOT EXISTS account_name VARCHAR(50);
+
+    CREATE TABLE IF NOT EXISTS todos (
+        id SERIAL PRIMARY KEY,
+        character_name VARCHAR(50) NOT NULL,
+        game_name VARCHAR(20) DEFAULT 'LostArk',
+        task_name VARCHAR(100) NOT NULL,
+        category VARCHAR(20) DEFAULT '일일',
+        current_count INT DEFAULT 0,
+        total_count INT DEFAULT 1,
+        reset_cycle VARCHAR(20) DEFAULT 'DAILY',
+        gold_reward INT DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT fk_character FOREIGN KEY(character_name) REFERENCES characters(character_name) ON DELETE CASCADE,
+        CONSTRAINT unique_task_per_char UNIQUE (character_name, task_name)
+    );
+
+    -- 원정대 커스텀 숙제
+    -- reset_type: 'DAILY', 'WEEKLY', 'INTERVAL'(N일 간격) / reset_value: INTERVAL일 때 며칠 간격인지
+    CREATE TABLE IF NOT EXISTS expedition_tasks (
+        id SERIAL PRIMARY KEY,
+        task_name VARCHAR(100) NOT NULL UNIQUE,
+        is_checked BOOLEAN DEFAULT FALSE,
+        reset_type VARCHAR(20) DEFAULT 'WEEKLY',
+        reset_value INT DEFAULT 1,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS app_settings (
+        key VARCHAR(50) PRIMARY KEY,
+        value TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """),
+
+    (2, "백그라운드 동기화 작업 / 체크포인트", """
+    -- status: 'queued' → 'running' → 'done' / 'failed'
+    CREATE TABLE IF NOT EXISTS sync_jobs (
+        id SERIAL PRIMARY KEY,
+        names TEXT NOT NULL,
+        source VARCHAR(20) DEFAULT 'manual',
+        force_refresh BOOLEAN DEFAULT FALSE,
+        status VARCHAR(20) DEFAULT 'queued',
+        total_names INT DEFAULT 0,
+        done_names INT DEFAULT 0,
+        total_characters INT DEFAULT 0,
+        done_characters INT DEFAULT 0,
+        current_step TEXT DEFAULT '',
+        message TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP,
+        heartbeat_at TIMESTAMP
+    );
+    ALTER TABLE sync_jobs ADD COLUMN IF NOT EXISTS resume_of INT;
+
+    -- 원정대(name) / 캐릭터(character) 단위 진행 상태
+    -- status: pending → fetched(조회 완료, payload에 결과) → written(DB 저장 완료) / failed
+    CREATE TABLE IF NOT EXISTS sync_checkpoints (
+        job_id INT NOT NULL REFERENCES sync_jobs(id) ON DELETE CASCADE,
+        unit_type VARCHAR(10) NOT NULL,
+        unit_key VARCHAR(50) NOT NULL,
+        parent_name VARCHAR(50),
+        status VARCHAR(10) DEFAULT 'pending',
+        attempts INT DEFAULT 0,
+        error TEXT DEFAULT '',
+        payload JSONB,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (job_id, unit_type, unit_key)
+    );
+    """),
+
+    (3, "성장 기록 스냅샷 (character_snapshots)", _create_snapshot_table),
+
+    (4, "거래소 시세 (원본 + OHLC)", """
+    -- market_prices: 수집할 때마다 추가되는 원본 시세 (시간 범위 조회용 BRIN 인덱스)
+    -- market_ohlc: 시간/일 단위 시가·고가·저가·종가 (수집하면서 증분 갱신)
+    CREATE TABLE IF NOT EXISTS market_items (
+        item_id BIGINT PRIMARY KEY,
+        item_name VARCHAR(100) NOT NULL,
+        category_code INT,
+        grade VARCHAR(20),
+        bundle_count INT DEFAULT 1,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS market_prices (
+        captured_at TIMESTAMP NOT NULL,
+        item_id BIGINT NOT NULL,
+        current_min_price INT,
+        recent_price INT,
+        yday_avg_price FLOAT
+    );
+    CREATE INDEX IF NOT EXISTS idx_market_prices_captured_at ON market_prices USING BRIN (captured_at);
+    CREATE TABLE IF NOT EXISTS market_ohlc (
+        resolution VARCHAR(10) NOT NULL,
+        item_id BIGINT NOT NULL,
+        bucket_start TIMESTAMP NOT NULL,
+        open INT, high INT, low INT, close INT,
+        open_at TIMESTAMP NOT NULL,
+        close_at TIMESTAMP NOT NULL,
+        samples INT DEFAULT 0,
+        PRIMARY KEY (resolution, item_id, bucket_start)
+    );
+    """),
+
+    (5, "주간 수익 집계 (weekly_income)", """
+    -- week_start: 수요일 06:00 (주간 리셋 경계), net = 실제 수익 - 사용 골드
+    CREATE TABLE IF NOT EXISTS weekly_income (
+        week_start TIMESTAMP NOT NULL,
+        character_name VARCHAR(50) NOT NULL,
+        account_name VARCHAR(50),
+        planned_gold INT DEFAULT 0,
+        realized_gold INT DEFAULT 0,
+        spent_gold INT DEFAULT 0,
+        net_gold INT GENERATED ALWAYS AS (realized_gold - spent_gold) STORED,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (week_start, character_name)
+    );
+    """),
+
+    (6, "자주 쓰는 조회용 인덱스 (리셋 패스 / 주간 레이드 / 원정대 숙제 / 작업 대기열)", """
+    -- 리셋 패스: category = ? AND current_count > 0 AND updated_at < 경계
+    -- 완료된 행만 담는 부분 인덱스 → 리셋 직후에는 거의 비어 있고, 리셋할 행만 바로 찾음
+    CREATE INDEX IF NOT EXISTS idx_todos_done_by_category
+        ON todos (category, updated_at) WHERE current_count > 0;
+    -- 캐릭터별 주간 레이드 갱신(DELETE), 주간 수익 집계의 todos 조인: character_name + category
+    CREATE INDEX IF NOT EXISTS idx_todos_character_category
+        ON todos (character_name, category);
+    -- 원정대 숙제 리셋 / N일 간격 워터마크: 체크된 숙제만 (is_checked = TRUE)
+    CREATE INDEX IF NOT EXISTS idx_expedition_tasks_checked
+        ON expedition_tasks (reset_type, updated_at) WHERE is_checked;
+    -- 동기화 워커가 주기적으로 보는 대기/실행 중 작업 (끝난 작업이 쌓여도 작게 유지)
+    CREATE INDEX IF NOT EXISTS idx_sync_jobs_active
+        ON sync_jobs (id) WHERE status IN ('queued', 'running');
+    """),
+
+    (7, "주간 수익 집계 week_start를 TIMESTAMPTZ로", """
+    -- KST 시각(수요일 06:00)을 타임존 없는 컬럼에 넣으면 세션 TimeZone(예: UTC)으로 바뀌어 화요일 21:00로 저장됨
+    -- 기존 값은 세션 TimeZone 기준으로 저장된 것이므로 같은 기준으로 해석해 원래 시각을 복원
+    -- (이미 TIMESTAMPTZ면 같은 값으로 다시 변환되므로 재적용해도 안전)
+    ALTER TABLE weekly_income ALTER COLUMN week_start TYPE TIMESTAMPTZ
+        USING week_start AT TIME ZONE current_setting('TimeZone');
+    """),
+
+    (8, "성장 기록 captured_at을 TIMESTAMPTZ로", _snapshot_captured_at_tz),
+
+    (9, "거래소 시세 시각을 TIMESTAMPTZ로, 일봉은 KST 하루 기준으로 다시 집계", """
+    -- 기존 값은 앱 서버의 로컬 시각(datetime.now())으로 저장됨 → 세션 TimeZone 기준으로 해석
+    -- (이미 TIMESTAMPTZ면 같은 값으로 다시 변환되므로 재적용해도 안전)
+    ALTER TABLE market_prices ALTER COLUMN captured_at TYPE TIMESTAMPTZ
+        USING captured_at AT TIME ZONE current_setting('TimeZone');
+    ALTER TABLE market_ohlc
+        ALTER COLUMN bucket_start TYPE TIMESTAMPTZ USING bucket_start AT TIME ZONE current_setting('TimeZone'),
+        ALTER COLUMN open_at TYPE TIMESTAMPTZ USING open_at AT TIME ZONE current_setting('TimeZone'),
+        ALTER COLUMN close_at TYPE TIMESTAMPTZ USING close_at AT TIME ZONE current_setting('TimeZone');
+    -- 일봉 경계를 KST 자정으로: 원본 시세에서 다시 계산
+    DELETE FROM market_ohlc WHERE resolution = 'day';
+    INSERT INTO market_ohlc (resolution, item_id, bucket_start, open, high, low, close, open_at, close_at, samples)
+    SELECT 'day', item_id, date_trunc('day', captured_at, 'Asia/Seoul'),
+           (array_agg(current_min_price ORDER BY captured_at))[1],
+           MAX(current_min_price), MIN(current_min_price),
+           (array_agg(current_min_price ORDER BY captured_at DESC))[1],
+           MIN(captured_at), MAX(captured_at), COUNT(*)
+    FROM market_prices
+    WHERE current_min_price IS NOT NULL
+    GROUP BY item_id, date_trunc('day', captured_at, 'Asia/Seoul');
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def _read_version(cur):
+    """DB에 적용된 마지막 버전 (schema_version 테이블이 없으면 0)"""
+    cur.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+    if not cur.fetchone()['present']:
+        return 0
+    # PRIMARY KEY 인덱스 역순으로 한 행만 읽음
+    cur.execute("SELECT version FROM schema_version ORDER BY version DESC LIMIT 1")
+    row = cur.fetchone()
+    return row['version'] if row else 0
+
+def migrate(reapply=False):
+    """
+    밀린 마이그레이션을 적용하고 적용한 버전 목록을 돌려줍니다. (이미 최신이면 [])
+    reapply=True: 기록을 지우고 1번부터 다시 적용 (reset_db로 지운 테이블 재생성)
+    전체를 한 트랜잭션으로 실행하므로 중간에 실패하면 아무것도 바뀌지 않습니다.
+    """
+    global _applied_version
+    if _applied_version is not None and _applied_version >= LATEST_VERSION and not reapply:
+        return []
+    with _migrate_lock:
+        if _applied_version is not None and _applied_version >= LATEST_VERSION and not reapply:
+            return []
+        applied = []
+        with PostgresDB(transaction=True) as cur:
+            current = 0 if reapply else _read_version(cur)
+            if current < LATEST_VERSION:
+                # 다른 세션/프로세스가 먼저 적용했을 수 있으므로 락을 잡은 뒤 다시 확인
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INT PRIMARY KEY,
+                        description TEXT,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                if reapply:
+                    cur.execute("DELETE FROM schema_version")
+                current = _read_version(cur)
+                for version, description, step in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    if callable(step):
+                        step(cur)
+                    else:
+                        cur.execute(step)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                        (version, description),
+                    )
+                    applied.append((version, description))
+                    current = version
+        if current > LATEST_VERSION:
+            # 더 새 코드가 올린 DB: 이 프로세스가 모르는 마이그레이션이 있음 (적용할 것은 없음)
+            print(f"⚠️ DB 스키마 버전({current})이 코드({LATEST_VERSION})보다 높습니다.")
+        _applied_version = current
+        for version, description in applied:
+            print(f"🧱 마이그레이션 {version} 적용: {description}")
+        return [version for version, _ in applied]
+
+def get_schema_version():
+    """이 프로세스에서 확인한 스키마 버전 (아직 확인 전이면 None)"""
+    return _applied_version
@@ -0,0 +1,96 @@
+import time
+import random
+import threading
+
+# ---------------------------------------------------------
+# Lost Ark Open API 요청 속도 제한 (토큰 버킷)
+# ---------------------------------------------------------
+# API 키 하나당 분당 요청 수가 제한되므로, 요청을 실패시키는 대신 토큰이 찰 때까지
+# 대기(큐잉)시킵니다. 응답 헤더(X-RateLimit-*)를 읽어 서버 기준으로 버킷을 보정합니다.
+
+class TokenBucket:
+    def __init__(self, limit_per_minute=100, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._set_limit(limit_per_minute)
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._blocked_until = 0.0   # 429 / Remaining=0 이후 서버가 풀어줄 때까지 전체 대기
+
+    def _set_limit(self, limit_per_minute):
+        self.capacity = max(1, int(limit_per_minute))
+        self.rate = self.capacity / 60.0   # 초당 충전되는 토큰 수
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        """토큰 1개를 가져갑니다. 토큰이 없으면 생길 때까지 기다리고, 기다린 시간(초)을 반환합니다."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+    def update_from_headers(self, headers):
+        """응답의 X-RateLimit-Limit / Remaining / Reset 헤더로 버킷 상태를 서버와 맞춥니다."""
+        limit = _header_int(headers, "X-RateLimit-Limit")
+        remaining = _header_int(headers, "X-RateLimit-Remaining")
+        reset = _header_int(headers, "X-RateLimit-Reset")
+
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if limit and limit != self.capacity:
+                self._set_limit(limit)
+                self._tokens = min(self._tokens, self.capacity)
+            if remaining is not None:
+                # 서버가 남았다고 한 것보다 더 많이 쓰지 않도록 (다른 프로세스가 같은 키를 쓸 수도 있음)
+                self._tokens = min(self._tokens, float(remaining))
+                if remaining <= 0 and reset:
+                    self._blocked_until = max(self._blocked_until, now + max(0.0, reset - time.time()))
+
+    def penalize(self, retry_after):
+        """429 응답 시 Retry-After 동안 모든 요청을 멈춥니다."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = 0.0
+            self._updated = now
+            self._blocked_until = max(self._blocked_until, now + max(0.0, retry_after))
+
+
+def _header_int(headers, name):
+    value = headers.get(name) if headers else None
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+def retry_after_seconds(headers, default=1.0):
+    """Retry-After 헤더(초) 또는 X-RateLimit-Reset(epoch)으로 대기 시간을 계산합니다."""
+    retry_after = _header_int(headers, "Retry-After")
+    if retry_after is not None:
+        return float(retry_after)
+    reset = _header_int(headers, "X-RateLimit-Reset")
+    if reset:
+        return max(0.0, reset - time.time())
+    return default
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """지수 백오프 + full jitter: 0 ~ min(cap, base * 2^attempt) 사이 임의 값"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,107 @@
+import bisect
+import functools
+from datetime import date, datetime, time, timedelta, timezone
+
+# ---------------------------------------------------------
+# 리셋 달력
+# ---------------------------------------------------------
+# 일일(매일 06:00) / 주간(수요일 06:00) 리셋 경계를 계산합니다. (DB / Streamlit 의존성 없음)
+# 시각 인자는 다른 시간대여도 KST로 바꿔서 계산 (타임존 없는 값은 KST로 간주)
+# 경계 목록은 연도별로 한 번만 만들어 캐시하고, 구간 조회는 이진 탐색으로 잘라 씁니다.
+# → 몇 년짜리 구간도 매번 날짜를 하나씩 세지 않음
+
+KST = timezone(timedelta(hours=9))
+KST_ZONE = "Asia/Seoul"   # SQL에서 같은 시간대를 쓸 때 (AT TIME ZONE)
+RESET_TIME = time(6, 0)
+WEEKLY_RESET_WEEKDAY = 2   # 수요일
+
+DAILY = "daily"
+WEEKLY = "weekly"
+
+
+def _now(now):
+    if now is None:
+        return datetime.now(KST)
+    return now.astimezone(KST) if now.tzinfo is not None else now
+
+def last_daily_reset(now=None):
+    """now 이전(포함) 가장 최근 일일 리셋 시각"""
+    now = _now(now)
+    today_reset = now.replace(hour=RESET_TIME.hour, minute=0, second=0, microsecond=0)
+    return today_reset if now >= today_reset else today_reset - timedelta(days=1)
+
+def last_weekly_reset(now=None):
+    """now 이전(포함) 가장 최근 주간 리셋 시각 (수요일 06:00)"""
+    now = _now(now)
+    today_reset = now.replace(hour=RESET_TIME.hour, minute=0, second=0, microsecond=0)
+    days_since = (now.weekday() - WEEKLY_RESET_WEEKDAY) % 7
+    if days_since == 0 and now < today_reset:
+        days_since = 7
+    return today_reset - timedelta(days=days_since)
+
+@functools.lru_cache(maxsize=64)
+def _year_table(kind, year):
+    """해당 연도(KST)의 리셋 경계 목록 (정렬된 tuple)"""
+    day = date(year, 1, 1)
+    if kind == WEEKLY:
+        day += timedelta(days=(WEEKLY_RESET_WEEKDAY - day.weekday()) % 7)
+    step = timedelta(days=7 if kind == WEEKLY else 1)
+    table = []
+    while day.year == year:
+        table.append(datetime.combine(day, RESET_TIME, tzinfo=KST))
+        day += step
+    return tuple(table)
+
+def boundaries(kind, start, end):
+    """start < 경계 <= end 인 리셋 시각 목록 (kind: DAILY / WEEKLY)"""
+    if kind not in (DAILY, WEEKLY):
+        raise ValueError(f"지원하지 않는 리셋 종류: {kind}")
+    start, end = start.astimezone(KST), end.astimezone(KST)
+    result = []
+    for year in range(start.year, end.year + 1):
+        table = _year_table(kind, year)
+        lo = bisect.bisect_right(table, start)
+        hi = bisect.bisect_right(table, end)
+        result.extend(table[lo:hi])
+    return result
+
+def target_instant(target_date):
+    """목표일 → 그날 일일 리셋 시각 (목표일 06:00 전까지 한 숙제만 수익으로 침)"""
+    return datetime.combine(target_date, RESET_TIME, tzinfo=KST)
+
+# ---------------------------------------------------------
+# 수익 예측
+# ---------------------------------------------------------
+def project_income(income_rows, target, now=None):
+    """
+    목표 시각까지 원정대 전체의 주간 숙제 수익 예측.
+    income_rows: 이번 주 weekly_income 행 (character_name, planned_gold, realized_gold)
+    target: datetime(목표 시각) 또는 date(목표일 → 그날 06:00)
+    - 이번 주: 아직 안 끝낸 숙제만 (예상 - 획득)
+    - 이후: 목표 시각 전에 오는 주간 리셋마다 한 주치 예상 수익
+    """
+    now = _now(now)
+    if not isinstance(target, datetime):
+        target = target_instant(target)
+
+    week_starts = boundaries(WEEKLY, now, target - timedelta(microseconds=1)) if target > now else []
+    weeks_left = len(week_starts)
+    per_character = {}
+    weekly_income = remaining_this_week = 0
+    for r in income_rows:
+        planned = r['planned_gold'] or 0
+        remaining = max(planned - (r['realized_gold'] or 0), 0) if target > now else 0
+        per_character[r['character_name']] = remaining + planned * weeks_left
+        weekly_income += planned
+        remaining_this_week += remaining
+
+    return {
+        "target": target,
+        "weeks_left": weeks_left,
+        "weekly_income": weekly_income,
+        "remaining_this_week": remaining_this_week,
+        "total": sum(per_character.values()),
+        "per_character": per_character,
+        # 차트용: [(주 시작 시각, 그 주 수익)] - 첫 항목은 이번 주 남은 수익
+        "by_week": [(last_weekly_reset(now), remaining_this_week)] + [(b, weekly_income) for b in week_starts],
+    }
@@ -1,84 +1,195 @@
-from datetime import datetime, timedelta, timezone
-from core.database import PostgresDB
+import os
+from datetime import datetime
+from core.reset_calendar import KST, last_daily_reset, last_weekly_reset
+from core.database import (
+    PostgresDB, bump_data_version, refresh_weekly_income,
+    RESET_BOUNDARY_KEY, RESET_INTERVAL_DUE_KEY
+)
 
-KST = timezone(timedelta(hours=9))
+# 리셋 방식
+# - eager: 리셋 시각이 지나면 DB의 current_count / is_checked를 실제로 0/FALSE로 되돌림 (기존 방식)
+# - lazy : DB는 그대로 두고, 읽을 때 '마지막 수행 시각(updated_at)이 이번 주기 안인지'로 완료 여부 계산
+RESET_MODE = os.getenv("LOA_RESET_MODE", "eager").lower()
 
-def get_last_reset_times():
-    """기존 리셋 기준 시간 계산 (일일/주간)"""
-    now = datetime.now(KST)
-    today_6am = now.replace(hour=6, minute=0, second=0, microsecond=0)
-    
-    # 1. 일일 리셋 (매일 06:00)
-    if now < today_6am:
-        last_daily_reset = today_6am - timedelta(days=1)
-    else:
-        last_daily_reset = today_6am
-        
-    # 2. 주간 리셋 (수요일 06:00)
-    days_since_wed = (now.weekday() - 2) % 7
-    if days_since_wed == 0 and now < today_6am:
-        days_since_wed = 7
-    last_weekly_reset_day = now - timedelta(days=days_since_wed)
-    last_weekly_reset = last_weekly_reset_day.replace(hour=6, minute=0, second=0, microsecond=0)
-    
-    return last_daily_reset, last_weekly_reset
+def is_lazy_reset():
+    return RESET_MODE == "lazy"
+
+def get_last_reset_times(now=None):
+    """기존 리셋 기준 시간 계산 (일일/주간) - 경계 계산은 core.reset_calendar"""
+    if now is None:
+        now = datetime.now(KST)
+    return last_daily_reset(now), last_weekly_reset(now)
+
+# 동시에 여러 세션이 06:00에 리셋을 돌리지 않도록 잡는 advisory lock 키
+RESET_LOCK_ID = 70480001
+
+# 리셋 패스 SQL (bench.query_plans도 같은 문장으로 인덱스 사용 여부를 검사)
+DAILY_RESET_SQL = "UPDATE todos SET current_count = 0 WHERE category = '일일' AND current_count > 0 AND updated_at < %s;"
+WEEKLY_RESET_SQL = "UPDATE todos SET current_count = 0 WHERE category = '주간' AND current_count > 0 AND updated_at < %s;"
+
+# 원정대 숙제 맞춤형 리셋 (규칙별 CASE로 한 번에 처리)
+# - DAILY: 마지막 수행 시간이 '오늘 오전 6시' 이전이면 리셋
+# - WEEKLY: 마지막 수행 시간이 '이번주 수요일 6시' 이전이면 리셋
+# - INTERVAL: 수행한지 N일(reset_value)이 지났으면 리셋 (단순 시간 차이)
+EXPEDITION_RESET_SQL = """
+    UPDATE expedition_tasks SET is_checked = FALSE
+    WHERE is_checked = TRUE
+      AND CASE reset_type
+            WHEN 'DAILY' THEN updated_at < %(last_daily)s
+            WHEN 'WEEKLY' THEN updated_at < %(last_weekly)s
+            WHEN 'INTERVAL' THEN updated_at <= %(now)s - reset_value * INTERVAL '1 day'
+            ELSE FALSE
+          END;
+"""
+
+# 남아 있는 N일 간격 숙제 중 가장 먼저 리셋될 시각
+INTERVAL_DUE_SQL = """
+    SELECT MIN(updated_at + reset_value * INTERVAL '1 day') AS next_due
+    FROM expedition_tasks
+    WHERE is_checked = TRUE AND reset_type = 'INTERVAL'
+"""
+
+def _parse_kst(value):
+    try:
+        return datetime.fromisoformat(value).astimezone(KST)
+    except (TypeError, ValueError):
+        return None
+
+def _needs_reset_pass(cur, last_daily, now):
+    """
+    워터마크 확인: 이번 일일 경계를 이미 처리했고 N일 간격 숙제도 아직 리셋 시각 전이면
+    리셋 패스를 통째로 건너뜁니다. (app_settings PK 조회 1번)
+    """
+    cur.execute("SELECT key, value FROM app_settings WHERE key IN (%s, %s)",
+                (RESET_BOUNDARY_KEY, RESET_INTERVAL_DUE_KEY))
+    marks = {r['key']: r['value'] for r in cur.fetchall()}
+
+    boundary = _parse_kst(marks.get(RESET_BOUNDARY_KEY))
+    if boundary is None or boundary < last_daily:
+        return True
+
+    interval_due = marks.get(RESET_INTERVAL_DUE_KEY)
+    if interval_due is None:
+        return True
+    if interval_due == 'none':
+        return False
+    due = _parse_kst(interval_due)
+    return due is None or now >= due
+
+def _save_watermark(cur, last_daily):
+    cur.execute(INTERVAL_DUE_SQL)
+    next_due = cur.fetchone()['next_due']
+    interval_due = next_due.astimezone(KST).isoformat() if next_due else 'none'
+
+    cur.execute("""
+        INSERT INTO app_settings (key, value) VALUES (%s, %s), (%s, %s)
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP
+    """, (RESET_BOUNDARY_KEY, last_daily.isoformat(), RESET_INTERVAL_DUE_KEY, interval_due))
 
+# ---------------------------------------------------------
+# 지연(lazy) 리셋: 읽는 시점에 '이번 주기에 완료했는지' 계산 (쓰기 없음)
+# ---------------------------------------------------------
+def _as_kst(value):
+    # DB TIMESTAMP(타임존 없음)는 기존 로직과 같게 로컬 시간으로 보고 KST로 변환
+    return value.astimezone(KST)
+
+def is_todo_current(todo, last_daily, last_weekly):
+    """캐릭터 숙제의 진행 기록이 이번 주기 것인지 (eager 리셋의 UPDATE 조건과 동일)"""
+    if todo['category'] == '일일':
+        return _as_kst(todo['updated_at']) >= last_daily
+    if todo['category'] == '주간':
+        return _as_kst(todo['updated_at']) >= last_weekly
+    return True
+
+def is_expedition_task_current(task, last_daily, last_weekly, now):
+    """원정대 숙제 체크가 아직 유효한지 (eager 리셋의 CASE 조건과 동일)"""
+    updated_at = _as_kst(task['updated_at'])
+    if task['reset_type'] == 'DAILY':
+        return updated_at >= last_daily
+    if task['reset_type'] == 'WEEKLY':
+        return updated_at >= last_weekly
+    if task['reset_type'] == 'INTERVAL':
+        return (now - updated_at).days < task['reset_value']
+    return True
+
+def effective_todos(todos, now=None):
+    """
+    화면에 쓸 숙제 목록. lazy 모드면 지난 주기의 진행 기록을 0으로 본 복사본을,
+    eager 모드면 (DB가 이미 리셋되어 있으므로) 원본 그대로 돌려줍니다.
+    """
+    if not is_lazy_reset():
+        return todos
+    last_daily, last_weekly = get_last_reset_times(now)
+    result = []
+    for t in todos:
+        if t['current_count'] > 0 and not is_todo_current(t, last_daily, last_weekly):
+            t = dict(t, current_count=0)
+        result.append(t)
+    return result
+
+def effective_expedition_tasks(tasks, now=None):
+    """원정대 숙제 목록에 lazy 리셋 적용 (eager 모드면 그대로)"""
+    if not is_lazy_reset():
+        return tasks
+    now = now or datetime.now(KST)
+    last_daily, last_weekly = get_last_reset_times(now)
+    result = []
+    for t in tasks:
+        if t['is_checked'] and not is_expedition_task_current(t, last_daily, last_weekly, now):
+            t = dict(t, is_checked=False)
+        result.append(t)
+    return result
+
+def current_reset_epoch(now=None):
+    """완료 여부 계산 결과가 바뀌는 기준 (일일 경계 - 주간 경계도 항상 일일 경계와 겹침)"""
+    return get_last_reset_times(now)[0]
+
+# ---------------------------------------------------------
+# 즉시(eager) 리셋 패스
+# ---------------------------------------------------------
 def check_and_reset_tasks():
-    last_daily, last_weekly = get_last_reset_times()
     reset_log = []
+    if is_lazy_reset():
+        # lazy 모드는 읽을 때 계산하므로 리셋 시점에 쓰기가 전혀 없음
+        return reset_log
+
+    last_daily, last_weekly = get_last_reset_times()
+    now = datetime.now(KST)
     
     try:
-        with PostgresDB() as cur:
+        with PostgresDB(transaction=True) as cur:
+            if not _needs_reset_pass(cur, last_daily, now):
+                return reset_log
+
+            # 다른 세션이 먼저 리셋 중이면 끝날 때까지 기다린 뒤 워터마크를 다시 확인
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (RESET_LOCK_ID,))
+            if not _needs_reset_pass(cur, last_daily, now):
+                return reset_log
+
             # -------------------------------------------------
             # 1. 캐릭터 숙제 리셋 (기존 로직)
             # -------------------------------------------------
-            daily_sql = "UPDATE todos SET current_count = 0 WHERE category = '일일' AND current_count > 0 AND updated_at < %s;"
-            cur.execute(daily_sql, (last_daily,))
+            cur.execute(DAILY_RESET_SQL, (last_daily,))
             if cur.rowcount > 0: reset_log.append(f"🌞 일일 숙제 {cur.rowcount}건 초기화")
             
-            weekly_sql = "UPDATE todos SET current_count = 0 WHERE category = '주간' AND current_count > 0 AND updated_at < %s;"
-            cur.execute(weekly_sql, (last_weekly,))
+            cur.execute(WEEKLY_RESET_SQL, (last_weekly,))
             if cur.rowcount > 0: reset_log.append(f"📅 주간 숙제 {cur.rowcount}건 초기화")
 
             # -------------------------------------------------
-            # 2. [NEW] 원정대 숙제 맞춤형 리셋
+            # 2. 원정대 숙제 맞춤형 리셋 (EXPEDITION_RESET_SQL)
             # -------------------------------------------------
-            cur.execute("SELECT id, task_name, reset_type, reset_value, updated_at FROM expedition_tasks WHERE is_checked = TRUE")
-            tasks = cur.fetchall()
-            
-            exp_reset_count = 0
-            for t in tasks:
-                should_reset = False
-                updated_at = t['updated_at'].astimezone(KST) # DB 시간 -> KST 변환
-                
-                if t['reset_type'] == 'DAILY':
-                    # 마지막 수행 시간이 '오늘 오전 6시' 이전이면 리셋
-                    if updated_at < last_daily:
-                        should_reset = True
-                        
-                elif t['reset_type'] == 'WEEKLY':
-                    # 마지막 수행 시간이 '이번주 수요일 6시' 이전이면 리셋
-                    if updated_at < last_weekly:
-                        should_reset = True
-                        
-                elif t['reset_type'] == 'INTERVAL':
-                    # N일 간격 (예: 2일)
-                    # 수행한지 N일이 지났는지 체크 (단순히 시간 차이로 계산)
-                    # 로아 스타일: 수행일로부터 N일 뒤 오전 6시에 리셋? 
-                    # 사용자 요청: "2일에 한번" -> 수행 후 48시간 or D+2일
-                    # 여기선 심플하게: (현재시간 - 수행시간).days >= N 이면 리셋
-                    diff = datetime.now(KST) - updated_at
-                    if diff.days >= t['reset_value']:
-                        should_reset = True
-                
-                if should_reset:
-                    cur.execute("UPDATE expedition_tasks SET is_checked = FALSE WHERE id = %s", (t['id'],))
-                    exp_reset_count += 1
-            
-            if exp_reset_count > 0:
-                reset_log.append(f"🏰 원정대 숙제 {exp_reset_count}건 초기화")
+            cur.execute(EXPEDITION_RESET_SQL, {"last_daily": last_daily, "last_weekly": last_weekly, "now": now})
+            if cur.rowcount > 0:
+                reset_log.append(f"🏰 원정대 숙제 {cur.rowcount}건 초기화")
+
+            _save_watermark(cur, last_daily)
+
+        # 커밋 후 읽기 캐시 무효화 (초기화된 숙제/워터마크 반영)
+        bump_data_version()
+        # 새 주가 시작됐으면 이번 주 수익 집계 행 생성 (지난 주 행은 기록으로 남음)
+        refresh_weekly_income()
 
     except Exception as e:
         print(f"리셋 검사 중 오류: {e}")
         
-    return reset_log
\ No newline at end of file
+    return reset_log
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# ---------------------------------------------------------
+# API 응답 디스크 캐시 (SQLite)
+# ---------------------------------------------------------
+# 같은 원정대를 하루에도 여러 번 동기화하므로, 동일한 프로필 JSON을 매번 다시 받지 않도록
+# (엔드포인트, 캐릭터 이름) 단위로 응답을 저장합니다.
+# - 엔드포인트별 TTL, 최대 항목 수(LRU 방식으로 오래 안 쓴 것부터 삭제)
+# - 적중/미스 횟수 집계
+
+DEFAULT_TTLS = {
+    "siblings": float(os.getenv("LOA_CACHE_TTL_SIBLINGS", 600)),
+    "profiles": float(os.getenv("LOA_CACHE_TTL_PROFILES", 3600)),
+}
+
+
+class ResponseCache:
+    def __init__(self, path, ttls=None, max_entries=5000, clock=time.time):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                endpoint TEXT NOT NULL,
+                key TEXT NOT NULL,
+                body TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (endpoint, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+
+    def get(self, endpoint, key):
+        """캐시된 응답(JSON 파싱된 값)을 돌려줍니다. 없거나 TTL이 지났으면 None"""
+        now = self._clock()
+        ttl = self.ttls.get(endpoint, 0)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, stored_at FROM responses WHERE endpoint = ? AND key = ?", (endpoint, key)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            body, stored_at = row
+            if now - stored_at > ttl:
+                self._conn.execute("DELETE FROM responses WHERE endpoint = ? AND key = ?", (endpoint, key))
+                self._stats["misses"] += 1
+                self._stats["expired"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE endpoint = ? AND key = ?", (now, endpoint, key)
+            )
+            self._stats["hits"] += 1
+        return json.loads(body)
+
+    def put(self, endpoint, key, value):
+        now = self._clock()
+        body = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO responses (endpoint, key, body, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (endpoint, key) DO UPDATE SET
+                    body = excluded.body, stored_at = excluded.stored_at, accessed_at = excluded.accessed_at
+            """, (endpoint, key, body, now, now))
+            self._stats["stores"] += 1
+            self._puts_since_evict += 1
+            # 매번 COUNT 하지 않고 일정 횟수마다 정리
+            if self._puts_since_evict >= max(1, self.max_entries // 20):
+                self._evict()
+
+    def _evict(self):
+        self._puts_since_evict = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute("""
+                DELETE FROM responses WHERE rowid IN (
+                    SELECT rowid FROM responses ORDER BY accessed_at ASC LIMIT ?
+                )
+            """, (overflow,))
+            self._stats["evictions"] += overflow
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            (snapshot["entries"],) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """프로세스 공용 캐시. LOA_CACHE_PATH가 'off'(또는 빈 값)이면 None (캐시 사용 안 함)"""
+    global _cache
+    path = os.getenv("LOA_CACHE_PATH", ".cache/loa_api.sqlite3")
+    if not path or path.lower() == "off":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(path, max_entries=int(os.getenv("LOA_CACHE_MAX_ENTRIES", 5000)))
+    return _cache
+
+def get_cache_stats():
+    return _cache.stats() if _cache is not None else {}
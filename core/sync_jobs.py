@@ -0,0 +1,364 @@
+import os
+import time
+import threading
+from psycopg2.extras import Json
+from core.database import (
+    PostgresDB, upsert_characters, get_character_sync_state, set_app_setting, get_app_setting
+)
+from core.loa_api import LostArkAPI
+from core import instrumentation
+
+# ---------------------------------------------------------
+# 백그라운드 원정대 동기화
+# ---------------------------------------------------------
+# 동기화 버튼은 sync_jobs 테이블에 작업을 넣기만 하고, 실제 API 조회/DB 저장은
+# 프로세스 공용 워커 스레드가 처리합니다. 진행 상황은 sync_jobs 행에 기록되고 UI가 폴링합니다.
+# (브라우저 새로고침/탭 이동과 무관하게 계속 진행, 여러 사용자가 동시에 요청해도 큐로 처리)
+
+SYNC_WORKERS = int(os.getenv("LOA_SYNC_WORKERS", 2))
+# 다른 프로세스가 넣은 작업도 가져가도록 주기적으로 큐 확인 (초)
+POLL_INTERVAL_SEC = float(os.getenv("LOA_SYNC_POLL_SEC", 5))
+# 자동 동기화 주기 (분, 0이면 사용 안 함)
+AUTO_SYNC_MINUTES = float(os.getenv("LOA_AUTO_SYNC_MINUTES", 0))
+AUTO_SYNC_NAMES_KEY = "auto_sync_names"
+# 진행 상황 UPDATE 최소 간격 (캐릭터마다 쓰지 않도록)
+PROGRESS_INTERVAL_SEC = 0.5
+
+# 여러 프로세스가 동시에 자동 동기화 작업을 넣지 않도록 잡는 advisory lock 키
+AUTO_SYNC_LOCK_ID = 70480002
+
+# 이어하기: 같은 원정대 목록을 다시 동기화하면 이 시간 안에 끝난(일부 실패한) 작업의 체크포인트를 이어받음
+RESUME_HOURS = float(os.getenv("LOA_SYNC_RESUME_HOURS", 6))
+# 원정대/캐릭터 단위 최대 시도 횟수 (넘으면 그 단위는 포기)
+MAX_UNIT_ATTEMPTS = int(os.getenv("LOA_SYNC_MAX_ATTEMPTS", 3))
+# heartbeat가 이 시간 이상 멈춘 running 작업은 프로세스가 죽은 것으로 보고 다시 큐에 넣음 (초)
+STALE_JOB_SEC = float(os.getenv("LOA_SYNC_STALE_SEC", 300))
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def parse_names(names):
+    """'본캐1, 본캐2' 또는 리스트 → 중복/빈 값 없는 이름 리스트"""
+    if isinstance(names, str):
+        names = names.split(',')
+    result = []
+    for name in names:
+        name = (name or "").strip()
+        if name and name not in result:
+            result.append(name)
+    return result
+
+# ---------------------------------------------------------
+# 작업 큐 (DB)
+# ---------------------------------------------------------
+def enqueue_sync_job(names, force_refresh=False, source='manual'):
+    """동기화 작업을 큐에 넣고 작업 id를 반환합니다. 워커가 없으면 띄웁니다."""
+    names = parse_names(names)
+    if not names:
+        return None
+    with PostgresDB() as cur:
+        # 강제 새로고침이 아니면 직전에 중단/일부 실패한 같은 작업을 이어서 진행
+        resume_of = None if force_refresh else _find_resumable_job(cur, ",".join(names))
+        cur.execute("""
+            INSERT INTO sync_jobs (names, source, force_refresh, total_names, resume_of)
+            VALUES (%s, %s, %s, %s, %s) RETURNING id
+        """, (",".join(names), source, force_refresh, len(names), resume_of))
+        job_id = cur.fetchone()['id']
+    ensure_sync_workers()
+    _wake_event.set()
+    return job_id
+
+def get_sync_job(job_id):
+    with PostgresDB() as cur:
+        cur.execute("SELECT * FROM sync_jobs WHERE id = %s", (job_id,))
+        return cur.fetchone()
+
+CLAIM_JOB_SQL = """
+    UPDATE sync_jobs
+    SET status = 'running', started_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id FROM sync_jobs WHERE status = 'queued'
+        ORDER BY id FOR UPDATE SKIP LOCKED LIMIT 1
+    )
+    RETURNING *
+"""
+
+def _claim_next_job():
+    """대기 중인 작업 하나를 가져옵니다. (SKIP LOCKED - 여러 워커/프로세스가 같은 작업을 잡지 않음)"""
+    with PostgresDB() as cur:
+        cur.execute(CLAIM_JOB_SQL)
+        return cur.fetchone()
+
+def _requeue_stale_jobs():
+    """heartbeat가 끊긴 running 작업을 다시 대기열로 (다시 잡히면 체크포인트부터 이어서 진행)"""
+    with PostgresDB() as cur:
+        cur.execute("""
+            UPDATE sync_jobs SET status = 'queued', current_step = '🔁 중단된 작업 이어하기 대기 중'
+            WHERE status = 'running' AND heartbeat_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+        """, (STALE_JOB_SEC,))
+
+def _update_job(job_id, **fields):
+    columns = ", ".join(f"{k} = %s" for k in fields)
+    with PostgresDB() as cur:
+        cur.execute(
+            f"UPDATE sync_jobs SET {columns}, heartbeat_at = CURRENT_TIMESTAMP WHERE id = %s",
+            (*fields.values(), job_id),
+        )
+
+def _finish_job(job_id, status, message=''):
+    with PostgresDB() as cur:
+        cur.execute("""
+            UPDATE sync_jobs
+            SET status = %s, message = %s, finished_at = CURRENT_TIMESTAMP, heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+        """, (status, message, job_id))
+
+# ---------------------------------------------------------
+# 체크포인트 (원정대 / 캐릭터 단위)
+# ---------------------------------------------------------
+# 조회가 끝난 단위는 결과(payload)와 함께 'fetched', DB 저장까지 끝나면 'written', 실패하면 'failed'.
+# 작업이 중간에 죽거나 일부만 실패해도 다음 실행은 끝나지 않은 단위만 다시 조회합니다.
+# (저장 후 'written' 표시 전에 죽으면 그 원정대만 한 번 더 저장 - upsert라 결과는 같음)
+
+def _find_resumable_job(cur, names):
+    cur.execute("""
+        SELECT j.id FROM sync_jobs j
+        WHERE j.names = %s
+          AND j.status IN ('done', 'failed')
+          AND j.finished_at > CURRENT_TIMESTAMP - %s * INTERVAL '1 hour'
+          AND (j.status = 'failed' OR EXISTS (
+                SELECT 1 FROM sync_checkpoints c
+                WHERE c.job_id = j.id AND c.status <> 'written' AND c.attempts < %s))
+        ORDER BY j.id DESC LIMIT 1
+    """, (names, RESUME_HOURS, MAX_UNIT_ATTEMPTS))
+    row = cur.fetchone()
+    return row['id'] if row else None
+
+def _copy_checkpoints(from_job_id, to_job_id):
+    # DO NOTHING: 다시 잡힌 작업이 이미 가진 자기 체크포인트는 덮어쓰지 않음
+    with PostgresDB() as cur:
+        cur.execute("""
+            INSERT INTO sync_checkpoints (job_id, unit_type, unit_key, parent_name, status, attempts, error, payload)
+            SELECT %s, unit_type, unit_key, parent_name, status, attempts, error, payload
+            FROM sync_checkpoints WHERE job_id = %s
+            ON CONFLICT (job_id, unit_type, unit_key) DO NOTHING
+        """, (to_job_id, from_job_id))
+
+def _load_checkpoints(job_id):
+    with PostgresDB() as cur:
+        cur.execute("""
+            SELECT unit_type, unit_key, status, attempts, payload
+            FROM sync_checkpoints WHERE job_id = %s
+        """, (job_id,))
+        return cur.fetchall()
+
+def _save_checkpoint(job_id, unit_type, unit_key, parent_name, ok, payload):
+    """조회 결과 기록 (시도 횟수 +1)"""
+    with PostgresDB() as cur:
+        cur.execute("""
+            INSERT INTO sync_checkpoints (job_id, unit_type, unit_key, parent_name, status, attempts, payload)
+            VALUES (%s, %s, %s, %s, %s, 1, %s)
+            ON CONFLICT (job_id, unit_type, unit_key) DO UPDATE SET
+                parent_name = EXCLUDED.parent_name,
+                status = EXCLUDED.status,
+                attempts = sync_checkpoints.attempts + 1,
+                payload = EXCLUDED.payload,
+                updated_at = CURRENT_TIMESTAMP
+        """, (job_id, unit_type, unit_key, parent_name, 'fetched' if ok else 'failed', Json(payload)))
+
+def _mark_written(job_id, name, char_names):
+    """원정대 저장이 끝난 뒤 원정대 + 조회에 성공한 캐릭터를 한 번에 'written'으로"""
+    with PostgresDB() as cur:
+        cur.execute("""
+            UPDATE sync_checkpoints SET status = 'written', updated_at = CURRENT_TIMESTAMP
+            WHERE job_id = %s
+              AND ((unit_type = 'name' AND unit_key = %s)
+                   OR (unit_type = 'character' AND unit_key = ANY(%s)))
+        """, (job_id, name, list(char_names)))
+
+# ---------------------------------------------------------
+# 작업 실행
+# ---------------------------------------------------------
+def run_sync_job(job):
+    """
+    작업 1개 실행: 끝나지 않은 원정대/캐릭터만 병렬 조회 → 원정대별 1트랜잭션 저장.
+    진행 상황은 sync_jobs에, 단위별 결과는 sync_checkpoints에 기록
+    """
+    job_id = job['id']
+    names = parse_names(job['names'])
+    api = LostArkAPI()
+
+    if job.get('resume_of'):
+        _copy_checkpoints(job['resume_of'], job_id)
+
+    # 1. 체크포인트: 받아 둔 원정대 목록/캐릭터는 재사용, 저장이 끝났거나 포기한 단위는 제외
+    siblings, name_status, prefetched, settled = {}, {}, {}, set()
+    given_up_names, given_up_chars = set(), []
+    for cp in _load_checkpoints(job_id):
+        key, status = cp['unit_key'], cp['status']
+        exhausted = status == 'failed' and cp['attempts'] >= MAX_UNIT_ATTEMPTS
+        if cp['unit_type'] == 'name':
+            name_status[key] = status
+            if status in ('fetched', 'written'):
+                siblings[key] = cp['payload']
+            elif exhausted:
+                given_up_names.add(key)
+        elif status == 'written':
+            settled.add(key)
+        elif status == 'fetched':
+            prefetched[key] = cp['payload']
+        elif exhausted:
+            settled.add(key)
+            given_up_chars.append(key)
+
+    def is_finished(name):
+        if name in given_up_names:
+            return True
+        return name_status.get(name) == 'written' and all(
+            c['CharacterName'] in settled for c in siblings[name]
+        )
+    todo_names = [name for name in names if not is_finished(name)]
+    done_names = len(names) - len(todo_names)
+
+    last_report = [0.0]
+    def on_progress(name, char_name, done, total):
+        now = time.monotonic()
+        if now - last_report[0] < PROGRESS_INTERVAL_SEC and done < total:
+            return
+        last_report[0] = now
+        _update_job(job_id, done_characters=done, total_characters=total,
+                    current_step=f"📡 '{name}' 원정대 - {char_name} 조회 완료")
+
+    failed_chars = set()
+    def on_unit(unit_type, key, parent_name, ok, payload):
+        if unit_type == 'character' and not ok:
+            failed_chars.add(key)
+        _save_checkpoint(job_id, unit_type, key, parent_name, ok, payload)
+
+    # 2. 끝나지 않은 단위만 조회
+    step = f"📡 원정대 {len(todo_names)}개 검색 중..."
+    if done_names:
+        step += f" (이전에 끝난 {done_names}개 건너뜀)"
+    _update_job(job_id, done_names=done_names, current_step=step)
+    rosters = {}
+    if todo_names:
+        known = None if job['force_refresh'] else get_character_sync_state()
+        rosters = api.get_rosters(
+            todo_names, known=known, force_refresh=job['force_refresh'], progress=on_progress,
+            siblings=siblings, prefetched=prefetched, exclude=settled, on_unit=on_unit,
+        )
+
+    total_characters = sum(len(chars) for chars in rosters.values())
+    _update_job(job_id, done_characters=total_characters, total_characters=total_characters)
+
+    # 3. 원정대별 저장 → 저장된 단위는 'written'
+    problems = []
+    for name in names:
+        if name in given_up_names:
+            problems.append(f"'{name}' 캐릭터를 찾을 수 없습니다.")
+        if name not in rosters:
+            continue
+        char_list = rosters[name]
+        if not char_list:
+            if name not in siblings:
+                problems.append(f"'{name}' 캐릭터를 찾을 수 없습니다.")
+        else:
+            _update_job(job_id, current_step=f"💾 '{name}' 원정대 저장 중...")
+            upsert_characters(char_list, account_name=name)
+        written = [c['CharacterName'] for c in char_list if c['CharacterName'] not in failed_chars]
+        if name in siblings or char_list:
+            _mark_written(job_id, name, written)
+        done_names += 1
+        _update_job(job_id, done_names=done_names)
+
+    if api.failed_profiles:
+        problems.append(
+            f"전투력 조회 실패 {len(api.failed_profiles)}명 (기존 값 유지, 다시 동기화하면 이 캐릭터만 재조회): "
+            + ", ".join(api.failed_profiles)
+        )
+    if given_up_chars:
+        problems.append(
+            f"{MAX_UNIT_ATTEMPTS}번 실패해 건너뛴 캐릭터 {len(given_up_chars)}명: " + ", ".join(given_up_chars)
+        )
+    return problems
+
+def _process_job(job):
+    profile = instrumentation.begin(f"sync_job:{job['id']}")
+    try:
+        problems = run_sync_job(job)
+        _finish_job(job['id'], 'done', "\n".join(problems))
+    except Exception as e:
+        print(f"❌ 동기화 작업 {job['id']} 실패: {e}")
+        try:
+            _finish_job(job['id'], 'failed', str(e))
+        except Exception as inner:
+            print(f"❌ 동기화 작업 상태 기록 실패: {inner}")
+    finally:
+        instrumentation.end(profile)
+
+# ---------------------------------------------------------
+# 자동 동기화 스케줄
+# ---------------------------------------------------------
+def set_auto_sync_names(names):
+    set_app_setting(AUTO_SYNC_NAMES_KEY, ",".join(parse_names(names)))
+
+def _maybe_schedule_auto_sync():
+    """마지막 자동 동기화 이후 AUTO_SYNC_MINUTES가 지났으면 작업을 하나 넣습니다."""
+    if AUTO_SYNC_MINUTES <= 0:
+        return
+    names = parse_names(get_app_setting(AUTO_SYNC_NAMES_KEY) or "")
+    if not names:
+        return
+    with PostgresDB(transaction=True) as cur:
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s) AS locked", (AUTO_SYNC_LOCK_ID,))
+        if not cur.fetchone()['locked']:
+            return
+        cur.execute("""
+            SELECT 1 FROM sync_jobs
+            WHERE source = 'auto'
+              AND (status IN ('queued', 'running')
+                   OR created_at > CURRENT_TIMESTAMP - %s * INTERVAL '1 minute')
+            LIMIT 1
+        """, (AUTO_SYNC_MINUTES,))
+        if cur.fetchone():
+            return
+        cur.execute("""
+            INSERT INTO sync_jobs (names, source, total_names) VALUES (%s, 'auto', %s)
+        """, (",".join(names), len(names)))
+
+# ---------------------------------------------------------
+# 워커 스레드
+# ---------------------------------------------------------
+_wake_event = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+def _worker_loop(is_scheduler):
+    while True:
+        try:
+            if is_scheduler:
+                _requeue_stale_jobs()
+                _maybe_schedule_auto_sync()
+            job = _claim_next_job()
+        except Exception as e:
+            print(f"⚠️ 동기화 큐 확인 실패: {e}")
+            job = None
+
+        if job is not None:
+            _process_job(job)
+            continue
+
+        _wake_event.wait(POLL_INTERVAL_SEC)
+        _wake_event.clear()
+
+def ensure_sync_workers():
+    """프로세스당 한 번만 워커 스레드를 띄웁니다. (첫 번째 워커가 자동 동기화 스케줄도 담당)"""
+    if _workers:
+        return
+    with _workers_lock:
+        if _workers:
+            return
+        for i in range(max(1, SYNC_WORKERS)):
+            t = threading.Thread(target=_worker_loop, args=(i == 0,), name=f"loa-sync-{i}", daemon=True)
+            t.start()
+            _workers.append(t)
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+# ---------------------------------------------------------
+# DB가 필요한 테스트용 임시 Postgres
+# ---------------------------------------------------------
+# LOA_TEST_PG=initdb: 임시 클러스터 (initdb/pg_ctl 필요, 기본값)
+# LOA_TEST_PG=env   : .env / POSTGRES_* 서버에 임시 데이터베이스를 만들고 끝나면 DROP
+# 띄울 수 없으면 DB 테스트는 건너뜁니다.
+
+
+@pytest.fixture(scope="session")
+def postgres():
+    from bench.common import throwaway_postgres
+    server = throwaway_postgres(os.getenv("LOA_TEST_PG", "initdb"))
+    try:
+        info = server.__enter__()
+    except Exception as e:
+        pytest.skip(f"임시 Postgres를 띄울 수 없음: {e}")
+    yield info
+    server.__exit__(None, None, None)
+
+
+@pytest.fixture
+def db(postgres):
+    """빈 스키마 + 프로세스 캐시(스키마 버전 / 스냅샷 / 파티션) 초기화. 테이블은 각 테스트가 만듦"""
+    from core import database, migrations
+    with database.PostgresDB() as cur:
+        cur.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+    migrations._applied_version = None
+    database._schema_ready = False
+    database._snapshot_partitioned = False
+    database._snapshot_partitions.clear()
+    database.bump_data_version()
+    return database.PostgresDB
@@ -0,0 +1,85 @@
+import itertools
+import random
+
+import pytest
+
+from core.game_data import (
+    RAID_INFO, RaidIndex, calculate_best_raids, calculate_best_raids_batch, load_raid_data,
+)
+
+
+def linear_best_raids(raids, item_lv, combat_power, top_n=3):
+    """RaidIndex 도입 전 calculate_best_raids (레이드 목록 선형 탐색) 그대로"""
+    available = [r for r in raids if item_lv >= r["item_level"] and combat_power >= r.get("combat_power", 0)]
+    best_versions = {}
+    for r in available:
+        if r["name"] not in best_versions or r["gold"] > best_versions[r["name"]]["gold"]:
+            best_versions[r["name"]] = r
+    final = list(best_versions.values())
+    final.sort(key=lambda x: x["gold"], reverse=True)
+    return final[:top_n]
+
+
+def _probe_specs(raids):
+    """모든 기준값의 바로 아래/같은 값/바로 위 조합 (구간 경계를 전부 지나감)"""
+    levels = sorted({r["item_level"] for r in raids})
+    cps = sorted({r.get("combat_power", 0) for r in raids})
+    level_probes = [0] + [v + d for v in levels for d in (-0.01, 0, 0.01)] + [levels[-1] + 100]
+    cp_probes = [0] + [v + d for v in cps for d in (-1, 0, 1)] + [cps[-1] + 1000]
+    return list(itertools.product(level_probes, cp_probes))
+
+
+def test_index_matches_linear_scan_on_shipped_data():
+    for item_lv, cp in _probe_specs(RAID_INFO):
+        assert calculate_best_raids(item_lv, cp) == linear_best_raids(RAID_INFO, item_lv, cp)
+
+
+def test_batch_matches_linear_scan_on_shipped_data():
+    specs = _probe_specs(RAID_INFO)
+    assert calculate_best_raids_batch(specs) == [linear_best_raids(RAID_INFO, lv, cp) for lv, cp in specs]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_batch_matches_linear_scan_on_random_raids(seed):
+    # 골드/기준값이 겹치는 경우(동률 처리 순서)까지 포함한 임의 레이드 목록
+    rng = random.Random(seed)
+    raids = [
+        {
+            "name": f"레이드{rng.randint(0, 5)}", "difficulty": str(i),
+            "item_level": rng.choice([1600, 1620, 1640, 1660, 1680]),
+            "combat_power": rng.choice([0, 0, 1000, 2000]),
+            "gold": rng.choice([5000, 7200, 7200, 11500, 16500]),
+        }
+        for i in range(rng.randint(1, 14))
+    ]
+    index = RaidIndex(raids)
+    specs = _probe_specs(raids)
+    for top_n in (1, 3, 5):
+        expected = [linear_best_raids(raids, lv, cp, top_n) for lv, cp in specs]
+        assert index.best_raids_batch(specs, top_n) == expected
+        assert [index.best_raids(lv, cp, top_n) for lv, cp in specs] == expected
+
+
+def test_batch_results_are_independent_lists():
+    # 같은 구간 캐릭터끼리 결과 리스트를 공유하면 한쪽 수정이 다른 캐릭터에 번짐
+    first, second = calculate_best_raids_batch([(1700, 2000), (1700, 2000)])
+    first.clear()
+    assert second == calculate_best_raids(1700, 2000)
+
+
+def test_load_raid_data_rejects_missing_keys(tmp_path):
+    path = tmp_path / "raids.json"
+    path.write_text('{"version": "t", "raids": [{"name": "x", "difficulty": "노말", "gold": 1}]}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_raid_data(str(path))
+
+
+def test_load_raid_data_defaults_combat_power(tmp_path):
+    path = tmp_path / "raids.json"
+    path.write_text(
+        '{"version": "t", "raids": [{"name": "x", "difficulty": "노말", "item_level": 1600, "gold": 1}]}',
+        encoding="utf-8",
+    )
+    version, raids = load_raid_data(str(path))
+    assert version == "t"
+    assert raids[0]["combat_power"] == 0
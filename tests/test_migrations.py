@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+from core import migrations
+from core.reset_calendar import KST
+
+WEEK_START = datetime(2026, 10, 14, 6, 0, tzinfo=KST)
+# 월 파티션은 이번 달/다음 달만 만들어지므로 스냅샷 시각은 현재 기준
+CAPTURED_AT = datetime.now(KST).replace(microsecond=0)
+
+
+def _schema(cur):
+    """public 스키마의 (테이블, 컬럼, 타입, 기본값) + 인덱스 정의"""
+    cur.execute("""
+        SELECT table_name, column_name, data_type, column_default
+        FROM information_schema.columns WHERE table_schema = 'public'
+        ORDER BY 1, 2
+    """)
+    columns = [tuple(r.values()) for r in cur.fetchall()]
+    cur.execute("SELECT indexdef FROM pg_indexes WHERE schemaname = 'public' ORDER BY 1")
+    return columns, [r['indexdef'] for r in cur.fetchall()]
+
+
+def _recorded_versions(cur):
+    cur.execute("SELECT version FROM schema_version ORDER BY version")
+    return [r['version'] for r in cur.fetchall()]
+
+
+def test_migrate_applies_all_versions_once(db):
+    all_versions = [v for v, _, _ in migrations.MIGRATIONS]
+    assert migrations.migrate() == all_versions
+    assert migrations.get_schema_version() == migrations.LATEST_VERSION
+    # 같은 프로세스: 캐시로 바로 반환 / 새 프로세스(캐시 없음): DB 버전을 읽고 적용할 것이 없음
+    assert migrations.migrate() == []
+    migrations._applied_version = None
+    assert migrations.migrate() == []
+    with db() as cur:
+        assert _recorded_versions(cur) == all_versions
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_reapplying_every_migration_keeps_schema_and_data(db, monkeypatch, partitioned):
+    from core import database
+    monkeypatch.setattr(migrations, "SNAPSHOT_PARTITIONING", partitioned)
+    database.init_db()
+    with db() as cur:
+        cur.execute("INSERT INTO characters (character_name, account_name) VALUES ('캐릭', '원정대')")
+        cur.execute("INSERT INTO weekly_income (week_start, character_name, planned_gold) VALUES (%s, '캐릭', 100)",
+                    (WEEK_START,))
+        cur.execute("INSERT INTO character_snapshots (captured_at, character_name, combat_power) VALUES (%s, '캐릭', 1)",
+                    (CAPTURED_AT,))
+        cur.execute("INSERT INTO market_prices (captured_at, item_id, current_min_price) VALUES (%s, 1, 10)",
+                    (CAPTURED_AT,))
+        before = _schema(cur)
+
+    # reset_db()가 쓰는 경로: 기록을 지우고 1번부터 전부 다시 적용 (남아 있는 테이블/데이터는 그대로)
+    assert migrations.migrate(reapply=True) == [v for v, _, _ in migrations.MIGRATIONS]
+    with db() as cur:
+        assert _schema(cur) == before
+        cur.execute("SELECT week_start FROM weekly_income")
+        assert cur.fetchone()['week_start'] == WEEK_START
+        cur.execute("SELECT captured_at FROM character_snapshots")
+        assert cur.fetchone()['captured_at'] == CAPTURED_AT
+        # 일봉은 KST 자정 기준으로 다시 집계됨
+        cur.execute("SELECT bucket_start, open, samples FROM market_ohlc WHERE resolution = 'day'")
+        kst_midnight = CAPTURED_AT.replace(hour=0, minute=0, second=0)
+        assert cur.fetchall() == [{"bucket_start": kst_midnight, "open": 10, "samples": 1}]
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_timestamp_columns_upgrade_from_version_7(db, monkeypatch, partitioned):
+    """TIMESTAMP로 만들어진 예전 DB: 세션 TimeZone으로 저장된 값이 같은 시각의 TIMESTAMPTZ로 바뀌어야 함"""
+    from core import database
+    monkeypatch.setattr(migrations, "SNAPSHOT_PARTITIONING", partitioned)
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:7])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", 7)
+    migrations.migrate()
+    with db() as cur:
+        database._load_snapshot_layout(cur)
+        # 타임존 있는 값을 TIMESTAMP 컬럼에 넣으면 세션 TimeZone의 벽시계 시각으로 저장됨 (예전 동작)
+        cur.execute("INSERT INTO character_snapshots (captured_at, character_name) VALUES (%s, '캐릭')", (CAPTURED_AT,))
+        cur.execute("INSERT INTO market_prices (captured_at, item_id, current_min_price) VALUES (%s, 1, 10)",
+                    (CAPTURED_AT,))
+    monkeypatch.undo()
+
+    migrations._applied_version = None
+    assert migrations.migrate(reapply=False) == [8, 9]
+    with db() as cur:
+        cur.execute("SELECT captured_at FROM character_snapshots")
+        assert cur.fetchone()['captured_at'] == CAPTURED_AT
+        cur.execute("SELECT captured_at FROM market_prices")
+        assert cur.fetchone()['captured_at'] == CAPTURED_AT
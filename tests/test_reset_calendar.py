@@ -0,0 +1,108 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from core.reset_calendar import (
+    DAILY, KST, WEEKLY, boundaries, last_daily_reset, last_weekly_reset, project_income, target_instant,
+)
+
+# 2026-10-14는 수요일
+WED = datetime(2026, 10, 14, 6, 0, tzinfo=KST)
+
+
+@pytest.mark.parametrize("now, expected", [
+    (datetime(2026, 10, 15, 5, 59, tzinfo=KST), datetime(2026, 10, 14, 6, 0, tzinfo=KST)),
+    (datetime(2026, 10, 15, 6, 0, tzinfo=KST), datetime(2026, 10, 15, 6, 0, tzinfo=KST)),
+    (datetime(2026, 10, 15, 23, 0, tzinfo=KST), datetime(2026, 10, 15, 6, 0, tzinfo=KST)),
+    (datetime(2027, 1, 1, 0, 30, tzinfo=KST), datetime(2026, 12, 31, 6, 0, tzinfo=KST)),
+])
+def test_last_daily_reset(now, expected):
+    assert last_daily_reset(now) == expected
+
+
+@pytest.mark.parametrize("now, expected", [
+    (WED - timedelta(minutes=1), WED - timedelta(days=7)),
+    (WED, WED),
+    (WED + timedelta(days=6, hours=23), WED),
+    (WED + timedelta(days=7), WED + timedelta(days=7)),
+])
+def test_last_weekly_reset(now, expected):
+    assert last_weekly_reset(now) == expected
+
+
+def test_aware_inputs_in_other_zones_use_kst_boundaries():
+    # UTC 화요일 22:00 = KST 수요일 07:00 → 이번 주 리셋 직후
+    now = datetime(2026, 10, 13, 22, 0, tzinfo=timezone.utc)
+    assert last_daily_reset(now) == WED
+    assert last_weekly_reset(now) == WED
+    # UTC 화요일 20:59 = KST 수요일 05:59 → 아직 지난 주
+    now = datetime(2026, 10, 13, 20, 59, tzinfo=timezone.utc)
+    assert last_weekly_reset(now) == WED - timedelta(days=7)
+    assert last_daily_reset(now).utcoffset() == timedelta(hours=9)
+
+
+def _brute_force(kind, start, end):
+    step = timedelta(days=7 if kind == WEEKLY else 1)
+    b = last_weekly_reset(start) if kind == WEEKLY else last_daily_reset(start)
+    result = []
+    while b <= end:
+        if b > start:
+            result.append(b)
+        b += step
+    return result
+
+
+@pytest.mark.parametrize("kind", [DAILY, WEEKLY])
+@pytest.mark.parametrize("start, end", [
+    (datetime(2025, 12, 20, 12, tzinfo=KST), datetime(2026, 1, 20, 12, tzinfo=KST)),   # 연도 경계
+    (WED, WED + timedelta(days=21)),                                                     # 시작이 경계 (제외)
+    (WED - timedelta(seconds=1), WED),                                                   # 끝이 경계 (포함)
+    (datetime(2024, 2, 27, tzinfo=KST), datetime(2028, 3, 2, tzinfo=KST)),              # 여러 해 + 윤년
+    (WED, WED),
+])
+def test_boundaries_match_brute_force(kind, start, end):
+    assert boundaries(kind, start, end) == _brute_force(kind, start, end)
+
+
+def test_weekly_boundaries_are_wednesday_0600():
+    for b in boundaries(WEEKLY, datetime(2025, 1, 1, tzinfo=KST), datetime(2027, 1, 1, tzinfo=KST)):
+        assert (b.weekday(), b.hour, b.minute) == (2, 6, 0)
+
+
+def test_boundaries_rejects_unknown_kind():
+    with pytest.raises(ValueError):
+        boundaries("monthly", WED, WED + timedelta(days=30))
+
+
+ROWS = [
+    {"character_name": "가", "planned_gold": 30000, "realized_gold": 10000},
+    {"character_name": "나", "planned_gold": 5000, "realized_gold": 8000},   # 획득이 예상보다 큰 경우 남은 수익은 0
+    {"character_name": "다", "planned_gold": None, "realized_gold": None},
+]
+
+
+def test_project_income_counts_remaining_week_and_future_resets():
+    now = datetime(2026, 10, 18, 12, tzinfo=KST)        # 일요일
+    # 목표일 11/11(수) 06:00 → 그 전 주간 리셋: 10/21, 10/28, 11/04 (11/11 06:00 자체는 제외)
+    projection = project_income(ROWS, date(2026, 11, 11), now=now)
+    assert projection["target"] == target_instant(date(2026, 11, 11))
+    assert projection["weeks_left"] == 3
+    assert projection["weekly_income"] == 35000
+    assert projection["remaining_this_week"] == 20000
+    assert projection["per_character"] == {"가": 20000 + 30000 * 3, "나": 5000 * 3, "다": 0}
+    assert projection["total"] == sum(projection["per_character"].values())
+    assert projection["by_week"] == [(WED, 20000)] + [(WED + timedelta(days=7 * k), 35000) for k in (1, 2, 3)]
+
+
+def test_project_income_past_target_is_zero():
+    now = datetime(2026, 10, 18, 12, tzinfo=KST)
+    projection = project_income(ROWS, date(2026, 10, 1), now=now)
+    assert projection["weeks_left"] == 0
+    assert projection["remaining_this_week"] == 0
+    assert projection["total"] == 0
+
+
+def test_project_income_accepts_aware_now_in_other_zone():
+    kst_now = datetime(2026, 10, 18, 12, tzinfo=KST)
+    utc_now = kst_now.astimezone(timezone.utc)
+    assert project_income(ROWS, date(2026, 11, 11), now=utc_now) == project_income(ROWS, date(2026, 11, 11), now=kst_now)
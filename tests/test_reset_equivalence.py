@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core import reset_manager
+from core.reset_calendar import KST
+
+# 경계 바로 앞/위/뒤, 오래된 기록, 방금 한 기록 (초 단위 - 테스트 도중 시각이 조금 흘러도 결과가 같도록)
+OFFSETS = [timedelta(seconds=s) for s in (-3600, -1, 0, 1, 3600)] + [timedelta(days=-10)]
+
+
+def _seed(cur, now):
+    last_daily, last_weekly = reset_manager.get_last_reset_times(now)
+    cur.execute("INSERT INTO characters (character_name) VALUES ('테스트캐릭')")
+    todos = []
+    for category, boundary in (("일일", last_daily), ("주간", last_weekly)):
+        for offset in OFFSETS:
+            for current, total in ((0, 1), (1, 1), (1, 3), (3, 3)):
+                todos.append((f"{category}{len(todos)}", category, current, total, boundary + offset))
+    todos.append(("방금 한 숙제", "주간", 1, 1, now - timedelta(minutes=1)))
+    for name, category, current, total, updated_at in todos:
+        cur.execute("""
+            INSERT INTO todos (character_name, task_name, category, current_count, total_count, updated_at)
+            VALUES ('테스트캐릭', %s, %s, %s, %s, %s)
+        """, (name, category, current, total, updated_at))
+
+    tasks = []
+    for reset_type, boundary in (("DAILY", last_daily), ("WEEKLY", last_weekly)):
+        for offset in OFFSETS:
+            tasks.append((reset_type, 1, boundary + offset))
+    for days in (1, 2, 3):
+        # N일 간격: 정확히 N일 전 근처는 실행 중 시각이 흘러도 결과가 바뀌지 않게 1분 띄움
+        for offset in (timedelta(minutes=-1), timedelta(minutes=1), timedelta(hours=-12)):
+            tasks.append(("INTERVAL", days, now - timedelta(days=days) + offset))
+    for i, (reset_type, value, updated_at) in enumerate(tasks):
+        for checked in (True, False):
+            cur.execute("""
+                INSERT INTO expedition_tasks (task_name, is_checked, reset_type, reset_value, updated_at)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (f"{reset_type}{i}{checked}", checked, reset_type, value, updated_at))
+
+
+def _read(cur):
+    cur.execute("SELECT * FROM todos ORDER BY id")
+    todos = cur.fetchall()
+    cur.execute("SELECT * FROM expedition_tasks ORDER BY id")
+    return todos, cur.fetchall()
+
+
+def test_lazy_reset_matches_eager_reset(db, monkeypatch):
+    from core.database import init_db
+    init_db()
+    now = datetime.now(KST)
+    with db(transaction=True) as cur:
+        _seed(cur, now)
+        todos, tasks = _read(cur)
+
+    monkeypatch.setattr(reset_manager, "RESET_MODE", "lazy")
+    lazy_todos = {t['id']: t['current_count'] for t in reset_manager.effective_todos(todos, now)}
+    lazy_tasks = {t['id']: t['is_checked'] for t in reset_manager.effective_expedition_tasks(tasks, now)}
+    # lazy 모드는 리셋 패스에서 아무것도 쓰지 않음
+    assert reset_manager.check_and_reset_tasks() == []
+    with db() as cur:
+        assert _read(cur) == (todos, tasks)
+
+    monkeypatch.setattr(reset_manager, "RESET_MODE", "eager")
+    assert reset_manager.check_and_reset_tasks()
+    with db() as cur:
+        eager_todos, eager_tasks = _read(cur)
+
+    assert {t['id']: t['current_count'] for t in eager_todos} == lazy_todos
+    assert {t['id']: t['is_checked'] for t in eager_tasks} == lazy_tasks
+    # 실제로 양쪽 결과가 다 섞여 있는지 (전부 리셋되거나 전부 유지되면 비교가 의미 없음)
+    assert 0 < sum(1 for t in todos if t['current_count'] and not lazy_todos[t['id']]) < len(todos)
+    assert 0 < sum(1 for t in tasks if t['is_checked'] and not lazy_tasks[t['id']]) < len(tasks)
+
+
+def test_eager_reset_pass_runs_once_per_boundary(db, monkeypatch):
+    from core.database import init_db
+    init_db()
+    monkeypatch.setattr(reset_manager, "RESET_MODE", "eager")
+    with db(transaction=True) as cur:
+        _seed(cur, datetime.now(KST))
+    assert reset_manager.check_and_reset_tasks()
+    # 워터마크가 남아 있으므로 같은 경계에서는 다시 돌지 않음
+    assert reset_manager.check_and_reset_tasks() == []
+
+
+@pytest.mark.parametrize("category, boundary_index", [("일일", 0), ("주간", 1)])
+def test_is_todo_current_boundary_is_inclusive(category, boundary_index):
+    now = datetime(2026, 10, 18, 12, tzinfo=KST)
+    boundary = reset_manager.get_last_reset_times(now)[boundary_index]
+    last_daily, last_weekly = reset_manager.get_last_reset_times(now)
+    todo = {"category": category, "updated_at": boundary}
+    assert reset_manager.is_todo_current(todo, last_daily, last_weekly)
+    todo["updated_at"] = boundary - timedelta(microseconds=1)
+    assert not reset_manager.is_todo_current(todo, last_daily, last_weekly)
+
+
+def test_eager_mode_returns_rows_unchanged(monkeypatch):
+    monkeypatch.setattr(reset_manager, "RESET_MODE", "eager")
+    todos = [{"id": 1, "category": "일일", "current_count": 1, "updated_at": datetime(2000, 1, 1, tzinfo=KST)}]
+    assert reset_manager.effective_todos(todos) is todos
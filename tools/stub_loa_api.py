@@ -0,0 +1,276 @@
+"""
+로컬 Lost Ark Open API 스텁 서버
+
+LostArkAPI를 실제 API 키/요청 한도 없이 시험하기 위한 HTTP 서버입니다.
+- GET /characters/{name}/siblings
+- GET /armories/characters/{name}/profiles
+- POST /markets/items (tools/data/market_items.json에 기록해 둔 응답을 페이지 단위로 돌려줌)
+요청 한도(X-RateLimit-* 헤더, 429), 임의 5xx 오류를 흉내낼 수 있습니다.
+
+사용 예:
+    python -m tools.stub_loa_api --port 8900 --accounts 4 --chars 10 --rate-limit 100
+    LOA_API_BASE_URL=http://127.0.0.1:8900 streamlit run main.py
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+MARKET_DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "market_items.json")
+MARKET_PAGE_SIZE = 10
+
+CLASSES = ["버서커", "디스트로이어", "워로드", "홀리나이트", "바드", "소서리스", "블레이드", "건슬링어", "기상술사", "도화가"]
+SERVERS = ["루페온", "실리안", "아만", "카마인", "카제로스", "아브렐슈드", "카단", "니나브"]
+
+
+def make_roster(accounts=1, chars_per_account=10, seed=0):
+    """
+    가짜 원정대 데이터 생성.
+    반환값: ({대표 캐릭터: [siblings 항목]}, {캐릭터 이름: 프로필})
+    """
+    rng = random.Random(seed)
+    rosters, profiles = {}, {}
+    for a in range(accounts):
+        server = SERVERS[a % len(SERVERS)]
+        siblings = []
+        for c in range(chars_per_account):
+            name = f"스텁{a:03d}캐릭{c:02d}"
+            level = round(rng.uniform(1600, 1740), 2)
+            cp = round(rng.uniform(800, 3800), 2)
+            cls = rng.choice(CLASSES)
+            siblings.append({
+                "ServerName": server,
+                "CharacterName": name,
+                "CharacterLevel": 70,
+                "CharacterClassName": cls,
+                "ItemAvgLevel": f"{level:,.2f}",
+            })
+            profiles[name] = {
+                "CharacterName": name,
+                "ServerName": server,
+                "CharacterClassName": cls,
+                "ItemAvgLevel": f"{level:,.2f}",
+                "CombatPower": f"{cp:,.2f}",
+                "Stats": [{"Type": "공격력", "Value": str(int(cp * 40))}],
+            }
+        rosters[siblings[0]["CharacterName"]] = siblings
+    return rosters, profiles
+
+
+def make_market(items_per_category=None, seed=0):
+    """
+    기록해 둔 거래소 응답을 불러옵니다. items_per_category를 주면 기록된 아이템을 변형해
+    카테고리당 그 개수만큼 채움 (수천 개 아이템 수집 시험용)
+    반환값: {카테고리 코드: [아이템]}
+    """
+    with open(MARKET_DATA_PATH, encoding="utf-8") as f:
+        recorded = {int(code): items for code, items in json.load(f).items()}
+    if not items_per_category:
+        return recorded
+
+    rng = random.Random(seed)
+    market = {}
+    for code, items in recorded.items():
+        expanded = []
+        for i in range(items_per_category):
+            item = copy.deepcopy(items[i % len(items)])
+            if i >= len(items):
+                item["Id"] = item["Id"] * 100000 + i
+                item["Name"] = f"{item['Name']} #{i}"
+                scale = rng.uniform(0.5, 1.5)
+                for key in ("YDayAvgPrice", "RecentPrice", "CurrentMinPrice"):
+                    item[key] = max(1, round(item[key] * scale))
+            expanded.append(item)
+        market[code] = expanded
+    return market
+
+
+class _FixedWindowLimiter:
+    """분 단위 고정 윈도우 요청 한도 (실제 API와 같은 헤더를 돌려줌)"""
+
+    def __init__(self, limit_per_minute):
+        self.limit = limit_per_minute
+        self.lock = threading.Lock()
+        self.window_start = int(time.time())
+        self.used = 0
+
+    def hit(self):
+        with self.lock:
+            now = int(time.time())
+            if now - self.window_start >= 60:
+                self.window_start, self.used = now, 0
+            self.used += 1
+            reset = self.window_start + 60
+            allowed = self.used <= self.limit
+            headers = {
+                "X-RateLimit-Limit": str(self.limit),
+                "X-RateLimit-Remaining": str(max(0, self.limit - self.used)),
+                "X-RateLimit-Reset": str(reset),
+            }
+            if not allowed:
+                headers["Retry-After"] = str(max(1, reset - now))
+            return allowed, headers
+
+
+class StubState:
+    def __init__(self, rosters, profiles, rate_limit=None, error_rate=0.0, latency_ms=0, seed=0,
+                 market=None, price_jitter=0.0):
+        self.rosters = rosters
+        self.profiles = profiles
+        self.market = market if market is not None else make_market()
+        # 요청마다 CurrentMinPrice를 ±price_jitter 비율로 흔들어 시세 변동을 흉내냄
+        self.price_jitter = price_jitter
+        # 원정대 멤버 누구로 조회해도 같은 목록이 나오도록 역색인
+        self.sibling_index = {
+            member["CharacterName"]: siblings
+            for siblings in rosters.values() for member in siblings
+        }
+        self.limiter = _FixedWindowLimiter(rate_limit) if rate_limit else None
+        self.error_rate = error_rate
+        self.latency_ms = latency_ms
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.counts_lock = threading.Lock()
+        self.counts = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    def count(self, key):
+        with self.counts_lock:
+            self.counts[key] += 1
+
+    def roll_error(self):
+        if not self.error_rate:
+            return False
+        with self.rng_lock:
+            return self.rng.random() < self.error_rate
+
+    def market_page(self, query):
+        items = self.market.get(int(query.get("CategoryCode") or 0), [])
+        page_no = max(1, int(query.get("PageNo") or 1))
+        page = items[(page_no - 1) * MARKET_PAGE_SIZE:page_no * MARKET_PAGE_SIZE]
+        if self.price_jitter:
+            page = [dict(item) for item in page]
+            with self.rng_lock:
+                for item in page:
+                    factor = 1 + self.rng.uniform(-self.price_jitter, self.price_jitter)
+                    item["CurrentMinPrice"] = max(1, round(item["CurrentMinPrice"] * factor))
+        return {"PageNo": page_no, "PageSize": MARKET_PAGE_SIZE, "TotalCount": len(items), "Items": page}
+
+
+def _make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send(self, status, body=None, headers=None):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _route(self, parts):
+            if len(parts) == 3 and parts[0] == "characters" and parts[2] == "siblings":
+                return 200, state.sibling_index.get(parts[1])
+            if len(parts) == 4 and parts[:2] == ["armories", "characters"] and parts[3] == "profiles":
+                return 200, state.profiles.get(parts[2])
+            return 404, {"message": "not found"}
+
+        def _check_limits(self):
+            """요청 한도 / 임의 오류 처리. 응답을 이미 보냈으면 None, 아니면 응답에 붙일 헤더"""
+            state.count("requests")
+            if state.latency_ms:
+                time.sleep(state.latency_ms / 1000.0)
+
+            headers = {}
+            if state.limiter:
+                allowed, headers = state.limiter.hit()
+                if not allowed:
+                    state.count("rate_limited")
+                    self._send(429, {"message": "rate limit exceeded"}, headers)
+                    return None
+            if state.roll_error():
+                state.count("errors")
+                self._send(503, {"message": "temporarily unavailable"}, headers)
+                return None
+            return headers
+
+        def do_GET(self):
+            headers = self._check_limits()
+            if headers is None:
+                return
+            parts = [unquote(p) for p in urlsplit(self.path).path.strip("/").split("/")]
+            status, body = self._route(parts)
+            # 실제 API처럼 없는 캐릭터는 200 + null
+            self._send(status, body, headers)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            headers = self._check_limits()
+            if headers is None:
+                return
+            if urlsplit(self.path).path.strip("/") != "markets/items":
+                return self._send(404, {"message": "not found"}, headers)
+            try:
+                query = json.loads(raw or b"{}")
+            except ValueError:
+                return self._send(400, {"message": "invalid body"}, headers)
+            self._send(200, state.market_page(query), headers)
+
+    return Handler
+
+
+def start_stub_server(rosters=None, profiles=None, host="127.0.0.1", port=0, **options):
+    """
+    스텁 서버를 백그라운드 스레드로 띄웁니다.
+    반환값: (server, base_url) - 끝나면 server.shutdown() 호출
+    """
+    if rosters is None or profiles is None:
+        rosters, profiles = make_roster()
+    state = StubState(rosters, profiles, **options)
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 Lost Ark API 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--accounts", type=int, default=1)
+    parser.add_argument("--chars", type=int, default=10, help="원정대당 캐릭터 수")
+    parser.add_argument("--rate-limit", type=int, default=None, help="분당 요청 한도 (없으면 무제한)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503을 돌려줄 확률 (0~1)")
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--market-items", type=int, default=None, help="카테고리당 거래소 아이템 수 (없으면 기록된 그대로)")
+    parser.add_argument("--price-jitter", type=float, default=0.0, help="요청마다 시세를 흔드는 비율 (0~1)")
+    args = parser.parse_args()
+
+    rosters, profiles = make_roster(args.accounts, args.chars)
+    server, base_url = start_stub_server(
+        rosters, profiles, host=args.host, port=args.port,
+        rate_limit=args.rate_limit, error_rate=args.error_rate, latency_ms=args.latency_ms,
+        market=make_market(args.market_items), price_jitter=args.price_jitter,
+    )
+    print(f"스텁 서버 실행 중: {base_url}")
+    print("대표 캐릭터: " + ", ".join(rosters.keys()))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import pandas as pd
+import streamlit as st
+from datetime import datetime
+from core.database import get_weekly_income, get_income_history, get_dashboard_snapshot
+from core.reset_calendar import KST, project_income
+
+# ---------------------------------------------------------
+# 원정대 경영 지표 (탭 2)
+# ---------------------------------------------------------
+# 숙제 목록을 다시 계산하지 않고 주간 수익 집계(weekly_income)만 읽습니다.
+
+HISTORY_WEEKS = 12
+
+def render_economics():
+    try:
+        rows = get_weekly_income()
+    except Exception as e:
+        st.error(f"데이터 로딩 실패: {e}")
+        return
+    if not rows:
+        st.info("아직 집계된 캐릭터가 없습니다. 사이드바에서 원정대를 동기화해주세요.")
+        return
+
+    # 1. 이번 주 요약
+    planned = sum(r['planned_gold'] for r in rows)
+    realized = sum(r['realized_gold'] for r in rows)
+    spent = sum(r['spent_gold'] for r in rows)
+    net = sum(r['net_gold'] for r in rows)
+
+    st.markdown(f"### 이번 주 ({rows[0]['week_start'].astimezone(KST):%m/%d} 수요일부터)")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("예상 수익", f"{planned:,} G")
+    c2.metric("획득 수익", f"{realized:,} G", f"{realized / planned:.0%} 달성" if planned else None, delta_color="off")
+    c3.metric("사용 골드", f"{spent:,} G")
+    c4.metric("순이익", f"{net:,} G")
+
+    # 2. 원정대별 / 캐릭터별
+    df = pd.DataFrame(rows)
+    df['account_name'] = df['account_name'].fillna('')
+    columns = {
+        'planned_gold': '예상 수익', 'realized_gold': '획득 수익',
+        'spent_gold': '사용 골드', 'net_gold': '순이익',
+    }
+
+    st.markdown("#### 원정대별")
+    by_account = df.groupby('account_name')[list(columns)].sum().sort_values('net_gold', ascending=False)
+    st.dataframe(by_account.rename(columns=columns).rename_axis('원정대'), use_container_width=True)
+
+    with st.expander("캐릭터별 보기"):
+        by_char = df[['character_name', 'account_name', *columns]].rename(
+            columns={'character_name': '캐릭터', 'account_name': '원정대', **columns}
+        )
+        st.dataframe(by_char, hide_index=True, use_container_width=True)
+
+    # 3. 주별 추이
+    st.markdown(f"#### 최근 {HISTORY_WEEKS}주 추이")
+    history = get_income_history(HISTORY_WEEKS)
+    if history:
+        history_df = pd.DataFrame(history)
+        # week_start는 TIMESTAMPTZ (DB 세션 타임존으로 옴) → 주 시작 날짜는 KST 기준으로 표시
+        history_df['week_start'] = pd.to_datetime(history_df['week_start'], utc=True).dt.tz_convert(KST)
+        trend = history_df.groupby('week_start')[list(columns)].sum()
+        trend.index = trend.index.strftime('%m/%d')
+        st.bar_chart(trend[['realized_gold', 'spent_gold']].rename(columns=columns))
+        st.line_chart(trend[['planned_gold', 'net_gold']].rename(columns=columns))
+
+    # 4. 목표일까지 주별 예상 수익 (리셋 달력 기준)
+    target_date_str = get_dashboard_snapshot()['settings'].get("target_date")
+    if target_date_str:
+        projection = project_income(rows, datetime.strptime(target_date_str, "%Y-%m-%d").date())
+        if projection['by_week']:
+            st.markdown(f"#### 목표일({target_date_str})까지 예상 수익: {projection['total']:,} G")
+            forecast = pd.DataFrame(projection['by_week'], columns=['week_start', '예상 수익'])
+            forecast['누적'] = forecast['예상 수익'].cumsum()
+            forecast.index = forecast.pop('week_start').dt.strftime('%m/%d')
+            st.area_chart(forecast[['누적']])
@@ -0,0 +1,59 @@
+import pandas as pd
+import streamlit as st
+from datetime import datetime, timedelta
+from core.market_tracker import MARKET_CATEGORIES, POLL_MINUTES, get_market_items, get_price_series
+from core.reset_calendar import KST
+
+# ---------------------------------------------------------
+# 거래소 시세 추이 (탭 3)
+# ---------------------------------------------------------
+# 원본 시세(market_prices)는 훑지 않고 수집할 때 갱신해 둔 봉(market_ohlc)만 읽습니다.
+
+CATEGORY_LABELS = {50000: "강화 재료", 40000: "각인서"}
+RESOLUTION_LABELS = {"hour": "시간봉 (최근 3일)", "day": "일봉 (최근 60일)"}
+RESOLUTION_RANGES = {"hour": timedelta(days=3), "day": timedelta(days=60)}
+
+def render_market():
+    try:
+        items = get_market_items()
+    except Exception as e:
+        st.error(f"데이터 로딩 실패: {e}")
+        return
+    if not items:
+        if POLL_MINUTES > 0:
+            st.info("아직 수집된 시세가 없습니다. 잠시 후 다시 확인해주세요.")
+        else:
+            st.info("수집된 시세가 없습니다. .env에 LOA_MARKET_POLL_MINUTES를 설정하면 주기적으로 수집합니다.")
+        return
+
+    c_cat, c_item, c_res = st.columns([2, 4, 2])
+    with c_cat:
+        codes = [c for c in MARKET_CATEGORIES if any(i['category_code'] == c for i in items)] or MARKET_CATEGORIES
+        category = st.selectbox("카테고리", codes, format_func=lambda c: CATEGORY_LABELS.get(c, str(c)))
+    with c_item:
+        in_category = [i for i in items if i['category_code'] == category]
+        if not in_category:
+            st.caption("이 카테고리에 수집된 아이템이 없습니다.")
+            return
+        item = st.selectbox("아이템", in_category,
+                            format_func=lambda i: f"{i['item_name']} ({i['grade']})" if i['grade'] else i['item_name'])
+    with c_res:
+        resolution = st.radio("봉 단위", list(RESOLUTION_LABELS), format_func=RESOLUTION_LABELS.get)
+
+    series = get_price_series(item['item_id'], resolution,
+                              start=datetime.now(KST) - RESOLUTION_RANGES[resolution])
+    if not series:
+        st.caption("이 기간에 수집된 시세가 없습니다.")
+        return
+
+    df = pd.DataFrame(series)
+    # bucket_start는 TIMESTAMPTZ → KST로 표시
+    df.index = pd.to_datetime(df.pop('bucket_start'), utc=True).dt.tz_convert(KST)
+    last = df.iloc[-1]
+    c1, c2, c3 = st.columns(3)
+    c1.metric("최근 최저가", f"{last['close']:,} G",
+              f"{last['close'] - df.iloc[0]['open']:+,} G (기간 시작 대비)" if len(df) > 1 else None,
+              delta_color="inverse")
+    c2.metric("기간 최저", f"{df['low'].min():,} G")
+    c3.metric("기간 최고", f"{df['high'].max():,} G")
+    st.line_chart(df[['close', 'low', 'high']].rename(columns={'close': '종가', 'low': '저가', 'high': '고가'}))
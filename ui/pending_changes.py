@@ -0,0 +1,93 @@
+import os
+import time
+import streamlit as st
+from core.database import apply_pending_changes
+
+# ---------------------------------------------------------
+# 체크리스트 변경 사항 모아서 저장하기
+# ---------------------------------------------------------
+# 체크/메모/사용 골드 변경을 바로 DB에 쓰지 않고 세션에 모아 두었다가,
+# 잠깐(FLUSH_DEBOUNCE_SEC) 입력이 멈추거나 '저장' 버튼을 누르면 한 트랜잭션으로 저장합니다.
+# 화면은 위젯 값 + 대기 중인 변경 사항으로 그리므로 즉시 반영된 것처럼 보입니다.
+
+FLUSH_DEBOUNCE_SEC = float(os.getenv("LOA_FLUSH_DEBOUNCE_SEC", 2))
+
+_STATE_KEY = "pending_changes"
+_FLUSH_BUTTON_KEY = "flush_pending_btn"
+
+def _pending():
+    if _STATE_KEY not in st.session_state:
+        st.session_state[_STATE_KEY] = {"tasks": {}, "memos": {}, "spent": {}, "last_change": None}
+    return st.session_state[_STATE_KEY]
+
+def _touch(pending):
+    pending["last_change"] = time.monotonic()
+
+def queue_task_count(task_id, current_count):
+    pending = _pending()
+    pending["tasks"][task_id] = current_count
+    _touch(pending)
+
+def queue_memo(char_name, memo):
+    pending = _pending()
+    pending["memos"][char_name] = memo
+    _touch(pending)
+
+def queue_spent_gold(char_name, amount):
+    pending = _pending()
+    pending["spent"][char_name] = amount
+    _touch(pending)
+
+def pending_count():
+    pending = _pending()
+    return len(pending["tasks"]) + len(pending["memos"]) + len(pending["spent"])
+
+# 화면 표시용: 저장 전이라도 사용자가 바꾼 값을 우선 보여줌
+def effective_task_count(task):
+    return _pending()["tasks"].get(task['id'], task['current_count'])
+
+def effective_memo(char):
+    return _pending()["memos"].get(char['character_name'], char['memo'] or "")
+
+def effective_spent_gold(char):
+    return _pending()["spent"].get(char['character_name'], char['week_gold_spent'])
+
+def flush_pending_changes():
+    """모아둔 변경 사항을 한 번에 저장합니다. 실패하면 버퍼를 그대로 두고 False를 반환합니다."""
+    pending = _pending()
+    if not (pending["tasks"] or pending["memos"] or pending["spent"]):
+        return True
+    try:
+        apply_pending_changes(pending["tasks"], pending["memos"], pending["spent"])
+    except Exception as e:
+        st.error(f"저장 실패 (다시 시도합니다): {e}")
+        return False
+    pending["tasks"], pending["memos"], pending["spent"] = {}, {}, {}
+    pending["last_change"] = None
+    return True
+
+def flush_if_idle():
+    """
+    '저장' 버튼을 눌렀거나 마지막 변경 후 FLUSH_DEBOUNCE_SEC가 지났으면 저장 (1초마다 도는 fragment 맨 앞에서 호출)
+    버튼 클릭도 여기서 처리해야 같은 rerun에서 그리는 배너/대기 건수가 저장 후 값으로 나옴
+    """
+    last_change = _pending()["last_change"]
+    if st.session_state.get(_FLUSH_BUTTON_KEY) or (
+        last_change is not None and time.monotonic() - last_change >= FLUSH_DEBOUNCE_SEC
+    ):
+        flush_pending_changes()
+
+def render_pending_bar():
+    """
+    저장 대기 표시 + 저장 버튼 (fragment 안에서 flush_if_idle 다음에 호출).
+    저장하면 데이터 버전이 올라가므로 카드 fragment들은 다음 rerun 때 캐시에서 저장된 값을 다시 읽습니다.
+    (위젯 값은 이미 입력한 값이라 앱 전체를 다시 그릴 필요 없음)
+    """
+    count = pending_count()
+    c_msg, c_btn = st.columns([8, 2])
+    with c_msg:
+        if count:
+            st.caption(f"💾 저장 대기 중인 변경 {count}건")
+    with c_btn:
+        # 클릭 처리는 flush_if_idle (버튼 안에서 fragment만 rerun 되므로 앱 전체 rerun 없음)
+        st.button("저장", key=_FLUSH_BUTTON_KEY, disabled=not count, use_container_width=True)
@@ -0,0 +1,47 @@
+import pandas as pd
+import streamlit as st
+from core import instrumentation
+
+# ---------------------------------------------------------
+# 성능 프로파일 패널 (사이드바, LOA_PROFILE=1 일 때만)
+# ---------------------------------------------------------
+# 방금 끝난 rerun과 최근 동기화 작업에서 시간이 DB 연결 / SQL / API / 화면 그리기 중
+# 어디에 쓰였는지 보여줍니다.
+
+KIND_LABELS = {"db": "DB", "api": "API", "render": "화면"}
+
+def _profile_table(profile):
+    rows = profile.rows()
+    if not rows:
+        st.caption("기록된 작업이 없습니다.")
+        return
+    df = pd.DataFrame(rows)
+    df['kind'] = df['kind'].map(lambda k: KIND_LABELS.get(k, k))
+    df['statuses'] = df['statuses'].map(lambda s: ", ".join(f"{k}×{v}" for k, v in s.items()))
+    st.dataframe(
+        df.rename(columns={
+            'kind': '종류', 'name': '작업', 'count': '횟수', 'total_ms': '합계(ms)', 'max_ms': '최대(ms)',
+            'rows': '행 수', 'errors': '오류', 'statuses': 'HTTP 상태',
+        }),
+        hide_index=True, use_container_width=True,
+    )
+
+def render_profile_panel(profile):
+    if profile is None:
+        return
+    with st.sidebar.expander("⏱️ 성능 프로파일"):
+        st.caption(f"이번 rerun: {profile.elapsed * 1000:,.0f} ms")
+        by_kind = profile.by_kind()
+        if by_kind:
+            cols = st.columns(len(by_kind))
+            for col, (kind, entry) in zip(cols, by_kind.items()):
+                col.metric(KIND_LABELS.get(kind, kind), f"{entry['total_ms']:,.0f} ms", f"{entry['count']}회",
+                           delta_color="off")
+        _profile_table(profile)
+
+        jobs = instrumentation.recent_profiles("sync_job")
+        if jobs:
+            st.markdown("**최근 동기화 작업**")
+            job = jobs[0]
+            st.caption(f"{job.label} · {job.elapsed * 1000:,.0f} ms")
+            _profile_table(job)
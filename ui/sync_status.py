@@ -0,0 +1,41 @@
+import streamlit as st
+from core.sync_jobs import get_sync_job
+
+# ---------------------------------------------------------
+# 백그라운드 동기화 진행 상황 (사이드바)
+# ---------------------------------------------------------
+# 작업은 워커 스레드가 처리하고, 여기서는 sync_jobs 행을 1초마다 읽어서 보여주기만 합니다.
+# 작업이 끝나면 앱 전체를 한 번 다시 그려 새 데이터를 반영합니다.
+
+@st.fragment(run_every=1)
+def render_sync_status(job_id):
+    try:
+        job = get_sync_job(job_id)
+    except Exception as e:
+        st.caption(f"동기화 상태 확인 실패: {e}")
+        return
+    if job is None:
+        st.session_state.pop('sync_job_id', None)
+        return
+
+    if job['status'] in ('queued', 'running'):
+        if job['status'] == 'queued':
+            st.caption("⏳ 동기화 대기 중...")
+        total_names = max(job['total_names'], 1)
+        st.progress(job['done_names'] / total_names,
+                    text=f"원정대 {job['done_names']}/{job['total_names']} · 캐릭터 {job['done_characters']}/{job['total_characters']}")
+        if job['current_step']:
+            st.caption(job['current_step'])
+        return
+
+    # 끝난 작업: 결과를 남겨두고 전체 화면 갱신
+    if job['status'] == 'done':
+        st.session_state['sync_result'] = ("success", "✅ 모든 동기화 완료!")
+    else:
+        st.session_state['sync_result'] = ("error", f"오류 발생: {job['message']}")
+    if job['status'] == 'done' and job['message']:
+        st.session_state['sync_warning'] = job['message']
+    else:
+        st.session_state.pop('sync_warning', None)
+    st.session_state.pop('sync_job_id', None)
+    st.rerun()
@@ -1,50 +1,30 @@
 import streamlit as st
 from datetime import datetime
 from core.database import (
-    PostgresDB, update_memo, update_spent_gold, 
-    get_app_setting, get_expedition_tasks, add_expedition_task, 
-    delete_expedition_task, update_expedition_task_check
+    get_dashboard_snapshot, get_expedition_tasks, add_expedition_task, 
+    delete_expedition_task, update_expedition_task_check, get_weekly_income
+)
+from core.reset_calendar import project_income
+from ui.view_model import get_roster_view, get_character_card
+from ui.pending_changes import (
+    queue_task_count, queue_memo, queue_spent_gold, render_pending_bar, flush_if_idle,
+    effective_task_count, effective_memo, effective_spent_gold
 )
 
 def render_todo_list():
     """숙제 리스트 렌더링 메인 함수"""
+
+    # 캐릭터/숙제/설정을 한 번에 읽음 (쓰기가 없었던 rerun이면 DB 조회 없이 캐시 사용)
+    try:
+        snapshot = get_dashboard_snapshot()
+    except Exception as e:
+        st.error(f"데이터 로딩 실패: {e}")
+        return
     
     # ---------------------------------------------------------
-    # 1. 💰 목표 달성 계산기 (Goal Calculator)
+    # 1. 💰 목표 달성 계산기 (Goal Calculator) + 저장 대기 표시
     # ---------------------------------------------------------
-    # DB에서 목표 날짜 가져오기
-    target_date_str = get_app_setting("target_date")
-    if not target_date_str:
-        target_date_str = datetime.now().strftime("%Y-%m-%d")
-    
-    target_date = datetime.strptime(target_date_str, "%Y-%m-%d").date()
-    today = datetime.now().date()
-    
-    # 남은 기간 계산 (수요일 기준 리셋 횟수 계산이 정확하지만, 일단 단순 주 단위 계산)
-    days_left = (target_date - today).days
-    weeks_left = max(0, days_left // 7)
-    
-    # 주간 총 예상 수익 계산 (DB에서 전체 긁어오기)
-    weekly_total_income = 0
-    try:
-        with PostgresDB() as cur:
-            cur.execute("SELECT gold_reward, total_count FROM todos WHERE category = '주간'")
-            rows = cur.fetchall()
-            for r in rows:
-                weekly_total_income += (r['gold_reward'] * r['total_count'])
-    except:
-        weekly_total_income = 0
-        
-    projected_income = weekly_total_income * weeks_left
-
-    # 상단 배너 출력
-    st.info(f"""
-     **목표일({target_date})까지 남은 시간: {weeks_left}주 ({days_left}일)**
-    \n 주간 원정대 수익: **{weekly_total_income:,} G**  
-    \n 목표일까지 예상 수익: **{projected_income:,} G**
-    """)
-
-    st.write("") 
+    _render_goal_and_pending()
 
     # ---------------------------------------------------------
     # 2. 🏰 원정대 통합 숙제 (Customizable)
@@ -82,107 +62,155 @@ def render_todo_list():
     # ---------------------------------------------------------
     sub_tab_weekly, sub_tab_daily = st.tabs(["주간 숙제", "일일 숙제"])
 
-    try:
-        with PostgresDB() as cur:
-            # 전투력 높은 순 정렬 (요구사항 5번 이미 적용됨 - DB Upsert 시점이 아닌 조회 시점 정렬 필요)
-            # 하지만 loa_api에서 이미 combat_power를 업데이트 해줬고, upsert에서 저장함.
-            # 여기서 불러올 때 ORDER BY combat_power DESC 하면 됨.
-            cur.execute("SELECT * FROM characters ORDER BY combat_power DESC") 
-            characters = cur.fetchall()
-
-            cur.execute("SELECT * FROM todos ORDER BY id ASC")
-            all_todos = cur.fetchall()
-            
-    except Exception as e:
-        st.error(f"데이터 로딩 실패: {e}")
-        return
+    # (캐릭터는 스냅샷에서 이미 전투력 높은 순으로 정렬되어 있음)
+    # 캐릭터별 숙제 분류/정렬/수익 계산은 한 번만 하고 두 탭이 같이 사용
+    cards = get_roster_view(snapshot)
 
     with sub_tab_weekly:
-        _render_character_cards(characters, all_todos, "WEEKLY")
+        _render_character_cards(cards, "WEEKLY")
     with sub_tab_daily:
-        _render_character_cards(characters, all_todos, "DAILY")
+        _render_character_cards(cards, "DAILY")
+
+
+@st.fragment(run_every=1)
+def _render_goal_and_pending():
+    """
+    목표 배너 + 저장 대기 표시 (독립 fragment, 1초마다 rerun)
+    체크/메모/골드 변경은 모아 두었다가 잠깐 멈추면 여기서 자동 저장하고,
+    같은 rerun에서 배너가 갱신된 집계를 캐시에서 다시 읽습니다. (앱 전체 rerun 없음)
+    """
+    flush_if_idle()
+    _render_goal_calculator()
+    render_pending_bar()
+
+
+def _render_goal_calculator():
+    """목표 달성 배너 (스냅샷/집계 캐시만 읽음 - 쓰기가 없었으면 DB 조회 없음)"""
+    snapshot = get_dashboard_snapshot()
+
+    # 목표 날짜 가져오기
+    target_date_str = snapshot['settings'].get("target_date")
+    if not target_date_str:
+        target_date_str = datetime.now().strftime("%Y-%m-%d")
+    
+    target_date = datetime.strptime(target_date_str, "%Y-%m-%d").date()
+    today = datetime.now().date()
+    days_left = (target_date - today).days
+    
+    # 목표일 06:00 전까지 실제 수요일 06:00 리셋 횟수로 계산 (이번 주는 아직 안 한 숙제만)
+    projection = project_income(get_weekly_income(), target_date)
+
+    # 상단 배너 출력
+    st.info(f"""
+     **목표일({target_date})까지 남은 시간: 주간 리셋 {projection['weeks_left']}회 ({max(0, days_left)}일)**
+    \n 주간 원정대 수익: **{projection['weekly_income']:,} G** (이번 주 남은 수익 {projection['remaining_this_week']:,} G)  
+    \n 목표일까지 예상 수익: **{projection['total']:,} G**
+    """)
 
 
-def _render_character_cards(characters, all_todos, target_tab):
-    """캐릭터 카드 렌더링 (수익 계산 수정본 유지)"""
+def _render_character_cards(cards, target_tab):
+    """캐릭터 카드 렌더링 (ui.view_model에서 미리 분류/계산된 카드 사용)"""
     cols = st.columns(4)
     
-    for idx, char in enumerate(characters):
-        char_name = char['character_name']
-        
+    for idx, card in enumerate(cards):
         with cols[idx % 4]:
-            with st.container(border=True):
-                # A. 헤더
-                st.markdown(f"""
-                    <div class="char-card-header">
-                        <span class="char-name">{char_name}</span>
-                        <span class="char-details">
-                            {char['character_class']} | 
-                            Lv.{char['item_avg_level']:.2f} | 
-                            🗡️{char['combat_power']:,}
-                        </span>
-                    </div>
-                """, unsafe_allow_html=True)
-                st.markdown("<hr class='half-margin'>", unsafe_allow_html=True)
-
-                # B. 수익 계산 및 숙제 필터링
-                my_tasks = [t for t in all_todos if t['character_name'] == char_name]
-                weekly_tasks = [t for t in my_tasks if t['category'] == '주간']
-                # 주간 총 수익 계산 (탭 상관없이 고정)
-                total_income = sum(t['gold_reward'] for t in weekly_tasks)
-
-                if target_tab == "WEEKLY":
-                    st.checkbox("길드 상점 / 혈석 교환", key=f"guild_{char_name}")
-                    
-                    # 골드순 정렬
-                    weekly_tasks.sort(key=lambda x: x['gold_reward'], reverse=True)
+            _render_character_card(card['character']['character_name'], target_tab)
+
+
+@st.fragment
+def _render_character_card(char_name, target_tab):
+    """
+    캐릭터 카드 1장 (독립 fragment)
+    체크/메모/골드 입력은 on_change 콜백에서 저장 대기열(ui.pending_changes)에 넣고, 해당 카드만 다시 그립니다.
+    (앱 전체 rerun 없음 → 캐릭터 수가 늘어도 클릭 후 지연 시간 일정)
+    fragment만 rerun 될 때도 마지막 전체 실행 때의 카드가 아니라 최신 스냅샷(캐시)에서 카드를 다시 읽습니다.
+    """
+    card = get_character_card(get_dashboard_snapshot(), char_name)
+    if card is None:
+        return
+    char = card['character']
+    char_name = char['character_name']
+
+    with st.container(border=True):
+        # A. 헤더
+        st.markdown(f"""
+            <div class="char-card-header">
+                <span class="char-name">{char_name}</span>
+                <span class="char-details">
+                    {char['character_class']} | 
+                    Lv.{char['item_avg_level']:.2f} | 
+                    🗡️{char['combat_power']:,}
+                </span>
+            </div>
+        """, unsafe_allow_html=True)
+        st.markdown("<hr class='half-margin'>", unsafe_allow_html=True)
+
+        # B. 수익 및 숙제 (뷰 모델에서 이미 골드순 정렬/합계 완료)
+        weekly_tasks = card['weekly']
+        total_income = card['weekly_income']
+
+        if target_tab == "WEEKLY":
+            st.checkbox("길드 상점 / 혈석 교환", key=f"guild_{char_name}")
+            
+            if not weekly_tasks:
+                st.caption("주간 숙제 없음")
+            else:
+                for task in weekly_tasks:
+                    label = f"{task['task_name']} - {task['gold_reward']:,} G"
+                    if task['total_count'] > 1:
+                        label += f" ({effective_task_count(task)}/{task['total_count']})"
                     
-                    if not weekly_tasks:
-                        st.caption("주간 숙제 없음")
-                    else:
-                        for task in weekly_tasks:
-                            is_done = (task['current_count'] >= task['total_count'])
-                            label = f"{task['task_name']} - {task['gold_reward']:,} G"
-                            if task['total_count'] > 1:
-                                label += f" ({task['current_count']}/{task['total_count']})"
-                            
-                            checked = st.checkbox(label, value=is_done, key=f"chk_w_{task['id']}")
-                            if checked != is_done:
-                                _update_task_status(task['id'], task['total_count'], checked)
-
-                elif target_tab == "DAILY":
-                    st.checkbox("카.가.길", key=f"kagagil_{char_name}")
-                    daily_tasks = [t for t in my_tasks if t['category'] == '일일']
-                    for task in daily_tasks:
-                        is_done = (task['current_count'] >= task['total_count'])
-                        checked = st.checkbox(task['task_name'], value=is_done, key=f"chk_d_{task['id']}")
-                        if checked != is_done:
-                            _update_task_status(task['id'], task['total_count'], checked)
-
-                st.markdown("<hr class='half-margin'>", unsafe_allow_html=True)
-
-                # C. 경제 및 메모
-                c1, c2 = st.columns([1, 1])
-                with c1:
-                    spent = st.number_input("사용 골드", min_value=0, step=100, value=char['week_gold_spent'], key=f"spent_{char_name}_{target_tab}", placeholder="0")
-                    if spent != char['week_gold_spent']:
-                        update_spent_gold(char_name, spent)
-                        st.rerun()
-                with c2:
-                    st.markdown(f"""
-                        <div class="economy-container">
-                            <div class="economy-label">예상 수익</div>
-                            <div class="economy-value">+{total_income:,} G</div>
-                        </div>
-                    """, unsafe_allow_html=True)
-
-                memo = st.text_area("메모", value=char['memo'] if char['memo'] else "", height=68, key=f"memo_{char_name}_{target_tab}", label_visibility="collapsed", placeholder="메모...")
-                if memo != (char['memo'] if char['memo'] else ""):
-                    update_memo(char_name, memo)
-                    st.rerun()
-
-def _update_task_status(task_id, total_count, is_checked):
-    new_val = total_count if is_checked else 0
-    with PostgresDB() as cur:
-        cur.execute("UPDATE todos SET current_count = %s WHERE id = %s", (new_val, task_id))
-    st.rerun()
\ No newline at end of file
+                    key = f"chk_w_{task['id']}"
+                    st.checkbox(label, value=_is_done_locally(task), key=key,
+                                on_change=_on_task_toggle, args=(task['id'], task['total_count'], key))
+
+        elif target_tab == "DAILY":
+            st.checkbox("카.가.길", key=f"kagagil_{char_name}")
+            for task in card['daily']:
+                key = f"chk_d_{task['id']}"
+                st.checkbox(task['task_name'], value=_is_done_locally(task), key=key,
+                            on_change=_on_task_toggle, args=(task['id'], task['total_count'], key))
+
+        st.markdown("<hr class='half-margin'>", unsafe_allow_html=True)
+
+        # C. 경제 및 메모
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            spent_key = f"spent_{char_name}_{target_tab}"
+            st.number_input("사용 골드", min_value=0, step=100, value=effective_spent_gold(char), key=spent_key, placeholder="0",
+                            on_change=_on_spent_change, args=(char_name, spent_key))
+        with c2:
+            st.markdown(f"""
+                <div class="economy-container">
+                    <div class="economy-label">예상 수익</div>
+                    <div class="economy-value">+{total_income:,} G</div>
+                </div>
+            """, unsafe_allow_html=True)
+
+        memo_key = f"memo_{char_name}_{target_tab}"
+        st.text_area("메모", value=effective_memo(char), height=68, key=memo_key, label_visibility="collapsed", placeholder="메모...",
+                     on_change=_on_memo_change, args=(char_name, memo_key))
+
+def _is_done_locally(task):
+    return effective_task_count(task) >= task['total_count']
+
+# ---------------------------------------------------------
+# 위젯 콜백 (값이 실제로 바뀌었을 때만 호출됨) - DB 대신 저장 대기열에 기록
+# ---------------------------------------------------------
+def _on_task_toggle(task_id, total_count, key):
+    queue_task_count(task_id, total_count if st.session_state[key] else 0)
+
+def _sync_other_tab(key, value):
+    # 같은 캐릭터의 주간/일일 탭 위젯 값을 맞춤 (다른 탭 카드는 이번 fragment rerun에서 다시 그려지지 않음)
+    for tab in ("WEEKLY", "DAILY"):
+        other = key.rsplit("_", 1)[0] + f"_{tab}"
+        if other != key and other in st.session_state:
+            st.session_state[other] = value
+
+def _on_spent_change(char_name, key):
+    queue_spent_gold(char_name, st.session_state[key] or 0)
+    _sync_other_tab(key, st.session_state[key])
+
+def _on_memo_change(char_name, key):
+    queue_memo(char_name, st.session_state[key])
+    _sync_other_tab(key, st.session_state[key])
@@ -0,0 +1,72 @@
+import threading
+from core.reset_manager import effective_todos, current_reset_epoch
+
+# ---------------------------------------------------------
+# 캐릭터 카드용 뷰 모델
+# ---------------------------------------------------------
+# 캐릭터마다 전체 숙제 리스트를 다시 훑던 방식(O(캐릭터 × 숙제)) 대신,
+# 숙제를 한 번만 돌면서 캐릭터/카테고리별로 나눠 담고 정렬·수익 계산까지 끝내 둡니다.
+# 주간/일일 탭이 같은 결과를 같이 씁니다. (Streamlit 의존성 없음)
+
+WEEKLY = '주간'
+DAILY = '일일'
+
+def is_task_done(task):
+    return task['current_count'] >= task['total_count']
+
+def build_roster_view(characters, todos):
+    """
+    반환값: characters 순서대로 카드 정보 리스트
+      {character, weekly(골드순), daily(id순), weekly_income, weekly_done, daily_done}
+    """
+    buckets = {c['character_name']: {WEEKLY: [], DAILY: []} for c in characters}
+    for task in todos:
+        char_bucket = buckets.get(task['character_name'])
+        if char_bucket is None:
+            continue
+        category_bucket = char_bucket.get(task['category'])
+        if category_bucket is not None:
+            category_bucket.append(task)
+
+    cards = []
+    for char in characters:
+        bucket = buckets[char['character_name']]
+        weekly = sorted(bucket[WEEKLY], key=lambda x: x['gold_reward'], reverse=True)
+        daily = bucket[DAILY]
+        cards.append({
+            "character": char,
+            "weekly": weekly,
+            "daily": daily,
+            # 주간 총 수익 (탭 상관없이 고정)
+            "weekly_income": sum(t['gold_reward'] for t in weekly),
+            "weekly_done": sum(1 for t in weekly if is_task_done(t)),
+            "daily_done": sum(1 for t in daily if is_task_done(t)),
+        })
+    return cards
+
+
+_view_cache = None   # ((snapshot version, 리셋 경계), cards, {캐릭터 이름: card})
+_view_lock = threading.Lock()
+
+def _cached_view(snapshot):
+    global _view_cache
+    key = (snapshot['version'], current_reset_epoch())
+    cached = _view_cache
+    if cached is not None and cached[0] == key:
+        return cached
+    cards = build_roster_view(snapshot['characters'], effective_todos(snapshot['todos']))
+    cached = (key, cards, {card['character']['character_name']: card for card in cards})
+    with _view_lock:
+        _view_cache = cached
+    return cached
+
+def get_roster_view(snapshot):
+    """
+    스냅샷 버전과 리셋 경계가 같으면 이미 만든 뷰 모델을 재사용합니다.
+    (lazy 리셋 모드에서는 쓰기가 없어도 경계가 지나면 완료 여부가 바뀌므로 경계도 키에 포함)
+    """
+    return _cached_view(snapshot)[1]
+
+def get_character_card(snapshot, char_name):
+    """캐릭터 1명의 카드 (카드 fragment가 자체 rerun 때 최신 데이터를 다시 읽는 용도, 없으면 None)"""
+    return _cached_view(snapshot)[2].get(char_name)